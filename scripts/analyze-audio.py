@@ -1,53 +1,140 @@
+import argparse
+import csv
+import json
 import os
-import numpy as np
-from pydub import AudioSegment
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-def analyze_audio(file_path):
-    print(f"Analyzing {file_path}...")
+from audio_analysis import CHUNK_SECONDS, analyze_file, finite_or_none
+
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".opus", ".ogg", ".flac")
+
+CSV_FIELDS = [
+    "file", "duration", "breaks", "clipping_samples", "rms", "peak",
+    "integrated_lufs", "true_peak_dbtp", "seam_ratio_db", "seam_dip_db", "dc_offset", "analysis_seconds", "error",
+]
+
+def analyze_audio(file_path, chunk_seconds=CHUNK_SECONDS):
+    """Analyse one file in bounded-size chunks; errors are reported, not raised"""
+    start = time.perf_counter()
     try:
-        audio = AudioSegment.from_file(file_path)
-        samples = np.array(audio.get_array_of_samples())
-        
-        # Check for silence/breaks (values near zero for more than 50ms)
-        sample_rate = audio.frame_rate
-        min_silence_len = int(sample_rate * 0.05) # 50ms
-        
-        # Simple threshold for silence
-        threshold = 10 
-        is_silent = np.abs(samples) < threshold
-        
-        breaks = []
-        count = 0
-        for i, silent in enumerate(is_silent):
-            if silent:
-                count += 1
-            else:
-                if count > min_silence_len:
-                    breaks.append((i - count, i))
-                count = 0
-        
-        # Check for feedback/clipping (values at max)
-        max_val = 2**(audio.sample_width * 8 - 1) - 1
-        clipping = np.sum(np.abs(samples) >= max_val - 100)
-        
-        print(f"  - Duration: {len(audio)/1000:.2f}s")
-        print(f"  - Breaks found: {len(breaks)}")
-        print(f"  - Clipping samples: {clipping}")
-        
-        if len(breaks) > 0:
-            for start, end in breaks[:5]:
-                print(f"    - Break at {start/sample_rate:.2f}s to {end/sample_rate:.2f}s")
-                
+        report = analyze_file(file_path, chunk_seconds)
+        report["error"] = None
     except Exception as e:
-        print(f"  - Error: {e}")
+        report = {"error": str(e)}
+    report["file"] = file_path
+    report["analysis_seconds"] = time.perf_counter() - start
+    return report
 
-if __name__ == "__main__":
-    audio_dir = "assets/audio"
-    if not os.path.exists(audio_dir):
-        print(f"Directory {audio_dir} not found")
+def print_report(report):
+    print(f"Analyzed {report['file']} in {report['analysis_seconds']:.2f}s")
+    if report["error"]:
+        print(f"  - Error: {report['error']}")
+        return
+
+    breaks = report["breaks"]
+    print(f"  - Duration: {report['duration']:.2f}s")
+    print(f"  - Breaks found: {len(breaks)}")
+    print(f"  - Clipping samples: {report['clipping_samples']}")
+    print(f"  - RMS: {report['rms']:.4f}  Peak: {report['peak']:.4f}")
+    print(f"  - Loudness: {report['integrated_lufs']:.1f} LUFS  True peak: {report['true_peak_dbtp']:.1f} dBTP")
+    print(f"  - Loop seam: {report['seam_ratio_db']:+.1f} dB jump, {report['seam_dip_db']:+.1f} dB level at the ends")
+    print(f"  - DC offset: {', '.join(f'{dc:+.5f}' for dc in report['dc_offset'])}")
+
+    if len(breaks) > 0:
+        for start, end in breaks[:5]:
+            print(f"    - Break at {start:.2f}s to {end:.2f}s")
+
+def find_audio_files(audio_dir):
+    return sorted(
+        os.path.join(audio_dir, file) for file in os.listdir(audio_dir)
+        if file.lower().endswith(AUDIO_EXTENSIONS)
+    )
+
+def analyze_catalogue(files, workers=1, chunk_seconds=CHUNK_SECONDS):
+    """Analyse files across a process pool, returning reports in input order"""
+    if workers <= 1:
+        reports = []
+        for file in files:
+            report = analyze_audio(file, chunk_seconds)
+            print_report(report)
+            reports.append(report)
+        return reports
+
+    reports = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(analyze_audio, file, chunk_seconds): file for file in files}
+        for future in as_completed(futures):
+            report = future.result()
+            print_report(report)
+            reports[futures[future]] = report
+    return [reports[file] for file in files]
+
+def write_json(path, reports, wall_time):
+    # -inf metrics (silence, a seamless loop) become null: strict JSON has no -Infinity
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(finite_or_none({"wall_time": wall_time, "tracks": reports}), f, indent=2, allow_nan=False)
+
+def write_csv(path, reports):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for report in reports:
+            row = finite_or_none(report)
+            if not report["error"]:
+                row["breaks"] = len(report["breaks"])
+                row["dc_offset"] = " ".join(f"{dc:+.6f}" for dc in report["dc_offset"])
+            writer.writerow(row)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse the Harmonia audio catalogue")
+    parser.add_argument("audio_dir", nargs="?", default="assets/audio",
+                        help="directory of audio files (default: assets/audio)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of worker processes (0 = one per CPU)")
+    parser.add_argument("--json", metavar="PATH", help="write the full report as JSON")
+    parser.add_argument("--csv", metavar="PATH", help="write per-track metrics as CSV")
+    parser.add_argument("--max-seam-db", type=float, default=None,
+                        help="exit non-zero if a track's loop seam jumps, or its ends dip, by more "
+                             "than this many dB (e.g. 12; a seamless loop reads near 0 dB)")
+    parser.add_argument("--chunk-seconds", type=float, default=CHUNK_SECONDS,
+                        help=f"decode/analysis chunk length (default: {CHUNK_SECONDS:g})")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.exists(args.audio_dir):
+        print(f"Directory {args.audio_dir} not found")
         sys.exit(1)
-        
-    for file in os.listdir(audio_dir):
-        if file.endswith(".mp3"):
-            analyze_audio(os.path.join(audio_dir, file))
+
+    workers = args.jobs or os.cpu_count() or 1
+    files = find_audio_files(args.audio_dir)
+
+    start = time.perf_counter()
+    reports = analyze_catalogue(files, workers, args.chunk_seconds)
+    wall_time = time.perf_counter() - start
+
+    if args.json:
+        write_json(args.json, reports, wall_time)
+    if args.csv:
+        write_csv(args.csv, reports)
+
+    failed = sum(1 for report in reports if report["error"])
+    print(f"\nAnalyzed {len(reports)} files ({failed} failed) in {wall_time:.2f}s with {workers} worker(s)")
+
+    if args.max_seam_db is not None:
+        seams = [
+            report["file"] for report in reports
+            if not report["error"] and (
+                report["seam_ratio_db"] > args.max_seam_db
+                or report["seam_dip_db"] < -args.max_seam_db
+            )
+        ]
+        for file in seams:
+            print(f"Loop seam check failed: {file}")
+        if seams:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
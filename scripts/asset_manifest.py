@@ -0,0 +1,277 @@
+"""
+Harmonia asset manifest
+Describes every rendered track so the app can download tracks on demand
+instead of bundling them all:
+- One entry per track: SHA-256, byte size, duration, codec, bitrate,
+  sample rate and channels, probed from the file headers (WAV, MP3 with
+  or without a Xing/Info/VBRI header, Ogg Opus) without decoding
+- Published files are content-addressed (objects/<sha256><ext>), so a
+  URL never changes meaning and can be cached forever; tracks whose
+  bytes did not change keep their URL and are never re-downloaded
+- The manifest carries a schema version and a revision that is bumped
+  whenever any track changes
+"""
+
+import hashlib
+import json
+import os
+import struct
+import wave
+
+from render_cache import link_or_copy
+
+MANIFEST_VERSION = 1  # schema version
+MANIFEST_NAME = "manifest.json"
+OBJECTS_DIR = "objects"
+AUDIO_EXTS = (".mp3", ".opus", ".wav")
+HASH_CHUNK = 1 << 20
+
+# MPEG audio layer III header tables, indexed by the header's version bits
+MP3_BITRATES = {
+    "1": [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    "2": [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG-1
+    2: [22050, 24000, 16000],  # MPEG-2
+    0: [11025, 12000, 8000],  # MPEG-2.5
+}
+OPUS_RATE = 48000  # Opus granule positions always count 48 kHz samples
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def probe_wav(path):
+    with wave.open(path, "rb") as w:
+        sample_rate = w.getframerate()
+        channels = w.getnchannels()
+        bits = 8 * w.getsampwidth()
+        return {
+            "codec": f"pcm_s{bits}le",
+            "duration": w.getnframes() / sample_rate,
+            "bitrate": sample_rate * channels * bits,
+            "sample_rate": sample_rate,
+            "channels": channels,
+        }
+
+def id3_size(data):
+    """Bytes taken by a leading ID3v2 tag (0 when there is none)"""
+    if data[:3] != b"ID3" or len(data) < 10:
+        return 0
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+def mp3_frame_header(data, offset):
+    """Parsed layer III frame header at offset, or None if there is no frame there"""
+    if offset + 4 > len(data):
+        return None
+    header = struct.unpack(">I", data[offset:offset + 4])[0]
+    version = (header >> 19) & 3
+    layer = (header >> 17) & 3
+    bitrate_index = (header >> 12) & 15
+    rate_index = (header >> 10) & 3
+    if header >> 21 != 0x7FF or version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version == 3
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    bitrate = MP3_BITRATES["1" if mpeg1 else "2"][bitrate_index] * 1000
+    samples = 1152 if mpeg1 else 576
+    padding = (header >> 9) & 1
+    return {
+        "mpeg1": mpeg1,
+        "sample_rate": sample_rate,
+        "bitrate": bitrate,
+        "channels": 1 if (header >> 6) & 3 == 3 else 2,
+        "samples": samples,
+        "length": samples // 8 * bitrate // sample_rate + padding,
+    }
+
+def find_mp3_frame(data, start):
+    """Offset of the first frame that is followed by another valid frame"""
+    offset = data.find(b"\xff", start)
+    while offset != -1:
+        frame = mp3_frame_header(data, offset)
+        if frame is not None and mp3_frame_header(data, offset + frame["length"]) is not None:
+            return offset, frame
+        offset = data.find(b"\xff", offset + 1)
+    raise ValueError("no MPEG layer III frames found")
+
+def vbr_header(data, offset, frame):
+    """
+    (frame count, VBR?, gapless padding samples) from a Xing/Info or VBRI
+    header in the first frame; the count is None when there is no header
+    - LAME's extension of the Xing header records the encoder delay and
+      end padding, which are not part of the track
+    """
+    side_info = (32 if frame["channels"] == 2 else 17) if frame["mpeg1"] else (17 if frame["channels"] == 2 else 9)
+    xing = offset + 4 + side_info
+    if data[xing:xing + 4] in (b"Xing", b"Info"):
+        flags = struct.unpack(">I", data[xing + 4:xing + 8])[0]
+        if flags & 1:
+            frames = struct.unpack(">I", data[xing + 8:xing + 12])[0]
+            # Frames, bytes, TOC and quality fields are present per flag
+            lame = xing + 8 + 4 * bool(flags & 1) + 4 * bool(flags & 2) + 100 * bool(flags & 4) + 4 * bool(flags & 8)
+            gapless = 0
+            if data[lame:lame + 4] in (b"LAME", b"Lavc", b"Lavf"):
+                delay_padding = int.from_bytes(data[lame + 21:lame + 24], "big")
+                gapless = (delay_padding >> 12) + (delay_padding & 0xFFF)
+            return frames, data[xing:xing + 4] == b"Xing", gapless
+    vbri = offset + 36
+    if data[vbri:vbri + 4] == b"VBRI":
+        return struct.unpack(">I", data[vbri + 14:vbri + 18])[0], True, 0
+    return None, False, 0
+
+def probe_mp3(path):
+    """
+    Duration and bitrate of an MP3 from its first frame
+    - VBR files (and LAME's Info tag on CBR files) carry a frame count in
+      the first frame; otherwise the stream is CBR and the duration follows
+      from the audio byte count
+    - The header's frame also counts towards the audio bytes; at worst that
+      overstates a headerless CBR file by one frame
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        head = f.read(10)
+        skip = id3_size(head)
+        f.seek(skip)
+        data = f.read(64 * 1024)
+        f.seek(max(size - 128, 0))
+        has_id3v1 = f.read(3) == b"TAG"
+    offset, frame = find_mp3_frame(data, 0)
+    audio_bytes = size - skip - offset - (128 if has_id3v1 else 0)
+
+    frames, vbr, gapless = vbr_header(data, offset, frame)
+    if frames is not None:
+        duration = (frames * frame["samples"] - gapless) / frame["sample_rate"]
+        bitrate = round(audio_bytes * 8 / duration) if vbr else frame["bitrate"]
+    else:
+        duration = audio_bytes * 8 / frame["bitrate"]
+        bitrate = frame["bitrate"]
+    return {
+        "codec": "mp3",
+        "duration": duration,
+        "bitrate": bitrate,
+        "sample_rate": frame["sample_rate"],
+        "channels": frame["channels"],
+    }
+
+def probe_opus(path):
+    """Duration of an Ogg Opus file from its last granule position, less the pre-skip"""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        first = f.read(4096)
+        f.seek(max(size - 65536, 0))
+        tail = f.read()
+    head = first.find(b"OpusHead")
+    if first[:4] != b"OggS" or head == -1:
+        raise ValueError("not an Ogg Opus file")
+    channels = first[head + 9]
+    pre_skip, input_rate = struct.unpack("<HI", first[head + 10:head + 16])
+    last = tail.rfind(b"OggS")
+    if last == -1:
+        raise ValueError("no Ogg pages found")
+    granule = struct.unpack("<q", tail[last + 6:last + 14])[0]
+    duration = max(granule - pre_skip, 0) / OPUS_RATE
+    return {
+        "codec": "opus",
+        "duration": duration,
+        "bitrate": round(size * 8 / duration) if duration else 0,
+        "sample_rate": input_rate or OPUS_RATE,
+        "channels": channels,
+    }
+
+PROBES = {".wav": probe_wav, ".mp3": probe_mp3, ".opus": probe_opus}
+
+def probe(path):
+    """Codec, duration (s), bitrate (bit/s), sample rate and channels of an audio file"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in PROBES:
+        raise ValueError(f"{path}: unsupported audio format {ext!r}")
+    try:
+        return PROBES[ext](path)
+    except (ValueError, struct.error, wave.Error, EOFError) as e:
+        raise ValueError(f"{path}: {e}") from e
+
+def object_name(sha256, ext):
+    return f"{OBJECTS_DIR}/{sha256}{ext}"
+
+def manifest_entry(path):
+    """Manifest entry for one track file"""
+    sha256 = file_sha256(path)
+    ext = os.path.splitext(path)[1].lower()
+    info = probe(path)
+    return {
+        "sha256": sha256,
+        "size": os.path.getsize(path),
+        "object": object_name(sha256, ext),
+        **info,
+        "duration": round(info["duration"], 3),
+    }
+
+def find_assets(asset_dir):
+    """{track name: path} for every audio file in asset_dir"""
+    assets = {}
+    for name in sorted(os.listdir(asset_dir)):
+        track, ext = os.path.splitext(name)
+        if ext.lower() in AUDIO_EXTS:
+            if track in assets:
+                raise ValueError(f"{asset_dir}: {track} exists in more than one format")
+            assets[track] = os.path.join(asset_dir, name)
+    return assets
+
+def load_manifest(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def build_manifest(assets, previous=None):
+    """
+    Manifest for {track name: path}
+    - previous: the last published manifest; the revision is bumped only
+      if some track was added, removed or changed
+    """
+    tracks = {track: manifest_entry(path) for track, path in sorted(assets.items())}
+    revision = 1
+    if previous is not None and previous.get("version") == MANIFEST_VERSION:
+        revision = previous["revision"] + (previous["tracks"] != tracks)
+    return {"version": MANIFEST_VERSION, "revision": revision, "tracks": tracks}
+
+def changed_tracks(manifest, previous):
+    """Tracks whose content differs from the previous manifest (new tracks included)"""
+    before = previous["tracks"] if previous else {}
+    return [
+        track for track, entry in manifest["tracks"].items()
+        if before.get(track, {}).get("sha256") != entry["sha256"]
+    ]
+
+def publish(assets, output_dir):
+    """
+    Copy tracks into output_dir under their content hashes and write the
+    manifest there
+    - Objects that are already published are left alone
+    - Returns (manifest, changed track names)
+    """
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    previous = load_manifest(manifest_path)
+    manifest = build_manifest(assets, previous)
+    os.makedirs(os.path.join(output_dir, OBJECTS_DIR), exist_ok=True)
+    for track, entry in manifest["tracks"].items():
+        dest = os.path.join(output_dir, entry["object"])
+        if not os.path.exists(dest):
+            link_or_copy(assets[track], dest)
+
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+    return manifest, changed_tracks(manifest, previous)
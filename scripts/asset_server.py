@@ -0,0 +1,133 @@
+"""
+Harmonia local asset server
+Serves a published asset directory (see asset_manifest.publish) as a
+stand-in for the CDN during app development:
+- Single byte-range requests (bytes=a-b, bytes=a-, bytes=-n) answered
+  with 206 Partial Content, unsatisfiable ranges with 416; other Range
+  headers fall back to the whole file, as HTTP allows
+- Content-addressed objects are immutable: their hash is the ETag and
+  they may be cached forever; the manifest and segment playlists must
+  always be revalidated
+- Files are streamed in chunks, never read whole
+"""
+
+import os
+import re
+import shutil
+from functools import partial
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from asset_manifest import MANIFEST_NAME, OBJECTS_DIR
+
+DEFAULT_PORT = 8765
+COPY_CHUNK = 64 * 1024
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+def parse_range(header, size):
+    """
+    (start, stop) byte span for a Range header, None to send the whole file,
+    or ValueError when the range cannot be satisfied
+    """
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        return None  # multiple or malformed ranges: ignore the header
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the final n bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size
+    start = int(first)
+    stop = min(int(last) + 1, size) if last else size
+    if start >= size or stop <= start:
+        raise ValueError(header)
+    return start, stop
+
+class AssetRequestHandler(SimpleHTTPRequestHandler):
+    """SimpleHTTPRequestHandler with byte ranges and cache headers for published assets"""
+
+    def send_head(self):
+        self._remaining = None
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) or not os.path.isfile(path):
+            return super().send_head()
+
+        rel = os.path.relpath(path, self.directory).replace(os.sep, "/")
+        etag = None
+        if rel.startswith(OBJECTS_DIR + "/"):
+            etag = '"' + os.path.splitext(os.path.basename(rel))[0] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", IMMUTABLE)
+                self.end_headers()
+                return None
+
+        f = open(path, "rb")
+        try:
+            size = os.fstat(f.fileno()).st_size
+            span = None
+            if "Range" in self.headers:
+                try:
+                    span = parse_range(self.headers["Range"], size)
+                except ValueError:
+                    f.close()
+                    self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return None
+            start, stop = span or (0, size)
+
+            if span is None:
+                self.send_response(HTTPStatus.OK)
+            else:
+                self.send_response(HTTPStatus.PARTIAL_CONTENT)
+                self.send_header("Content-Range", f"bytes {start}-{stop - 1}/{size}")
+            self.send_header("Content-Type", self.guess_type(path))
+            self.send_header("Content-Length", str(stop - start))
+            self.send_header("Accept-Ranges", "bytes")
+            if etag is not None:
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", IMMUTABLE)
+            elif rel == MANIFEST_NAME or rel.endswith(".m3u8"):
+                self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            f.seek(start)
+            self._remaining = stop - start
+            return f
+        except BaseException:
+            f.close()
+            raise
+
+    def copyfile(self, source, outputfile):
+        remaining = self._remaining
+        if remaining is None:
+            return shutil.copyfileobj(source, outputfile)
+        while remaining > 0:
+            chunk = source.read(min(COPY_CHUNK, remaining))
+            if not chunk:
+                break
+            outputfile.write(chunk)
+            remaining -= len(chunk)
+
+AssetRequestHandler.extensions_map = {
+    **SimpleHTTPRequestHandler.extensions_map,
+    ".mp3": "audio/mpeg",
+    ".opus": "audio/ogg",
+    ".wav": "audio/wav",
+    ".json": "application/json",
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".mp4": "audio/mp4",
+    ".m4s": "audio/mp4",
+}
+
+def make_server(directory, host="127.0.0.1", port=DEFAULT_PORT):
+    """Threaded HTTP server for a published asset directory (port 0 picks a free port)"""
+    handler = partial(AssetRequestHandler, directory=directory)
+    return ThreadingHTTPServer((host, port), handler)
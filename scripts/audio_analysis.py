@@ -0,0 +1,293 @@
+"""
+Harmonia audio analysis engine
+Vectorised quality checks shared by the analysis scripts:
+- Break (silence) detection by run-length analysis of a boolean mask
+- Clipping counts, DC offset, and RMS/peak per analysis window
+- BS.1770 integrated loudness and true peak (see loudness.py)
+- Loop-seam discontinuity, for tracks that are played on repeat
+- Chunked PCM decoding (wave module or an ffmpeg pipe) so whole files
+  never need to be held in memory
+- Export helpers: dB metrics are -inf for silence or an exactly
+  continuous seam, which reports write as null / empty cells
+All checks work on interleaved integer PCM as returned by pydub's
+get_array_of_samples(), reshaped to (frames, channels), and can be fed
+chunk by chunk through StreamAnalyzer.
+"""
+
+import shutil
+import subprocess
+import wave
+
+import numpy as np
+
+from loudness import LoudnessMeter
+
+SILENCE_THRESHOLD = 10  # absolute sample value treated as silent
+MIN_SILENCE_SECONDS = 0.05  # breaks must be longer than 50ms
+CLIP_MARGIN = 100  # samples within this of full scale count as clipped
+WINDOW_SECONDS = 1.0  # RMS/peak analysis window
+CHUNK_SECONDS = 10.0  # decode/analysis chunk length
+SEAM_SECONDS = 0.01  # audio kept from each end to judge the loop seam
+
+# Compressed formats are decoded by ffmpeg to this canonical PCM layout
+DECODE_SAMPLE_RATE = 44100
+DECODE_CHANNELS = 2
+
+def true_runs(mask):
+    """(start, stop) index pairs, one row per run of True values in mask"""
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return edges.reshape(-1, 2)
+
+def silence_runs(frames, threshold=SILENCE_THRESHOLD, min_length=0):
+    """Runs of frames where every channel is below threshold, longer than min_length"""
+    # Compare against +/- threshold rather than np.abs, which overflows at -32768
+    quiet = (frames > -threshold) & (frames < threshold)
+    silent = quiet[:, 0].copy()
+    for channel in range(1, frames.shape[1]):
+        silent &= quiet[:, channel]
+    runs = true_runs(silent)
+    return runs[runs[:, 1] - runs[:, 0] > min_length]
+
+def window_levels(frames, window, full_scale):
+    """
+    RMS and peak (relative to full scale) per window of frames, all channels
+    - The last window may be shorter than the others
+    """
+    count = len(frames)
+    full = count // window
+    rows = [frames[:full * window].reshape(full, window * frames.shape[1])]
+    if count > full * window:
+        rows.append(frames[full * window:].reshape(1, -1))
+
+    rms = []
+    peak = []
+    for row in rows:
+        values = row.astype(np.float64)
+        rms.append(np.sqrt(np.einsum("ij,ij->i", values, values) / row.shape[1]))
+        peak.append(np.maximum(row.max(axis=1).astype(np.float64), 0.0 - row.min(axis=1).astype(np.float64)))
+    return np.concatenate(rms) / full_scale, np.concatenate(peak) / full_scale
+
+def seam_discontinuity(head, tail, full_scale=32768.0):
+    """
+    How much the jump from the last frame back to the first stands out
+    - Compares the second difference across the wrap point with the RMS
+      second difference inside the head and tail windows, per channel
+    - Returns (worst seam residual relative to full scale, worst ratio in dB);
+      a seamless loop sits near 0 dB, a click tens of dB above it
+    """
+    head = np.asarray(head, dtype=np.float64)
+    tail = np.asarray(tail, dtype=np.float64)
+    if len(head) < 2 or len(tail) < 2:
+        return 0.0, -np.inf
+    across = np.concatenate((tail[-2:], head[:2]))
+    residual = np.abs(np.diff(across, 2, axis=0)).max(axis=0)
+    inside = np.concatenate((np.diff(tail, 2, axis=0), np.diff(head, 2, axis=0)))
+    baseline = np.sqrt(np.mean(np.square(inside), axis=0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(residual > 0, 20 * np.log10(residual / baseline), -np.inf)
+    return float(residual.max() / full_scale), float(ratio.max())
+
+def seam_dip(window_rms):
+    """
+    Level of the quieter loop end relative to the median window, in dB
+    - Faded tracks dip tens of dB at every loop boundary; seamless loops ~0
+    """
+    if len(window_rms) == 0:
+        return 0.0
+    typical = np.median(window_rms)
+    ends = min(window_rms[0], window_rms[-1])
+    if typical <= 0:
+        return 0.0
+    return float(20 * np.log10(ends / typical)) if ends > 0 else -np.inf
+
+class StreamAnalyzer:
+    """
+    Accumulate the analyze_samples report over consecutive PCM chunks
+    - Silent runs and analysis windows are carried across chunk
+      boundaries, so results do not depend on the chunk size
+    """
+
+    def __init__(self, sample_rate, channels=1, sample_width=2):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.full_scale = float(2 ** (sample_width * 8 - 1))
+        self.clip_level = self.full_scale - 1 - CLIP_MARGIN
+        self.min_silence = int(sample_rate * MIN_SILENCE_SECONDS)
+        self.window = max(int(sample_rate * WINDOW_SECONDS), 1)
+
+        self.frames = 0
+        self.breaks = []
+        self.pending_silence = None  # start frame of a run still open at chunk end
+        self.clipping = 0
+        self.channel_sums = np.zeros(channels, dtype=np.int64)
+        self.window_rms = []
+        self.window_peak = []
+        self.leftover = np.zeros((0, channels), dtype=np.int64)
+        self.meter = LoudnessMeter(sample_rate, channels)
+        self.seam_frames = max(int(sample_rate * SEAM_SECONDS), 3)
+        self.head = np.zeros((0, channels), dtype=np.int64)
+        self.tail = np.zeros((0, channels), dtype=np.int64)
+
+    def feed(self, samples):
+        """Analyse the next chunk of interleaved samples"""
+        frames = np.asarray(samples).reshape(-1, self.channels)
+        offset = self.frames
+        count = len(frames)
+        if count == 0:
+            return
+
+        runs = silence_runs(frames, SILENCE_THRESHOLD) + offset
+        if self.pending_silence is not None:
+            if len(runs) and runs[0, 0] == offset:
+                runs[0, 0] = self.pending_silence
+            else:
+                self._close_silence(self.pending_silence, offset)
+            self.pending_silence = None
+        if len(runs) and runs[-1, 1] == offset + count:
+            self.pending_silence = int(runs[-1, 0])
+            runs = runs[:-1]
+        for start, stop in runs.tolist():
+            self._close_silence(start, stop)
+
+        self.meter.feed(frames / self.full_scale)
+        if len(self.head) < self.seam_frames:
+            self.head = np.concatenate((self.head, frames[:self.seam_frames - len(self.head)]))
+        self.tail = np.concatenate((self.tail, frames[-self.seam_frames:]))[-self.seam_frames:]
+
+        clip = self.clip_level
+        self.clipping += int(np.count_nonzero((frames >= clip) | (frames <= -clip)))
+        # Per-column sums are ~10x faster than a strided sum(axis=0)
+        self.channel_sums += [frames[:, c].sum(dtype=np.int64) for c in range(self.channels)]
+
+        # Only whole windows are measured; the remainder waits for the next chunk
+        if len(self.leftover):
+            frames = np.concatenate((self.leftover.astype(frames.dtype), frames))
+        whole = len(frames) - len(frames) % self.window
+        if whole:
+            rms, peak = window_levels(frames[:whole], self.window, self.full_scale)
+            self.window_rms.append(rms)
+            self.window_peak.append(peak)
+        self.leftover = frames[whole:].copy()
+        self.frames += count
+
+    def _close_silence(self, start, stop):
+        if stop - start > self.min_silence:
+            self.breaks.append((start, stop))
+
+    def report(self):
+        """Structured report for everything fed so far"""
+        if self.pending_silence is not None:
+            self._close_silence(self.pending_silence, self.frames)
+            self.pending_silence = None
+        if len(self.leftover):
+            rms, peak = window_levels(self.leftover, len(self.leftover), self.full_scale)
+            self.window_rms.append(rms)
+            self.window_peak.append(peak)
+            self.leftover = self.leftover[:0]
+
+        window_rms = np.concatenate(self.window_rms) if self.window_rms else np.zeros(0)
+        window_peak = np.concatenate(self.window_peak) if self.window_peak else np.zeros(0)
+        window_sizes = np.diff(np.append(np.arange(0, self.frames, self.window), self.frames))
+        sample_rate = self.sample_rate
+        seam_jump, seam_ratio = seam_discontinuity(self.head, self.tail, self.full_scale)
+
+        return {
+            "sample_rate": sample_rate,
+            "channels": self.channels,
+            "frames": self.frames,
+            "duration": self.frames / sample_rate,
+            "breaks": [(start / sample_rate, end / sample_rate) for start, end in self.breaks],
+            "clipping_samples": self.clipping,
+            "dc_offset": (self.channel_sums / max(self.frames, 1) / self.full_scale).tolist(),
+            "rms": float(np.sqrt(np.sum(np.square(window_rms) * window_sizes) / self.frames)) if self.frames else 0.0,
+            "peak": float(window_peak.max()) if len(window_peak) else 0.0,
+            **self.meter.report(),
+            "seam_jump": seam_jump,
+            "seam_ratio_db": seam_ratio,
+            "seam_dip_db": seam_dip(window_rms),
+            "window_seconds": WINDOW_SECONDS,
+            "window_rms": window_rms.tolist(),
+            "window_peak": window_peak.tolist(),
+        }
+
+def analyze_samples(samples, sample_rate, channels=1, sample_width=2):
+    """
+    Analyse interleaved integer PCM and return a structured report
+    - breaks: (start, end) seconds of every silent run longer than 50ms
+    - clipping_samples: samples within CLIP_MARGIN of full scale
+    - dc_offset: mean per channel, relative to full scale
+    - window_rms / window_peak: per WINDOW_SECONDS window, relative to full scale
+    """
+    analyzer = StreamAnalyzer(sample_rate, channels, sample_width)
+    analyzer.feed(samples)
+    return analyzer.report()
+
+def wav_chunks(path, chunk_frames):
+    """Yield (sample_rate, channels, sample_width, samples) chunks from a 16-bit WAV"""
+    with wave.open(path, "rb") as wav:
+        sample_rate = wav.getframerate()
+        channels = wav.getnchannels()
+        sample_width = wav.getsampwidth()
+        if sample_width != 2:
+            raise ValueError(f"{path}: only 16-bit WAV is supported, got {8 * sample_width}-bit")
+        while True:
+            data = wav.readframes(chunk_frames)
+            if not data:
+                break
+            yield sample_rate, channels, sample_width, np.frombuffer(data, dtype="<i2")
+
+def ffmpeg_chunks(path, chunk_frames):
+    """Yield PCM chunks decoded by an ffmpeg pipe (canonical 44.1 kHz stereo)"""
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg not found on PATH; needed to decode compressed audio")
+    command = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-i", path,
+        "-f", "s16le", "-acodec", "pcm_s16le",
+        "-ar", str(DECODE_SAMPLE_RATE), "-ac", str(DECODE_CHANNELS), "pipe:1",
+    ]
+    chunk_bytes = chunk_frames * DECODE_CHANNELS * 2
+    proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            data = proc.stdout.read(chunk_bytes)
+            if not data:
+                break
+            yield DECODE_SAMPLE_RATE, DECODE_CHANNELS, 2, np.frombuffer(data, dtype="<i2")
+    finally:
+        proc.stdout.close()
+        stderr = proc.stderr.read().decode("utf-8", "replace").strip()
+        proc.stderr.close()
+        if proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg could not decode {path}: {stderr}")
+
+def pcm_chunks(path, chunk_seconds=CHUNK_SECONDS):
+    """Decode any supported file into bounded-size PCM chunks"""
+    chunk_frames = int(DECODE_SAMPLE_RATE * chunk_seconds)
+    if path.lower().endswith(".wav"):
+        return wav_chunks(path, chunk_frames)
+    return ffmpeg_chunks(path, chunk_frames)
+
+def analyze_file(path, chunk_seconds=CHUNK_SECONDS):
+    """Analyse a file chunk by chunk; memory is bounded by chunk_seconds"""
+    analyzer = None
+    for sample_rate, channels, sample_width, samples in pcm_chunks(path, chunk_seconds):
+        if analyzer is None:
+            analyzer = StreamAnalyzer(sample_rate, channels, sample_width)
+        analyzer.feed(samples)
+    if analyzer is None:
+        raise ValueError(f"{path}: no audio data")
+    return analyzer.report()
+
+def finite_or_none(value):
+    """
+    Copy of a report value with non-finite floats replaced by None
+    - Recurses into dicts, lists and tuples; strict JSON has no -Infinity
+    """
+    if isinstance(value, dict):
+        return {key: finite_or_none(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [finite_or_none(item) for item in value]
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
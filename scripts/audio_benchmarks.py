@@ -0,0 +1,221 @@
+"""
+Harmonia audio pipeline benchmarks
+Times each stage of the Python pipeline at several track durations:
+- Every catalogue generator, in-memory and block-streamed
+- apply_fade and the noise engines
+- analyze-audio.py's chunked analysis (break detection) and fix-audio.py's
+  gap repair, on a synthetic track with gaps
+Each case runs in its own spawned process, so the peak RSS it reports is
+its own rather than the whole suite's. Results are compared with baselines
+saved under .benchmarks/, and a case that is slower or larger than its
+baseline by more than the tolerance fails the run.
+"""
+
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import generate_audio
+from audio_analysis import analyze_file
+from audio_repair import read_pcm, repair_frames
+from audio_stream import BLOCK_SIZE, WavStreamWriter, block_ranges
+from colored_noise import PINK_EXPONENT, WhiteNoise, colored_noise_blocks
+
+DURATIONS = {"10s": 10, "5min": 300, "60min": 3600}
+DEFAULT_DURATIONS = ["10s", "5min"]
+BASELINE_DIR = ".benchmarks"
+BASELINE_FILE = "baseline.json"
+TIME_TOLERANCE = 0.25  # fail when more than 25% slower than the baseline
+RSS_TOLERANCE = 0.10  # fail when peak RSS grows more than 10%
+TIME_SLACK = 0.02  # seconds; timer noise on very short cases is never a regression
+RSS_SLACK = 5.0  # MB
+IN_MEMORY_LIMIT = 600  # seconds; whole-track renders beyond this would not fit in RAM
+
+SAMPLE_RATE = generate_audio.SAMPLE_RATE
+GAP_EVERY = 30  # seconds between gaps in the synthetic fixture track
+GAP_SECONDS = 0.5
+
+def peak_rss_mb():
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def consume(result):
+    """Drain a block stream so streamed generators do their work"""
+    if not isinstance(result, np.ndarray):
+        for _ in result:
+            pass
+
+def generator_case(job, stream):
+    """Case factory that renders one catalogue job"""
+    def setup(duration, workdir):
+        name, generator, params = job
+        params = dict(params, duration=duration)
+        render_job = (name, generator, params)
+        func = getattr(generate_audio, generate_audio.job_generator(render_job, stream))
+        kwargs = generate_audio.job_kwargs(render_job, stream)
+        return lambda: consume(func(**kwargs))
+    return setup
+
+def fade_case(duration, workdir):
+    # Generators fade each mono channel before stacking
+    audio = np.ones(int(SAMPLE_RATE * duration))
+    return lambda: generate_audio.apply_fade(audio, SAMPLE_RATE, generate_audio.FADE_DURATION)
+
+def white_noise_case(duration, workdir):
+    return lambda: WhiteNoise().read(0, int(SAMPLE_RATE * duration))
+
+def pink_noise_case(duration, workdir):
+    return lambda: generate_audio.generate_pink_noise(duration, SAMPLE_RATE, noise=WhiteNoise())
+
+def pink_noise_blocks_case(duration, workdir):
+    samples = int(SAMPLE_RATE * duration)
+    return lambda: consume(colored_noise_blocks(PINK_EXPONENT, samples, SAMPLE_RATE, WhiteNoise()))
+
+def fixture_track(duration, workdir):
+    """
+    WAV of quiet noise with a GAP_SECONDS silence every GAP_EVERY seconds
+    - Written block by block and kept in workdir between cases
+    """
+    path = os.path.join(workdir, f"gaps-{duration:g}s.wav")
+    if os.path.exists(path):
+        return path
+    total = int(SAMPLE_RATE * duration)
+    noise = WhiteNoise()
+    tmp_path = path + ".tmp"
+    with WavStreamWriter(tmp_path, SAMPLE_RATE) as writer:
+        for start, stop in block_ranges(total, BLOCK_SIZE):
+            block = 0.1 * noise.read(start, stop - start)
+            position = np.arange(start, stop) % (GAP_EVERY * SAMPLE_RATE)
+            block[position < GAP_SECONDS * SAMPLE_RATE] = 0
+            writer.write(np.column_stack((block, block)))
+    os.replace(tmp_path, path)
+    return path
+
+def analyze_case(duration, workdir):
+    path = fixture_track(duration, workdir)
+    return lambda: analyze_file(path)
+
+def repair_case(duration, workdir):
+    path = fixture_track(duration, workdir)
+
+    def run():
+        sample_rate, frames = read_pcm(path)
+        repair_frames(frames, sample_rate)
+    return run
+
+def build_cases():
+    """{case name: (setup(duration, workdir) -> timed callable, max duration or None)}"""
+    cases = {}
+    seen = set()
+    for job in generate_audio.build_jobs():
+        generator = job[1]
+        if generator in seen:
+            continue
+        seen.add(generator)
+        cases[f"generate:{job[0]}"] = (generator_case(job, False), IN_MEMORY_LIMIT)
+        if generator in generate_audio.STREAM_GENERATORS:
+            cases[f"stream:{job[0]}"] = (generator_case(job, True), None)
+    cases["apply_fade"] = (fade_case, None)
+    cases["noise:white"] = (white_noise_case, None)
+    cases["noise:pink-fft"] = (pink_noise_case, IN_MEMORY_LIMIT)
+    cases["noise:pink-blocks"] = (pink_noise_blocks_case, None)
+    cases["analyze:breaks"] = (analyze_case, None)
+    cases["fix:repair"] = (repair_case, IN_MEMORY_LIMIT)
+    return cases
+
+CASES = build_cases()
+
+def run_case(name, duration, workdir, repeat=1):
+    """
+    Time one case in the current process
+    - Setup (fixtures, noise streams) is not timed; the fastest of repeat
+      runs is reported, with the peak RSS over all of them
+    """
+    setup, _ = CASES[name]
+    run = setup(duration, workdir)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return {"wall_seconds": min(times), "peak_rss_mb": peak_rss_mb()}
+
+def select_cases(pattern=None, durations=DEFAULT_DURATIONS):
+    """(case name, duration label) pairs to run, skipping in-memory cases that are too long"""
+    selected = []
+    for label in durations:
+        for name, (_, max_duration) in CASES.items():
+            if pattern and pattern not in name:
+                continue
+            if max_duration is not None and DURATIONS[label] > max_duration:
+                continue
+            selected.append((name, label))
+    return selected
+
+def run_suite(selected, workdir, repeat=1, report=print):
+    """Run each case in a fresh spawned process; returns {"name@duration": result}"""
+    os.makedirs(workdir, exist_ok=True)
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for name, label in selected:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            result = pool.submit(run_case, name, DURATIONS[label], workdir, repeat).result()
+        key = f"{name}@{label}"
+        results[key] = result
+        report(f"  {key:<40} {result['wall_seconds']:8.3f}s {result['peak_rss_mb']:9.1f} MB")
+    return results
+
+def baseline_path(baseline_dir=BASELINE_DIR):
+    return os.path.join(baseline_dir, BASELINE_FILE)
+
+def load_baseline(baseline_dir=BASELINE_DIR):
+    path = baseline_path(baseline_dir)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["cases"]
+
+def save_baseline(results, baseline_dir=BASELINE_DIR):
+    """Merge results into the saved baseline, replacing cases that were re-run"""
+    os.makedirs(baseline_dir, exist_ok=True)
+    cases = load_baseline(baseline_dir)
+    cases.update(results)
+    path = baseline_path(baseline_dir)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"python": sys.version.split()[0], "numpy": np.__version__, "cases": cases},
+                  f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def compare(results, baseline, time_tolerance=TIME_TOLERANCE, rss_tolerance=RSS_TOLERANCE):
+    """
+    Regressions against a baseline, as human-readable strings
+    - Cases missing from the baseline are not regressions
+    - A small absolute slack on top of the tolerance keeps millisecond
+      cases from failing on timer noise
+    """
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        base = baseline[key]
+        limit = base["wall_seconds"] * (1 + time_tolerance) + TIME_SLACK
+        if result["wall_seconds"] > limit:
+            regressions.append(
+                f"{key}: {result['wall_seconds']:.3f}s vs baseline {base['wall_seconds']:.3f}s "
+                f"(+{(result['wall_seconds'] / base['wall_seconds'] - 1) * 100:.0f}%)"
+            )
+        limit = base["peak_rss_mb"] * (1 + rss_tolerance) + RSS_SLACK
+        if result["peak_rss_mb"] > limit:
+            regressions.append(
+                f"{key}: {result['peak_rss_mb']:.1f} MB vs baseline {base['peak_rss_mb']:.1f} MB "
+                f"(+{(result['peak_rss_mb'] / base['peak_rss_mb'] - 1) * 100:.0f}%)"
+            )
+    return regressions
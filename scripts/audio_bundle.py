@@ -0,0 +1,127 @@
+"""
+Harmonia loop bundles
+A bundle replaces a full-length track with:
+- <track>.json: a recipe recording how the loop was rendered (generator,
+  parameters, seed) and how to expand it (full duration, fade length)
+- <track>.loop.<ext>: a few seconds of seamless loop audio
+The reference expander below rebuilds the full-length track from a bundle
+by tiling the loop and applying the track fade, in integer PCM, so the
+same bundle always expands to byte-identical output.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from audio_analysis import pcm_chunks
+from audio_stream import BLOCK_SIZE, block_ranges, fade_gain
+
+BUNDLE_VERSION = 1
+RECIPE_EXT = ".json"
+LOOP_SUFFIX = ".loop"
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def recipe_path(output_dir, name):
+    return os.path.join(output_dir, f"{name}{RECIPE_EXT}")
+
+def loop_path(output_dir, name, ext):
+    return os.path.join(output_dir, f"{name}{LOOP_SUFFIX}{ext}")
+
+def write_recipe(path, track, generator, params, seed, loop_file, codec,
+                 loop_samples, channels, sample_rate, duration, fade_duration, target_lufs=None):
+    """Write a bundle recipe next to its loop file"""
+    recipe = {
+        "version": BUNDLE_VERSION,
+        "track": track,
+        "generator": generator,
+        "params": params,
+        "seed": seed,
+        "sample_rate": sample_rate,
+        "channels": channels,
+        "loop": {
+            "file": os.path.basename(loop_file),
+            "codec": codec,
+            "samples": loop_samples,
+            "sha256": file_sha256(loop_file),
+        },
+        "duration": duration,
+        "fade_duration": fade_duration,
+        "target_lufs": target_lufs,
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(recipe, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+    return recipe
+
+def load_recipe(path):
+    with open(path, "r", encoding="utf-8") as f:
+        recipe = json.load(f)
+    if recipe.get("version") != BUNDLE_VERSION:
+        raise ValueError(f"{path}: unsupported bundle version {recipe.get('version')}")
+    return recipe
+
+def read_loop(recipe, bundle_dir):
+    """
+    Decode a bundle's loop to (samples, channels) int16 frames
+    - The file hash is checked first, so a stale or corrupt loop fails loudly
+    - Compressed loops are trimmed/padded to the recorded length, since
+      decoders may add or drop a few priming samples
+    """
+    loop = recipe["loop"]
+    path = os.path.join(bundle_dir, loop["file"])
+    if file_sha256(path) != loop["sha256"]:
+        raise ValueError(f"{path}: loop file does not match its recipe")
+
+    blocks = []
+    for _, channels, _, samples in pcm_chunks(path):
+        blocks.append(samples)
+    if not blocks:
+        raise ValueError(f"{path}: no audio data")
+    frames = np.concatenate(blocks).reshape(-1, channels)[:, :recipe["channels"]]
+
+    count = loop["samples"]
+    if len(frames) < count:
+        frames = np.concatenate((frames, np.zeros((count - len(frames), frames.shape[1]), frames.dtype)))
+    return frames[:count]
+
+def expand_blocks(recipe, loop_frames, channels=2, block_size=BLOCK_SIZE):
+    """
+    Tile a loop to the recipe's full duration and apply the track fade
+    - Yields (block, channels) int16 arrays; mono loops are duplicated
+    - Fades are applied to integer PCM with truncation, like quantize(),
+      so expansion is deterministic
+    """
+    sample_rate = recipe["sample_rate"]
+    total = int(sample_rate * recipe["duration"])
+    fade_samples = int(sample_rate * recipe["fade_duration"])
+    loop_samples = len(loop_frames)
+    if loop_frames.shape[1] != channels:
+        loop_frames = np.repeat(loop_frames[:, :1], channels, axis=1)
+
+    for start, stop in block_ranges(total, block_size):
+        block = loop_frames.take(np.arange(start, stop) % loop_samples, axis=0)
+        if fade_samples:
+            gain = fade_gain(start, stop - start, total, fade_samples)
+            faded = np.empty(block.shape, dtype=np.int16)
+            np.multiply(block, gain[:, None], out=faded, casting="unsafe")
+            block = faded
+        yield block
+
+def expand_bundle(recipe_file, writer):
+    """Expand the bundle behind recipe_file into an open PCM writer"""
+    recipe = load_recipe(recipe_file)
+    loop_frames = read_loop(recipe, os.path.dirname(recipe_file))
+    frames = 0
+    for block in expand_blocks(recipe, loop_frames):
+        writer.write_pcm(block)
+        frames += len(block)
+    return frames
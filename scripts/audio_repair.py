@@ -0,0 +1,145 @@
+"""
+Harmonia gap repair engine
+Sample-domain replacement for pydub's split_on_silence + append(crossfade):
+- Gaps are located once from a sliding RMS over cumulative frame energy
+- Kept chunks are compacted into a preallocated output buffer with one
+  boolean-mask copy, and every crossfade splice is computed in one
+  vectorised gather
+- Runtime and memory are linear in track length however many gaps exist
+"""
+
+import numpy as np
+
+from audio_analysis import pcm_chunks, true_runs
+
+MIN_SILENCE_MS = 50  # gaps must be at least this long
+SILENCE_THRESH_DB = -60  # dBFS RMS below which a window is silent
+KEEP_SILENCE_MS = 10  # silence kept on each side of a chunk
+CROSSFADE_MS = 100  # longest crossfade between chunks
+STRIP_PADDING_MS = 100  # silence kept at each end when only trimming
+
+FULL_SCALE = 32768  # 16-bit PCM, same reference as pydub's dBFS
+
+def ms_to_frames(ms, sample_rate):
+    return int(sample_rate * ms / 1000)
+
+def silent_ranges(frames, sample_rate, min_silence_ms=MIN_SILENCE_MS, thresh_db=SILENCE_THRESH_DB):
+    """
+    (start, stop) frame ranges that are silent, pydub style
+    - A window of min_silence_ms starting at any frame is silent when its
+      RMS over all channels is below thresh_db; overlapping silent windows
+      merge into one range
+    """
+    count = len(frames)
+    window = max(ms_to_frames(min_silence_ms, sample_rate), 1)
+    if count < window:
+        return np.zeros((0, 2), dtype=np.int64)
+
+    # int64 energy sums are exact for any 16-bit track length we could hold
+    energy = np.zeros(count + 1, dtype=np.int64)
+    squares = frames.astype(np.int64)
+    squares *= squares
+    np.cumsum(squares.sum(axis=1), out=energy[1:])
+    window_energy = energy[window:] - energy[:-window]
+
+    thresh = (10 ** (thresh_db / 20) * FULL_SCALE) ** 2 * window * frames.shape[1]
+    starts = true_runs(window_energy < thresh)
+    if len(starts) == 0:
+        return starts
+    # A run of silent window starts [a, b) covers frames [a, b - 1 + window)
+    ranges = np.column_stack((starts[:, 0], starts[:, 1] - 1 + window))
+    # Merge ranges that touch or overlap
+    new_group = np.concatenate(([True], ranges[1:, 0] > ranges[:-1, 1]))
+    group_starts = np.flatnonzero(new_group)
+    group_stops = np.maximum.reduceat(ranges[:, 1], group_starts)
+    return np.column_stack((ranges[group_starts, 0], group_stops))
+
+def nonsilent_chunks(frames, sample_rate, keep_silence_ms=KEEP_SILENCE_MS, **detect):
+    """Ranges between silences, padded by keep_silence_ms on each side"""
+    count = len(frames)
+    silent = silent_ranges(frames, sample_rate, **detect)
+    edges = np.concatenate(([0], silent.ravel(), [count])).reshape(-1, 2)
+    chunks = edges[edges[:, 1] > edges[:, 0]]
+    keep = ms_to_frames(keep_silence_ms, sample_rate)
+    chunks = chunks + [-keep, keep]
+    return np.clip(chunks, 0, count)
+
+def crossfade_lengths(lengths, crossfade):
+    """
+    Crossfade before each chunk: at most 1/3 of the chunks on either side
+    - The old append loop capped it at 1/3 of everything joined so far, so
+      a long fade could reach back through earlier splices; capping by the
+      previous chunk keeps every splice between the two chunks at a gap
+    """
+    fades = np.zeros(len(lengths), dtype=np.int64)
+    fades[1:] = np.minimum(crossfade, np.minimum(lengths[1:], lengths[:-1]) // 3)
+    return fades
+
+def splice(frames, chunks, crossfade):
+    """
+    Join chunks of frames with linear crossfades into one preallocated buffer
+    - Every output frame outside a crossfade is a straight copy of one source
+      frame, so all of them move in a single boolean-mask copy
+    - The crossfade regions are gathered and mixed together in one pass
+    """
+    starts, stops = chunks[:, 0], chunks[:, 1]
+    lengths = stops - starts
+    fades = crossfade_lengths(lengths, crossfade)
+    # Output position of each chunk: previous end minus this chunk's overlap
+    out_starts = np.cumsum(np.concatenate(([0], lengths[:-1]))) - np.cumsum(fades)
+    total = int(lengths.sum() - fades.sum())
+
+    out = np.empty((total, frames.shape[1]), dtype=frames.dtype)
+
+    # Source frames kept verbatim: chunk bodies minus the faded head and tail
+    tail_fades = np.append(fades[1:], 0)
+    source_mask = edge_mask(len(frames), starts + fades, stops - tail_fades)
+    out_mask = edge_mask(total, out_starts + fades, out_starts + lengths - tail_fades)
+    out[out_mask] = frames[source_mask]
+
+    # Crossfades: splice i overlaps the last fades[i] frames of chunk i-1
+    # with the first fades[i] frames of chunk i
+    spliced = np.flatnonzero(fades)
+    if len(spliced):
+        widths = fades[spliced]
+        offsets = np.arange(widths.sum()) - np.repeat(np.cumsum(widths) - widths, widths)
+        ramp = (offsets / np.repeat(widths, widths))[:, None]
+        fade_out = np.repeat(stops[spliced - 1] - widths, widths) + offsets
+        fade_in = np.repeat(starts[spliced], widths) + offsets
+        mixed = frames[fade_out] * (1 - ramp) + frames[fade_in] * ramp
+        out[np.repeat(out_starts[spliced], widths) + offsets] = np.round(mixed)
+    return out
+
+def edge_mask(length, starts, stops):
+    """Boolean mask that is True inside every [start, stop) range"""
+    edges = np.zeros(length + 1, dtype=np.int64)
+    np.add.at(edges, starts, 1)
+    np.add.at(edges, stops, -1)
+    return np.cumsum(edges[:-1]) > 0
+
+def strip_silence(frames, sample_rate, padding_ms=STRIP_PADDING_MS, **detect):
+    """Trim leading and trailing silence, keeping padding_ms at each end"""
+    chunks = nonsilent_chunks(frames, sample_rate, keep_silence_ms=padding_ms, **detect)
+    if len(chunks) == 0:
+        return frames
+    return frames[chunks[0, 0]:chunks[-1, 1]]
+
+def repair_frames(frames, sample_rate, crossfade_ms=CROSSFADE_MS, **detect):
+    """
+    Remove gaps from (frames, channels) int16 PCM
+    - Returns (repaired frames, chunk count); with one chunk or fewer the
+      track only has its leading/trailing silence trimmed
+    """
+    chunks = nonsilent_chunks(frames, sample_rate, **detect)
+    if len(chunks) <= 1:
+        return strip_silence(frames, sample_rate, **detect), len(chunks)
+    return splice(frames, chunks, ms_to_frames(crossfade_ms, sample_rate)), len(chunks)
+
+def read_pcm(path):
+    """Decode a whole file once into (sample_rate, (frames, channels) int16)"""
+    blocks = []
+    for sample_rate, channels, _, samples in pcm_chunks(path):
+        blocks.append(samples)
+    if not blocks:
+        raise ValueError(f"{path}: no audio data")
+    return sample_rate, np.concatenate(blocks).reshape(-1, channels)
@@ -0,0 +1,394 @@
+"""
+Harmonia block-based synthesis helpers
+Streams audio as fixed-size (block, 2) float arrays so peak memory stays
+constant no matter how long a track is:
+- Phase-continuous oscillators indexed by absolute sample position
+- Cached one-period pulse envelopes for isochronic tones
+- Additive synthesis of partial tables with a recursive phasor bank
+- Block-wise fade envelopes matching generate_audio.apply_fade
+- Two-pass peak normalisation over deterministic block streams
+- Mono-to-stereo duplication
+- Seamless-loop wrapping with a wrap-around crossfade
+- Incremental 16-bit WAV writer, and a preallocated memory-mapped one
+  that in-memory renders quantise straight into
+- Atomic output paths, so a failed render never leaves a partial file
+"""
+
+import contextlib
+import os
+import struct
+import wave
+from fractions import Fraction
+from functools import lru_cache
+
+import numpy as np
+from scipy import signal
+
+from render_profile import stage
+
+BLOCK_SIZE = 65536  # samples per block (~1.5 s at 44.1 kHz)
+PHASOR_SPAN = 1024  # samples per precomputed phasor table row
+ENVELOPE_TABLE_SIZE = 1 << 14  # points per period of a pulse envelope table
+ENVELOPE_SHAPES = ("butterworth", "cosine", "linear")
+ENVELOPE_MAX_PERIOD = 1 << 20  # longest envelope period sampled exactly (~24 s at 44.1 kHz)
+
+def block_ranges(total_samples, block_size=BLOCK_SIZE):
+    """Yield (start, stop) sample ranges covering total_samples"""
+    for start in range(0, total_samples, block_size):
+        yield start, min(start + block_size, total_samples)
+
+def phase_cycles(frequency, start, count, sample_rate):
+    """
+    Oscillator phase (in cycles, wrapped to [0, 1)) for a block
+    - Computed from the absolute sample index, so consecutive blocks
+      continue exactly where the previous one stopped
+    """
+    n = np.arange(start, start + count, dtype=np.float64)
+    return np.mod(n * (frequency / sample_rate), 1.0)
+
+def sine_block(frequency, start, count, sample_rate):
+    """Phase-continuous sine oscillator block"""
+    return np.sin(2 * np.pi * phase_cycles(frequency, start, count, sample_rate))
+
+@lru_cache(maxsize=128)
+def envelope_table(rate, duty=0.5, sample_rate=44100, shape="butterworth", ramp=0.1):
+    """
+    One period of a smoothed pulse-train envelope (0 = off, 1 = on)
+    - The pulse is on for the first duty of each period, with each edge
+      centred on the ideal square wave's edge
+    - "butterworth" is the steady state of filtfilt(butter(4, 2 * rate))
+      applied to the square wave: each harmonic k of the pulse train is
+      scaled by the zero-phase response |H(k * rate)|^2
+    - "cosine" and "linear" edges each last ramp of a period
+    - Sampled at ENVELOPE_TABLE_SIZE points plus one wrap-around point for
+      interpolation; cached and read-only, since tracks share it
+    """
+    size = ENVELOPE_TABLE_SIZE
+    if shape == "butterworth":
+        # Harmonics above Nyquist were aliased in the sampled square wave;
+        # the filter has them ~100 dB down long before then anyway
+        k = np.arange(1, min(size // 2 - 1, int(sample_rate / 2 / rate)) + 1)
+        sos = signal.butter(4, rate * 2, btype='low', fs=sample_rate, output='sos')
+        _, response = signal.sosfreqz(sos, worN=k * rate, fs=sample_rate)
+        spectrum = np.zeros(size // 2 + 1, dtype=np.complex128)
+        spectrum[0] = duty * size
+        # Pulse train: duty + sum(2 / (pi k) sin(pi k duty) cos(2 pi k (x - duty / 2)))
+        spectrum[k] = (size / np.pi / k * np.sin(np.pi * k * duty)
+                       * np.abs(response) ** 2 * np.exp(-1j * np.pi * k * duty))
+        table = np.fft.irfft(spectrum, size)
+    elif shape in ENVELOPE_SHAPES:
+        if not 0 < ramp <= min(duty, 1 - duty):
+            raise ValueError(f"ramp {ramp} does not fit a duty cycle of {duty}")
+        # Position after the start of the rising edge, in ramp lengths
+        edge = np.mod(np.arange(size) / size + ramp / 2, 1.0) / ramp
+        table = np.clip(np.minimum(edge, (duty + ramp) / ramp - edge), 0, 1)
+        if shape == "cosine":
+            table = 0.5 - 0.5 * np.cos(np.pi * table)
+    else:
+        raise ValueError(f"unknown envelope shape {shape!r}; expected one of {ENVELOPE_SHAPES}")
+
+    table = np.append(table, table[0])
+    table.flags.writeable = False
+    return table
+
+def envelope_lookup(cycles, table):
+    """Linearly interpolate an envelope_table at oscillator phases (in cycles)"""
+    position = np.mod(cycles, 1.0) * ENVELOPE_TABLE_SIZE
+    # mod can round up to exactly 1.0 for tiny negative phases
+    index = np.minimum(position.astype(np.intp), ENVELOPE_TABLE_SIZE - 1)
+    position -= index
+    lower = table[index]
+    return lower + position * (table[index + 1] - lower)
+
+@lru_cache(maxsize=128)
+def envelope_period(rate, duty=0.5, sample_rate=44100, shape="butterworth", ramp=0.1):
+    """
+    An envelope sampled over one exact period in samples, if it has one
+    - A rational rate repeats after a whole number of samples spanning
+      one or more cycles; when that is at most ENVELOPE_MAX_PERIOD
+      samples, the envelope is sampled once and then only ever copied
+    - Returns None otherwise (the caller interpolates the table instead)
+    """
+    fraction = Fraction(rate).limit_denominator(ENVELOPE_MAX_PERIOD)
+    if float(fraction) != rate:
+        return None
+    # A cycle of n / d samples: after n samples, exactly d cycles have passed
+    period = (Fraction(sample_rate) / fraction).numerator
+    if period > ENVELOPE_MAX_PERIOD:
+        return None
+    cycles = np.arange(period, dtype=np.float64) * (rate / sample_rate)
+    buffer = envelope_lookup(cycles, envelope_table(rate, duty, sample_rate, shape, ramp))
+    buffer.flags.writeable = False
+    return buffer
+
+def pulse_envelope(rate, start, count, sample_rate, duty=0.5, shape="butterworth", ramp=0.1):
+    """
+    Isochronic pulse envelope for samples [start, start + count)
+    - Indexed by absolute sample position, like phase_cycles, so blocks
+      join seamlessly and whole-track renders match streamed ones
+    """
+    buffer = envelope_period(rate, duty, sample_rate, shape, ramp)
+    if buffer is None:
+        table = envelope_table(rate, duty, sample_rate, shape, ramp)
+        return envelope_lookup(phase_cycles(rate, start, count, sample_rate), table)
+    offset = start % len(buffer)
+    return np.resize(np.concatenate((buffer[offset:], buffer[:offset])), count)
+
+def partial_arrays(partials):
+    """Split (frequency, amplitude[, phase]) partials into arrays"""
+    table = np.array([tuple(p) + (0.0,) * (3 - len(p)) for p in partials], dtype=np.float64)
+    return table[:, 0], table[:, 1], table[:, 2]
+
+def additive_blocks(partials, total_samples, sample_rate, block_size=BLOCK_SIZE):
+    """
+    Render sum(a * sin(2*pi*f*n/sample_rate + phase)) block-by-block
+    - Every transcendental is evaluated once up front: a (partials x span)
+      phasor table plus the rotations between spans and between blocks
+    - Each block is then one complex matrix product over all partials,
+      so adding partials costs BLAS multiply-adds instead of np.sin calls
+    """
+    freqs, amps, phases = partial_arrays(partials)
+    omega = 2 * np.pi * freqs / sample_rate
+
+    span = min(PHASOR_SPAN, block_size)
+    spans = -(-block_size // span)
+    # within-span rotation (partials x span) and span offsets (spans x partials)
+    table = np.exp(1j * np.outer(omega, np.arange(span)))
+    offsets = np.exp(1j * np.outer(np.arange(spans) * span, omega))
+    # rotation by the samples a block yields, not the spans it computes
+    step = np.exp(1j * omega * block_size)
+
+    # complex amplitude of each partial at the start of the current block
+    state = amps * np.exp(1j * phases)
+    for start, stop in block_ranges(total_samples, block_size):
+        with stage("oscillator"):
+            block = (offsets * state) @ table
+        yield block.imag.ravel()[:stop - start]
+        state *= step
+        # keep rounding from slowly changing partial amplitudes
+        state *= amps / np.maximum(np.abs(state), 1e-300)
+
+def render_partials(partials, total_samples, sample_rate, dtype="float64"):
+    """Render a partial table into one preallocated mono array"""
+    audio = np.empty(total_samples, dtype=dtype)
+    start = 0
+    for block in additive_blocks(partials, total_samples, sample_rate):
+        audio[start:start + len(block)] = block
+        start += len(block)
+    return audio
+
+def fade_gain(start, count, total_samples, fade_samples):
+    """Fade-in/out gain for one block of a track, matching apply_fade"""
+    gain = np.ones(count)
+    if fade_samples <= 1:
+        return gain
+
+    idx = np.arange(start, start + count)
+    ramp = 1.0 / (fade_samples - 1)
+
+    head = idx < fade_samples
+    gain[head] *= idx[head] * ramp
+
+    tail_start = total_samples - fade_samples
+    tail = idx >= tail_start
+    gain[tail] *= 1 - (idx[tail] - tail_start) * ramp
+    return gain
+
+def stream_peak(blocks):
+    """Per-channel absolute peak over a stream of (block, channels) arrays"""
+    peak = None
+    for block in blocks:
+        block_peak = np.max(np.abs(block), axis=0)
+        peak = block_peak if peak is None else np.maximum(peak, block_peak)
+    return peak
+
+def faded_blocks(blocks, total_samples, sample_rate, fade_duration, dtype="float64"):
+    """Cast a block stream to dtype and apply the track fade-in/out in place"""
+    fade_samples = int(sample_rate * fade_duration)
+    start = 0
+    for block in blocks:
+        block = block.astype(dtype, copy=False)
+        count = len(block)
+        block *= fade_gain(start, count, total_samples, fade_samples)[:, None]
+        start += count
+        yield block
+
+def normalized_blocks(make_blocks, total_samples, sample_rate, fade_duration, dtype="float64", level=0.8):
+    """
+    Peak-normalise and fade a block stream in two passes
+    - make_blocks() must return a fresh, deterministic block iterator
+    - Pass 1 measures the per-channel peak, pass 2 scales, fades and yields
+    """
+    peak = stream_peak(make_blocks())
+    gain = level / peak
+
+    def scaled():
+        for block in make_blocks():
+            block *= gain
+            yield block
+
+    return faded_blocks(scaled(), total_samples, sample_rate, fade_duration, dtype)
+
+def loop_frequency(frequency, loop_samples, sample_rate):
+    """Nearest frequency with a whole number of cycles in loop_samples"""
+    cycles = max(round(frequency * loop_samples / sample_rate), 1) if frequency else 0
+    return cycles * sample_rate / loop_samples
+
+def crossfade_ramps(count, shape="linear"):
+    """
+    (fade_out, fade_in) gains for a crossfade of count samples
+    - "linear" sums to 1, right for correlated (periodic) material
+    - "equal-power" keeps the level of uncorrelated noise constant
+    """
+    ramp = np.arange(count) / max(count, 1)
+    if shape == "equal-power":
+        return np.cos(0.5 * np.pi * ramp), np.sin(0.5 * np.pi * ramp)
+    return 1 - ramp, ramp
+
+def looped_blocks(blocks, loop_samples, crossfade_samples, shape="linear"):
+    """
+    Turn a render of loop_samples + crossfade_samples into a seamless loop
+    - The first crossfade_samples are held back; the rest streams through
+      and the overhang past loop_samples is crossfaded into the held head,
+      so the loop's last sample runs straight into its first
+    - Output is loop_samples long and starts crossfade_samples into the render
+    - Only the head is buffered, so memory does not grow with length
+    """
+    head = []
+    tail = []
+    start = 0
+    for block in blocks:
+        stop = start + len(block)
+        if start < crossfade_samples:
+            head.append(block[:crossfade_samples - start])
+        body = block[max(crossfade_samples - start, 0):max(loop_samples - start, 0)]
+        if len(body):
+            yield body
+        if stop > loop_samples:
+            tail.append(block[max(loop_samples - start, 0):])
+        start = stop
+
+    if crossfade_samples:
+        head = np.concatenate(head)
+        tail = np.concatenate(tail)[:crossfade_samples]
+        fade_out, fade_in = crossfade_ramps(crossfade_samples, shape)
+        gain_shape = (-1,) + (1,) * (head.ndim - 1)
+        mixed = tail * fade_out.reshape(gain_shape) + head * fade_in.reshape(gain_shape)
+        yield mixed.astype(head.dtype, copy=False)
+
+def mono_to_stereo(blocks):
+    """Duplicate mono blocks into (block, 2) stereo blocks"""
+    for block in blocks:
+        yield np.column_stack((block, block))
+
+def gather_blocks(blocks, total_samples, dtype="float64"):
+    """Collect a mono block stream into one preallocated dtype array"""
+    audio = np.empty(total_samples, dtype=dtype)
+    start = 0
+    for block in blocks:
+        audio[start:start + len(block)] = block
+        start += len(block)
+    return audio
+
+def quantize(audio, out=None):
+    """
+    Convert float audio to 16-bit PCM without a float temporary
+    - out: an int16 buffer (or strided view of one) to fill instead of a new
+      array; audio is broadcast into it, so a (samples, 1) mono column fills
+      both channels of a (samples, 2) buffer
+    """
+    if out is None:
+        out = np.empty(audio.shape, dtype=np.int16)
+    # Unsafe casting truncates toward zero, exactly like np.int16(audio * 32767)
+    np.multiply(audio, 32767, out=out, casting='unsafe')
+    return out
+
+class WavStreamWriter:
+    """Incrementally write float blocks to a 16-bit PCM WAV file"""
+
+    def __init__(self, filename, sample_rate, channels=2):
+        self.filename = filename
+        self._wav = wave.open(filename, "wb")
+        self._wav.setnchannels(channels)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(sample_rate)
+
+    def write(self, block):
+        self._wav.writeframes(quantize(block).tobytes())
+
+    def write_pcm(self, frames):
+        """Write frames that are already 16-bit PCM"""
+        self._wav.writeframes(np.ascontiguousarray(frames, dtype="<i2").tobytes())
+
+    def close(self):
+        self._wav.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def wav_header(frames, sample_rate, channels=2):
+    """Canonical 44-byte header of a 16-bit PCM WAV file, as the wave module writes it"""
+    data_size = frames * channels * 2
+    return (
+        b"RIFF" + struct.pack("<I", 36 + data_size) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, sample_rate, sample_rate * channels * 2, channels * 2, 16)
+        + b"data" + struct.pack("<I", data_size)
+    )
+
+class WavMemmapWriter:
+    """
+    Preallocated 16-bit PCM WAV file exposed as a (frames, channels) int16
+    np.memmap
+    - The file is sized up front, so renders quantise samples straight into
+      frames (e.g. with quantize(..., out=writer.frames[:, 0])) and the OS
+      pages them out; no full-length float or int16 copy of the track is made
+    """
+
+    def __init__(self, filename, sample_rate, frames, channels=2):
+        self.filename = filename
+        header = wav_header(frames, sample_rate, channels)
+        with open(filename, "wb") as f:
+            f.write(header)
+            f.truncate(len(header) + frames * channels * 2)
+        self.frames = np.memmap(filename, dtype="<i2", mode="r+", offset=len(header), shape=(frames, channels))
+
+    def close(self):
+        if self.frames is not None:
+            self.frames.flush()
+            self.frames = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+@contextlib.contextmanager
+def atomic_output(filename):
+    """
+    Yield a temporary path beside filename, moved into place on success
+    - On any failure the temporary file is removed, so a stream or encoder
+      that stops partway never leaves a finished-looking track behind
+    - The temporary name keeps the extension, which ffmpeg picks the
+      container from
+    """
+    tmp_path = f"{filename}.tmp{os.path.splitext(filename)[1]}"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, filename)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+
+def write_wav_stream(blocks, filename, sample_rate):
+    """Write a block stream to a WAV file, returning the frame count"""
+    frames = 0
+    with WavStreamWriter(filename, sample_rate) as writer:
+        for block in blocks:
+            writer.write(block)
+            frames += len(block)
+    return frames
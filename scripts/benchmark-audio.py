@@ -0,0 +1,87 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from audio_benchmarks import (
+    BASELINE_DIR,
+    CASES,
+    DEFAULT_DURATIONS,
+    DURATIONS,
+    RSS_TOLERANCE,
+    TIME_TOLERANCE,
+    compare,
+    load_baseline,
+    run_suite,
+    save_baseline,
+    select_cases,
+)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Harmonia audio pipeline")
+    parser.add_argument("-k", "--filter", metavar="TEXT",
+                        help="only run cases whose name contains TEXT (e.g. stream:, noise, fix)")
+    parser.add_argument("-d", "--durations", default=",".join(DEFAULT_DURATIONS),
+                        help=f"comma-separated track durations from {', '.join(DURATIONS)} or 'all' "
+                             f"(default: {','.join(DEFAULT_DURATIONS)})")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+                        help="runs per case; the fastest is kept (default: 3)")
+    parser.add_argument("--save", action="store_true",
+                        help="store these results as the new baseline instead of comparing")
+    parser.add_argument("--baseline-dir", default=BASELINE_DIR,
+                        help=f"where baselines are kept (default: {BASELINE_DIR}, git-ignored)")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE,
+                        help=f"allowed slowdown before failing (default: {TIME_TOLERANCE:g} = +{TIME_TOLERANCE:.0%})")
+    parser.add_argument("--rss-tolerance", type=float, default=RSS_TOLERANCE,
+                        help=f"allowed peak RSS growth before failing (default: {RSS_TOLERANCE:g})")
+    parser.add_argument("--workdir", help="directory for fixture tracks (default: a temporary directory)")
+    parser.add_argument("--list", action="store_true", help="list the benchmark cases and exit")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.list:
+        for name in CASES:
+            print(name)
+        return
+
+    durations = list(DURATIONS) if args.durations == "all" else args.durations.split(",")
+    unknown = [label for label in durations if label not in DURATIONS]
+    if unknown:
+        print(f"Unknown duration(s): {', '.join(unknown)}; choose from {', '.join(DURATIONS)}")
+        sys.exit(2)
+
+    selected = select_cases(args.filter, durations)
+    if not selected:
+        print("No benchmark cases selected")
+        sys.exit(2)
+
+    print(f"Running {len(selected)} benchmark(s), best of {args.repeat}...")
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="harmonia-bench-") as tmp_dir:
+        results = run_suite(selected, args.workdir or tmp_dir, args.repeat)
+    print(f"Finished in {time.perf_counter() - start:.1f}s")
+
+    if args.save:
+        save_baseline(results, args.baseline_dir)
+        print(f"Baseline saved to {os.path.join(args.baseline_dir, 'baseline.json')}")
+        return
+
+    baseline = load_baseline(args.baseline_dir)
+    if not baseline:
+        print("No baseline yet; run with --save to record one")
+        return
+    missing = [key for key in results if key not in baseline]
+    if missing:
+        print(f"{len(missing)} case(s) have no baseline yet: {', '.join(missing)}")
+
+    regressions = compare(results, baseline, args.time_tolerance, args.rss_tolerance)
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    if regressions:
+        sys.exit(1)
+    print("No regressions against the baseline")
+
+if __name__ == "__main__":
+    main()
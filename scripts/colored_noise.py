@@ -0,0 +1,132 @@
+"""
+Harmonia streaming colored-noise engine
+Block-wise replacement for the full-length FFT noise filters in
+generate_audio.py:
+- 1/f^e magnitude slope from a cascade of log-spaced pole/zero pairs
+- Filter state carried across blocks, so memory is constant in duration
+- Output level set from the filter's analytic variance instead of a
+  global np.max over the whole track
+- Reproducible white noise from seeded PCG64 child streams, addressed by
+  sample index so every render of a seed draws the same noise
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from scipy import signal
+
+from audio_stream import BLOCK_SIZE
+from modulation import sos_blocks
+
+# Magnitude exponents matching the FFT filters in generate_audio.py
+PINK_EXPONENT = 0.5  # 1 / sqrt(f)
+BROWN_EXPONENT = 1.0  # 1 / f
+OCEAN_EXPONENT = 0.8  # 1 / f**0.8
+
+DEFAULT_SEED = 0  # base seed; tracks mix in their own name (see generate_audio.track_seed)
+NOISE_SEGMENT = 1 << 16  # samples drawn from each child stream
+
+SLOPE_MIN_FREQ = 1.0  # Hz, same floor as the FFT path's freqs[0] = 1
+SECTIONS_PER_DECADE = 3
+
+class WhiteNoise:
+    """
+    Reproducible unit white Gaussian noise, addressed by sample index
+    - Noise is drawn in fixed NOISE_SEGMENT-sample segments, each from its
+      own PCG64 Generator seeded with a child of one SeedSequence (the
+      children SeedSequence.spawn would hand out), so any sample range can
+      be generated on its own: block size, order and process never change
+      the samples
+    - child(i) is an independent stream for a track's i-th noise source
+    - seed is anything SeedSequence takes, e.g. an int or a tuple of ints
+    """
+
+    def __init__(self, seed=DEFAULT_SEED, spawn_key=()):
+        self.seed = seed
+        self.spawn_key = tuple(spawn_key)
+        self._segment = None
+        self._samples = None
+
+    def child(self, index):
+        return WhiteNoise(self.seed, self.spawn_key + (index,))
+
+    def generator(self, segment):
+        """PCG64 Generator for one segment of the stream"""
+        sequence = np.random.SeedSequence(self.seed, spawn_key=self.spawn_key + (segment,))
+        return np.random.Generator(np.random.PCG64(sequence))
+
+    def segment(self, index):
+        # Keep the last segment: blocks that straddle segments reuse it
+        if self._segment != index:
+            self._samples = self.generator(index).standard_normal(NOISE_SEGMENT)
+            self._segment = index
+        return self._samples
+
+    def read(self, start, count):
+        """Samples [start, start + count) as float64"""
+        out = np.empty(count)
+        position = start
+        while position < start + count:
+            index, offset = divmod(position, NOISE_SEGMENT)
+            take = min(NOISE_SEGMENT - offset, start + count - position)
+            out[position - start:position - start + take] = self.segment(index)[offset:offset + take]
+            position += take
+        return out
+
+@lru_cache(maxsize=None)
+def design_colored_noise(exponent, sample_rate, min_freq=SLOPE_MIN_FREQ):
+    """
+    Design an SOS filter whose magnitude falls as f**-exponent
+    - One real pole/zero pair every 1/3 decade from min_freq up to Nyquist;
+      each zero sits `exponent` of the way to the next pole, which gives
+      the requested average slope (within ~1 dB up to 15 kHz)
+    - Poles and zeros are mapped with the matched-z transform, so the
+      low-frequency poles stay well inside the unit circle
+    """
+    ratio = 10 ** (1 / SECTIONS_PER_DECADE)
+    count = int(np.floor(np.log10(0.5 * sample_rate / min_freq) * SECTIONS_PER_DECADE)) + 1
+    poles = min_freq * ratio ** np.arange(count)
+    zeros = poles * ratio ** exponent
+
+    z = np.exp(-2 * np.pi * zeros / sample_rate)
+    p = np.exp(-2 * np.pi * poles / sample_rate)
+    return signal.zpk2sos(z, p, 1.0)
+
+def impulse_rms(sos, length):
+    """Output RMS of an SOS filter driven by unit white noise"""
+    impulse = np.zeros(length)
+    impulse[0] = 1.0
+    response = signal.sosfilt(sos, impulse)
+    return float(np.sqrt(np.sum(response ** 2)))
+
+def decay_length(sample_rate, min_freq):
+    """Impulse length that covers the decay of a pole at min_freq"""
+    return int(20 * sample_rate / (2 * np.pi * min_freq))
+
+@lru_cache(maxsize=None)
+def colored_noise_rms(exponent, sample_rate, min_freq=SLOPE_MIN_FREQ):
+    """Output RMS of design_colored_noise for unit white noise"""
+    sos = design_colored_noise(exponent, sample_rate, min_freq)
+    return impulse_rms(sos, decay_length(sample_rate, min_freq))
+
+def expected_peak(rms, total_samples):
+    """Expected peak of total_samples Gaussian samples with the given RMS"""
+    return rms * np.sqrt(2 * np.log(max(total_samples, 2)))
+
+def filtered_noise_blocks(sos, rms, total_samples, noise, amplitude, block_size=BLOCK_SIZE):
+    """
+    Filter white noise block-by-block and scale it to a peak target
+    - amplitude is the level the whole-track peak is expected to reach,
+      the same meaning as the FFT path's `/ np.max(np.abs(x)) * amplitude`
+    - noise is the WhiteNoise stream to filter
+    """
+    gain = amplitude / expected_peak(rms, total_samples)
+    for block in sos_blocks(sos, noise, total_samples, block_size):
+        block *= gain
+        yield block
+
+def colored_noise_blocks(exponent, total_samples, sample_rate, noise, amplitude=0.8, block_size=BLOCK_SIZE):
+    """Stream mono 1/f**exponent noise scaled to an expected peak of amplitude"""
+    sos = design_colored_noise(exponent, sample_rate)
+    rms = colored_noise_rms(exponent, sample_rate)
+    return filtered_noise_blocks(sos, rms, total_samples, noise, amplitude, block_size)
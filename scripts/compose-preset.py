@@ -0,0 +1,45 @@
+import argparse
+import math
+import os
+import sys
+import time
+
+from colored_noise import DEFAULT_SEED
+from compositor import compose, load_preset
+from generate_audio import OUTPUT_DIR, OUTPUT_FORMATS, track_path
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Render layered Harmonia presets (JSON) into single tracks with a peak limiter",
+    )
+    parser.add_argument("presets", nargs="+", help="preset JSON files (see scripts/presets/)")
+    parser.add_argument("-o", "--output-dir", default=OUTPUT_DIR,
+                        help=f"directory for rendered presets (default: {OUTPUT_DIR})")
+    parser.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="wav",
+                        help="output format; encoder profiles pipe PCM straight into ffmpeg/lame")
+    parser.add_argument("-d", "--duration", type=float, default=None,
+                        help="override every preset's duration in seconds")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED,
+                        help=f"base seed for the layers' noise (default: {DEFAULT_SEED})")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        presets = [load_preset(path) for path in args.presets]
+    except (OSError, ValueError) as e:
+        print(f"Invalid preset: {e}")
+        sys.exit(1)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for preset in presets:
+        if args.duration is not None:
+            preset["duration"] = args.duration
+        start = time.perf_counter()
+        limiter = compose(preset, track_path(args.output_dir, preset["name"], args.format), args.format, seed=args.seed)
+        elapsed = time.perf_counter() - start
+        if limiter.limited_samples:
+            reduction = -20 * math.log10(limiter.min_gain)
+            print(f"  limited {limiter.limited_samples} samples, at most {reduction:.1f} dB, in {elapsed:.2f}s")
+        else:
+            print(f"  no limiting needed, {elapsed:.2f}s")
@@ -0,0 +1,197 @@
+"""
+Harmonia preset compositor
+Renders a layered preset (e.g. a binaural beat over rain) into a single
+track, so the app plays one decode stream instead of one per layer:
+- Layers are generate_audio generators that have a block-wise version,
+  named directly or through a catalogue track, each with its own noise
+  seed
+- Each layer has a gain and an optional automation curve of (seconds,
+  gain) breakpoints, linearly interpolated per sample
+- Layers are rendered unfaded; the mix gets the preset's master fade
+  (the only fade applied) and then a look-ahead peak limiter, so no
+  sample exceeds the ceiling however the layers add up
+- Memory stays constant in duration: one block per layer plus the
+  limiter's look-ahead
+"""
+
+import json
+
+import numpy as np
+from scipy.ndimage import minimum_filter1d
+
+import generate_audio
+from audio_stream import BLOCK_SIZE, block_ranges, fade_gain
+from colored_noise import DEFAULT_SEED
+
+LIMITER_CEILING = -1.0  # dBFS sample peak
+LIMITER_LOOKAHEAD = 0.005  # seconds the gain starts falling ahead of a peak
+LIMITER_HOLD = 0.05  # seconds the gain stays down after a peak
+
+def load_preset(path):
+    """Read and validate a preset JSON file, filling in defaults"""
+    with open(path, "r", encoding="utf-8") as f:
+        preset = json.load(f)
+    return validate_preset(preset)
+
+def validate_preset(preset):
+    """
+    Check a preset description and fill in defaults
+    - name, duration (s) and a non-empty list of layers are required
+    - Each layer names a catalogue "track" or a "generator" with "params",
+      plus an optional "gain" (default 1) and "automation" breakpoints
+    """
+    for key in ("name", "duration", "layers"):
+        if key not in preset:
+            raise ValueError(f"preset is missing {key!r}")
+    if not preset["layers"]:
+        raise ValueError(f"preset {preset['name']!r} has no layers")
+    preset = {
+        "sample_rate": generate_audio.SAMPLE_RATE,
+        "fade": generate_audio.FADE_DURATION,
+        "ceiling": LIMITER_CEILING,
+        **preset,
+    }
+    catalogue = {name: (generator, params) for name, generator, params in generate_audio.build_jobs()}
+    layers = []
+    for index, layer in enumerate(preset["layers"]):
+        if "track" in layer:
+            if layer["track"] not in catalogue:
+                raise ValueError(f"layer {index}: unknown track {layer['track']!r}")
+            generator, params = catalogue[layer["track"]]
+            params = {key: value for key, value in params.items() if key not in ("duration", "dtype")}
+        else:
+            generator = layer.get("generator")
+            params = {}
+            if generator not in generate_audio.STREAM_GENERATORS:
+                raise ValueError(f"layer {index}: unknown generator {generator!r}")
+        points = layer.get("automation", [])
+        if any(b[0] < a[0] for a, b in zip(points, points[1:])):
+            raise ValueError(f"layer {index}: automation times must not decrease")
+        layers.append({
+            **layer,
+            "generator": generator,
+            "params": {**params, **layer.get("params", {})},
+            "gain": layer.get("gain", 1.0),
+            "automation": points,
+        })
+    preset["layers"] = layers
+    return preset
+
+def layer_job(preset, index):
+    """Render job for one layer; its name (preset/index) seeds the layer's noise"""
+    layer = preset["layers"][index]
+    params = {**layer["params"], "duration": preset["duration"], "sample_rate": preset["sample_rate"]}
+    return f"{preset['name']}/{index}", layer["generator"], params
+
+def layer_blocks(job, block_size=BLOCK_SIZE, seed=DEFAULT_SEED):
+    """
+    Stereo blocks of one layer from the generator's block-wise version
+    - Rendered without the generator's own track fade: the preset's fade
+      and automation are the only gain curves applied to a layer
+    """
+    name, generator, params = job
+    func = getattr(generate_audio, generate_audio.job_generator(job, stream=True))
+    job = (name, generator, {**params, "block_size": block_size})
+    return func(**generate_audio.job_kwargs(job, stream=True, seed=seed, fade_duration=0))
+
+def automation_gain(points, start, count, sample_rate):
+    """Per-sample gain of a breakpoint curve for samples [start, start + count); 1 without breakpoints"""
+    if not points:
+        return np.ones(count)
+    times, gains = zip(*points)
+    return np.interp(np.arange(start, start + count) / sample_rate, times, gains)
+
+def mixed_blocks(preset, block_size=BLOCK_SIZE, seed=DEFAULT_SEED):
+    """Sum every layer times its gain and automation, then apply the master fade"""
+    sample_rate = preset["sample_rate"]
+    total_samples = int(sample_rate * preset["duration"])
+    fade_samples = int(sample_rate * preset["fade"])
+    streams = [layer_blocks(layer_job(preset, i), block_size, seed) for i in range(len(preset["layers"]))]
+    for (start, stop), blocks in zip(block_ranges(total_samples, block_size), zip(*streams)):
+        count = stop - start
+        mix = np.zeros((count, 2))
+        for layer, block in zip(preset["layers"], blocks):
+            gain = layer["gain"] * automation_gain(layer["automation"], start, count, sample_rate)
+            mix += block * gain[:, None]
+        mix *= fade_gain(start, count, total_samples, fade_samples)[:, None]
+        yield mix
+
+class PeakLimiter:
+    """
+    Look-ahead peak limiter over a block stream
+    - Each sample needs gain min(1, ceiling / peak); that requirement is
+      held for hold seconds, taken as a minimum lookahead seconds ahead,
+      then smoothed with a lookahead-long moving average, which still never
+      exceeds the requirement at the peak itself
+    - Output lags input by the look-ahead, so process() may return fewer
+      samples than it was given; flush() returns the rest. Gains depend
+      only on the samples around them, not on block boundaries
+    """
+
+    def __init__(self, sample_rate, ceiling_db=LIMITER_CEILING, lookahead=LIMITER_LOOKAHEAD, hold=LIMITER_HOLD):
+        self.ceiling = 10 ** (ceiling_db / 20)
+        self.lookahead = max(int(sample_rate * lookahead), 1)
+        self.hold = int(sample_rate * hold)
+        # Requirements of the samples just emitted, which later gains still see
+        self._history = np.ones(self.lookahead - 1 + self.hold)
+        self._pending = np.empty((0, 2))
+        self._required = np.empty(0)
+        self.min_gain = 1.0
+        self.limited_samples = 0
+
+    def required_gain(self, block):
+        peak = np.max(np.abs(block), axis=1)
+        gain = np.ones(len(block))
+        over = peak > self.ceiling
+        gain[over] = self.ceiling / peak[over]
+        return gain
+
+    def process(self, block):
+        self._pending = np.concatenate((self._pending, block))
+        self._required = np.concatenate((self._required, self.required_gain(block)))
+        return self._emit(len(self._required) - self.lookahead, self._required)
+
+    def flush(self):
+        # Past the end is silence, which needs no gain reduction
+        return self._emit(len(self._required), np.concatenate((self._required, np.ones(self.lookahead))))
+
+    def _emit(self, count, required):
+        if count <= 0:
+            return self._pending[:0]
+        lookahead = self.lookahead
+        context = np.concatenate((self._history, required[:count + lookahead]))
+        audio = self._pending[:count]
+        if context.min() < 1:
+            width = self.hold + lookahead + 1
+            held = minimum_filter1d(context, width, mode="nearest")
+            held = held[width // 2:width // 2 + count + lookahead - 1]
+            sums = np.concatenate(([0.0], np.cumsum(held)))
+            gain = (sums[lookahead:lookahead + count] - sums[:count]) / lookahead
+            audio = audio * gain[:, None]
+            self.min_gain = min(self.min_gain, float(gain.min()))
+            self.limited_samples += int(np.count_nonzero(gain < 1))
+        self._history = context[count:count + len(self._history)]
+        self._pending = self._pending[count:]
+        self._required = self._required[count:]
+        return audio
+
+def limited_blocks(blocks, limiter):
+    """Run a block stream through a PeakLimiter, skipping empty outputs"""
+    for block in blocks:
+        out = limiter.process(block)
+        if len(out):
+            yield out
+    out = limiter.flush()
+    if len(out):
+        yield out
+
+def compose(preset, filename, fmt="wav", block_size=BLOCK_SIZE, seed=DEFAULT_SEED):
+    """
+    Render a preset to one file (WAV or any encoder profile)
+    - Returns the PeakLimiter, whose min_gain and limited_samples tell how
+      hard the mix had to be limited
+    """
+    limiter = PeakLimiter(preset["sample_rate"], preset["ceiling"])
+    blocks = limited_blocks(mixed_blocks(preset, block_size, seed), limiter)
+    generate_audio.write_blocks(blocks, filename, fmt, preset["sample_rate"])
+    return limiter
@@ -0,0 +1,100 @@
+"""
+Harmonia encode stage
+Pipes 16-bit PCM blocks straight into a local encoder process (ffmpeg or
+lame over stdin), so rendered tracks go from parameters to the shipped
+MP3/Opus asset without an intermediate WAV on disk.
+"""
+
+import shutil
+import subprocess
+import tempfile
+
+import numpy as np
+
+from audio_stream import quantize
+
+# Encoder profiles selectable with generate_audio.py --format
+ENCODE_PROFILES = {
+    "mp3-128": {"encoder": "ffmpeg", "ext": ".mp3", "codec": "mp3", "bitrate": "128k",
+                "args": ["-c:a", "libmp3lame", "-b:a", "128k"]},
+    "mp3-192": {"encoder": "ffmpeg", "ext": ".mp3", "codec": "mp3", "bitrate": "192k",
+                "args": ["-c:a", "libmp3lame", "-b:a", "192k"]},
+    "mp3-vbr": {"encoder": "ffmpeg", "ext": ".mp3", "codec": "mp3", "bitrate": "vbr-q4",
+                "args": ["-c:a", "libmp3lame", "-q:a", "4"]},
+    "opus-96": {"encoder": "ffmpeg", "ext": ".opus", "codec": "opus", "bitrate": "96k",
+                "args": ["-c:a", "libopus", "-b:a", "96k"]},
+    "lame-128": {"encoder": "lame", "ext": ".mp3", "codec": "mp3", "bitrate": "128k",
+                 "args": ["-b", "128"]},
+}
+
+def extension_profile(ext, profile_name=None):
+    """
+    Encoder profile for an output extension: profile_name if it writes that
+    extension, else the first profile that does; None for .wav (no encoder)
+    """
+    ext = ext.lower()
+    if ext == ".wav":
+        if profile_name is not None:
+            raise ValueError(f"profile {profile_name!r} writes {ENCODE_PROFILES[profile_name]['ext']}, not .wav")
+        return None
+    matching = [name for name, profile in ENCODE_PROFILES.items() if profile["ext"] == ext]
+    if not matching:
+        raise ValueError(f"no encoder profile writes {ext or 'extensionless'} files")
+    if profile_name is None:
+        return matching[0]
+    if profile_name not in matching:
+        raise ValueError(f"profile {profile_name!r} writes {ENCODE_PROFILES[profile_name]['ext']}, not {ext}")
+    return profile_name
+
+def encoder_command(profile_name, filename, sample_rate, channels=2):
+    """Build the encoder command line for a profile, reading raw PCM on stdin"""
+    profile = ENCODE_PROFILES[profile_name]
+    if profile["encoder"] == "lame":
+        return [
+            "lame", "--quiet", "-r", "-s", f"{sample_rate / 1000:g}",
+            "--bitwidth", "16", "--signed", "--little-endian",
+            "-m", "j" if channels == 2 else "m",
+            *profile["args"], "-", filename,
+        ]
+    return [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-f", "s16le", "-ar", str(sample_rate), "-ac", str(channels), "-i", "pipe:0",
+        *profile["args"], filename,
+    ]
+
+class EncoderStreamWriter:
+    """Stream float blocks into an encoder subprocess via stdin"""
+
+    def __init__(self, command, filename):
+        if shutil.which(command[0]) is None:
+            raise RuntimeError(f"{command[0]} not found on PATH; install it or use --format wav")
+        self.filename = filename
+        # stderr goes to a file so a chatty encoder can never block on a full pipe
+        self._stderr = tempfile.TemporaryFile()
+        self._proc = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=self._stderr)
+
+    def write(self, block):
+        self._proc.stdin.write(quantize(block).tobytes())
+
+    def write_pcm(self, frames):
+        """Write frames that are already 16-bit PCM"""
+        self._proc.stdin.write(np.ascontiguousarray(frames, dtype="<i2").tobytes())
+
+    def close(self):
+        self._proc.stdin.close()
+        returncode = self._proc.wait()
+        self._stderr.seek(0)
+        message = self._stderr.read().decode("utf-8", "replace").strip()
+        self._stderr.close()
+        if returncode != 0:
+            raise RuntimeError(f"encoder failed for {self.filename} ({returncode}): {message}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_encoder(profile_name, filename, sample_rate, channels=2):
+    """Start an encoder for filename using a named profile"""
+    return EncoderStreamWriter(encoder_command(profile_name, filename, sample_rate, channels), filename)
@@ -0,0 +1,59 @@
+import argparse
+import os
+import sys
+import time
+
+from audio_bundle import RECIPE_EXT, expand_bundle, load_recipe
+from audio_stream import WavStreamWriter, atomic_output
+from encode_audio import ENCODE_PROFILES, open_encoder
+
+def expand_audio(recipe_file, output_dir, fmt="wav"):
+    """Rebuild the full-length track described by one bundle recipe"""
+    recipe = load_recipe(recipe_file)
+    ext = ".wav" if fmt == "wav" else ENCODE_PROFILES[fmt]["ext"]
+    output_path = os.path.join(output_dir, f"{recipe['track']}{ext}")
+    start = time.perf_counter()
+
+    with atomic_output(output_path) as tmp_path:
+        if fmt == "wav":
+            writer = WavStreamWriter(tmp_path, recipe["sample_rate"])
+        else:
+            writer = open_encoder(fmt, tmp_path, recipe["sample_rate"])
+        with writer:
+            frames = expand_bundle(recipe_file, writer)
+
+    elapsed = time.perf_counter() - start
+    print(f"Expanded: {output_path} ({frames / recipe['sample_rate']:.0f}s in {elapsed:.2f}s)")
+    return output_path
+
+def find_recipes(paths):
+    """Recipe files named directly, or found inside the given directories"""
+    recipes = []
+    for path in paths:
+        if os.path.isdir(path):
+            recipes.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.endswith(RECIPE_EXT)
+            )
+        else:
+            recipes.append(path)
+    return recipes
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Expand Harmonia loop bundles to full-length tracks")
+    parser.add_argument("bundles", nargs="+", help="recipe .json files or directories of bundles")
+    parser.add_argument("-o", "--output-dir", default=".", help="directory for expanded tracks")
+    parser.add_argument("-f", "--format", choices=["wav", *ENCODE_PROFILES], default="wav",
+                        help="output format (default: wav)")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    recipes = find_recipes(args.bundles)
+    if not recipes:
+        print("No bundle recipes found")
+        sys.exit(1)
+    for recipe_file in recipes:
+        expand_audio(recipe_file, args.output_dir, args.format)
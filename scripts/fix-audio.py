@@ -1,59 +1,75 @@
+import argparse
 import os
-import numpy as np
-from pydub import AudioSegment
-import sys
+import time
 
-def fix_audio(file_path, output_path):
+from audio_repair import read_pcm, repair_frames
+from audio_stream import WavStreamWriter, atomic_output
+from encode_audio import ENCODE_PROFILES, extension_profile, open_encoder
+
+DEFAULT_FILES = ["brown-noise.mp3", "wind.mp3"]
+
+def write_pcm_file(frames, output_path, sample_rate, profile=None):
+    """
+    Encode int16 frames once, replacing output_path atomically
+    - The encoder profile follows the output extension (profile must match it)
+    """
+    profile = extension_profile(os.path.splitext(output_path)[1], profile)
+    with atomic_output(output_path) as tmp_path:
+        if profile is None:
+            writer = WavStreamWriter(tmp_path, sample_rate, frames.shape[1])
+        else:
+            writer = open_encoder(profile, tmp_path, sample_rate, frames.shape[1])
+        with writer:
+            writer.write_pcm(frames)
+
+def fix_audio(file_path, output_path, profile=None):
     print(f"Fixing {file_path}...")
     try:
-        audio = AudioSegment.from_file(file_path)
-        
-        # Detect silence
-        min_silence_len = 50 # ms
-        silence_thresh = -60 # dBFS
-        
-        # Simple way to remove silence and crossfade
-        # We'll split by silence and join with crossfades
-        from pydub.silence import split_on_silence
-        
-        chunks = split_on_silence(
-            audio, 
-            min_silence_len=min_silence_len,
-            silence_thresh=silence_thresh,
-            keep_silence=10 # keep a tiny bit
-        )
-        
-        if len(chunks) <= 1:
+        start = time.perf_counter()
+        # Decode once, repair in the sample domain, encode once
+        sample_rate, frames = read_pcm(file_path)
+        fixed, chunks = repair_frames(frames, sample_rate)
+
+        if chunks <= 1:
             print(f"  - No significant breaks found to fix via splitting.")
-            # If it's just a start/end silence, trim it
-            fixed = audio.strip_silence(silence_thresh=silence_thresh)
-            fixed.export(output_path, format="mp3")
-            return
-
-        print(f"  - Found {len(chunks)} chunks. Joining with crossfades...")
-        
-        fixed = chunks[0]
-        for chunk in chunks[1:]:
-            # Use a crossfade that is at most 1/3 of the chunk length
-            cf = min(100, len(chunk) // 3, len(fixed) // 3)
-            if cf > 0:
-                fixed = fixed.append(chunk, crossfade=cf)
-            else:
-                fixed = fixed.append(chunk, crossfade=0)
-            
-        fixed.export(output_path, format="mp3")
-        print(f"  - Fixed audio saved to {output_path}")
-                
+        else:
+            print(f"  - Found {chunks} chunks. Joined with crossfades.")
+        print(f"  - {len(frames) / sample_rate:.2f}s -> {len(fixed) / sample_rate:.2f}s")
+
+        write_pcm_file(fixed, output_path, sample_rate, profile)
+        print(f"  - Fixed audio saved to {output_path} ({time.perf_counter() - start:.2f}s)")
+
     except Exception as e:
         print(f"  - Error: {e}")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Remove gaps from Harmonia audio tracks")
+    parser.add_argument("files", nargs="*", default=DEFAULT_FILES,
+                        help=f"file names inside --audio-dir (default: {' '.join(DEFAULT_FILES)})")
+    parser.add_argument("--audio-dir", default="assets/audio",
+                        help="directory holding the tracks (default: assets/audio)")
+    parser.add_argument("-o", "--output-dir",
+                        help="write repaired tracks here instead of overwriting the originals")
+    parser.add_argument("--profile", choices=list(ENCODE_PROFILES),
+                        help="encoder profile for compressed outputs; must match their extension "
+                             "(default: mp3-128 for .mp3, opus-96 for .opus)")
+    args = parser.parse_args(argv)
+    for file_name in args.files:
+        try:
+            extension_profile(os.path.splitext(file_name)[1], args.profile)
+        except ValueError as e:
+            parser.error(f"{file_name}: {e}")
+    return args
+
 if __name__ == "__main__":
-    audio_dir = "assets/audio"
-    files_to_fix = ["brown-noise.mp3", "wind.mp3"]
-    
-    for file_name in files_to_fix:
-        input_path = os.path.join(audio_dir, file_name)
+    args = parse_args()
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    for file_name in args.files:
+        input_path = os.path.join(args.audio_dir, file_name)
         if os.path.exists(input_path):
-            fix_audio(input_path, input_path) # Overwrite with fixed version
+            output_path = os.path.join(args.output_dir or args.audio_dir, file_name)
+            fix_audio(input_path, output_path, args.profile) # Overwrites unless --output-dir
         else:
             print(f"File {input_path} not found")
@@ -7,315 +7,1224 @@ Generates 21 professional audio tracks:
 - 7 Ambient/Harmonic Sounds
 """
 
-import numpy as np
+import argparse
+import inspect
 import os
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+
+import numpy as np
 from scipy.io import wavfile
-from scipy import signal
+from scipy import fft as sp_fft
+
+from audio_stream import (
+    BLOCK_SIZE,
+    ENVELOPE_SHAPES,
+    additive_blocks,
+    atomic_output,
+    block_ranges,
+    faded_blocks,
+    gather_blocks,
+    loop_frequency,
+    looped_blocks,
+    mono_to_stereo,
+    normalized_blocks,
+    pulse_envelope,
+    quantize,
+    render_partials,
+    sine_block,
+    WavMemmapWriter,
+    WavStreamWriter,
+)
+from asset_manifest import publish
+from audio_bundle import loop_path, recipe_path, write_recipe
+from colored_noise import (
+    BROWN_EXPONENT,
+    DEFAULT_SEED,
+    OCEAN_EXPONENT,
+    PINK_EXPONENT,
+    WhiteNoise,
+    colored_noise_blocks,
+)
+from encode_audio import ENCODE_PROFILES, open_encoder
+from loudness import TRUE_PEAK_CEILING, measure_loudness, normalization_gain
+from modulation import control_blocks, control_factor, control_noise, control_times, design_sos, modulate, sos_blocks
+from render_cache import CACHE_DIR, CACHE_SIZE_MB, RenderCache, files_hash, render_key
+from render_profile import PROFILE_FILE, profiled, stage, stage_totals, write_folded, write_profile
 
 # Audio parameters
 SAMPLE_RATE = 44100  # Hz
 DURATION = 300  # 5 minutes per track (300 seconds)
 FADE_DURATION = 10  # 10 seconds fade in/out
+LOOP_CROSSFADE = 3  # seconds of wrap-around crossfade in --loop renders
+BUNDLE_LOOP_SECONDS = 10  # loop length shipped in --bundle mode
+OUTPUT_DIR = "../assets/audio"
+OUTPUT_FORMATS = ["wav", *ENCODE_PROFILES]
+
+# Catalogue parameters
+BINAURAL_TRACKS = [
+    (2, "delta-2hz"),
+    (3, "delta-3hz"),
+    (4, "theta-4hz"),
+    (6, "theta-6hz"),
+    (8, "alpha-8hz"),
+    (10, "alpha-10hz"),
+    (14, "beta-14hz"),
+]
+ISOCHRONIC_FREQS = [4, 6, 8, 10, 12, 16, 20]
 
-def apply_fade(audio, sample_rate, fade_duration):
-    """Apply fade-in and fade-out to audio"""
-    fade_samples = int(sample_rate * fade_duration)
-    fade_in = np.linspace(0, 1, fade_samples)
-    fade_out = np.linspace(1, 0, fade_samples)
+# Partial tables (frequency, amplitude[, phase]) for additive tracks
+OM_FUNDAMENTAL = 136.1  # "Om" frequency
+OM_DRONE_PARTIALS = [
+    (OM_FUNDAMENTAL, 1.0),  # Fundamental
+    (OM_FUNDAMENTAL * 2, 0.5),  # 2nd harmonic
+    (OM_FUNDAMENTAL * 3, 0.3),  # 3rd harmonic
+    (OM_FUNDAMENTAL * 4, 0.2),  # 4th harmonic
+    (OM_FUNDAMENTAL * 5, 0.1),  # 5th harmonic
+]
+LOW_PAD_PARTIALS = [
+    (65.4, 1.0),  # C2
+    (98.0, 1 / 2),  # G2
+    (130.8, 1 / 3),  # C3
+    (196.0, 1 / 4),  # G3
+]
+
+def fade_ramp(sample_rate, fade_duration, dtype="float64"):
+    """Linear 0 -> 1 fade-in ramp; reversed, it is the fade-out"""
+    return np.linspace(0, 1, int(sample_rate * fade_duration), dtype=dtype)
+
+def apply_fade(audio, sample_rate, fade_duration, fade_in=None):
+    """
+    Apply fade-in and fade-out to audio (in place)
+    - fade_in: a precomputed fade_ramp, so batches build it only once
+    """
+    if fade_in is None:
+        fade_in = fade_ramp(sample_rate, fade_duration, audio.dtype)
+    fade_samples = len(fade_in)
+    if fade_samples == 0:
+        return audio
     
-    audio[:fade_samples] *= fade_in
-    audio[-fade_samples:] *= fade_out
+    with stage("fade"):
+        audio[:fade_samples] *= fade_in
+        audio[-fade_samples:] *= fade_in[::-1]
+    return audio
+
+def track_fade(loop_duration=None, fade_duration=None):
+    """
+    Fade length for a track; seamless loops must not fade
+    - fade_duration overrides it (the preset compositor fades the mix itself)
+    """
+    if fade_duration is not None:
+        return fade_duration
+    return 0 if loop_duration else FADE_DURATION
+
+def loop_frequencies(loop_duration, sample_rate, *frequencies):
+    """
+    Snap frequencies to whole cycles over a loop of loop_duration seconds
+    - Returned unchanged when loop_duration is None
+    """
+    if not loop_duration:
+        return frequencies
+    loop_samples = int(sample_rate * loop_duration)
+    return tuple(loop_frequency(f, loop_samples, sample_rate) for f in frequencies)
+
+def sample_times(duration, sample_rate, loop_duration=None):
+    """
+    Sample times for the in-memory generators
+    - Loops use the exact n / sample_rate grid of the stream generators, so
+      snapped frequencies really complete whole cycles at the loop point
+    """
+    samples = int(sample_rate * duration)
+    if loop_duration:
+        return np.arange(samples) / sample_rate
+    return np.linspace(0, duration, samples)
+
+def normalize(audio, level=0.8):
+    """Scale audio in place so its absolute peak equals level"""
+    with stage("normalize"):
+        # max/min avoid the full-length temporary np.abs would allocate
+        peak = max(audio.max(), -audio.min())
+        audio *= level / peak
     return audio
 
-def generate_pink_noise(duration, sample_rate, amplitude=0.1):
+def to_stereo(left, right=None, out=None):
+    """
+    Stack mono channels into a (samples, 2) track; right defaults to left
+    - out: a (samples, 2) int16 buffer (e.g. WavMemmapWriter.frames) to
+      quantise the channels straight into through strided column views;
+      mono is broadcast to both columns. Returns out, and no float stereo
+      copy is made
+    """
+    if out is not None:
+        with stage("quantize"):
+            if right is None:
+                return quantize(left[:, None], out)
+            quantize(left, out[:, 0])
+            quantize(right, out[:, 1])
+            return out
+    with stage("stereo"):
+        return np.column_stack((left, left if right is None else right))
+
+def add_sine(out, frequency, t, phase, amplitude=1.0):
+    """
+    Add amplitude * sin(2*pi*frequency*t) to out without temporaries
+    - phase is a float64 scratch buffer the size of t, so the oscillator
+      argument keeps full precision even when out is float32
+    """
+    with stage("oscillator"):
+        np.multiply(t, 2 * np.pi * frequency, out=phase)
+        np.sin(phase, out=phase)
+        if amplitude != 1.0:
+            phase *= amplitude
+        out += phase
+    return out
+
+def shaped_noise(samples, sample_rate, exponent, dtype, noise):
+    """White noise (from a WhiteNoise stream) shaped by a 1/f**exponent magnitude filter via FFT"""
+    with stage("noise"):
+        white = noise.read(0, samples).astype(dtype, copy=False)
+    
+    with stage("fft"):
+        # scipy.fft keeps float32 input in single precision end to end
+        fft = sp_fft.rfft(white, overwrite_x=True)
+        del white
+        freqs = np.fft.rfftfreq(samples, 1/sample_rate).astype(dtype, copy=False)
+        freqs[0] = 1  # Avoid division by zero
+        np.power(freqs, -exponent, out=freqs)
+        fft *= freqs
+        del freqs
+        return sp_fft.irfft(fft, n=samples, overwrite_x=True)
+
+def generate_pink_noise(duration, sample_rate, amplitude=0.1, dtype="float64", noise=None):
     """Generate pink noise (1/f noise)"""
     samples = int(duration * sample_rate)
-    white = np.random.randn(samples)
     
     # Apply 1/f filter using FFT
-    fft = np.fft.rfft(white)
-    freqs = np.fft.rfftfreq(samples, 1/sample_rate)
-    freqs[0] = 1  # Avoid division by zero
-    pink_filter = 1 / np.sqrt(freqs)
-    fft *= pink_filter
-    pink = np.fft.irfft(fft, n=samples)
+    pink = shaped_noise(samples, sample_rate, 0.5, dtype, noise or WhiteNoise())
     
     # Normalize
-    pink = pink / np.max(np.abs(pink)) * amplitude
-    return pink
+    return normalize(pink, amplitude)
 
-def generate_binaural_beat(frequency, carrier=220, duration=DURATION, sample_rate=SAMPLE_RATE):
+def generate_binaural_beat(frequency, carrier=220, duration=DURATION, sample_rate=SAMPLE_RATE, dtype="float64", loop_duration=None, noise=None, out=None):
     """
     Generate binaural beat
     - Left ear: carrier frequency
     - Right ear: carrier + beat frequency
     - Add pink noise at -25dB for fatigue reduction
+    - noise: the track's WhiteNoise stream (default: DEFAULT_SEED)
     """
-    t = np.linspace(0, duration, int(sample_rate * duration))
-    
-    # Generate carrier tones
-    left = np.sin(2 * np.pi * carrier * t)
-    right = np.sin(2 * np.pi * (carrier + frequency) * t)
+    frequency, carrier = loop_frequencies(loop_duration, sample_rate, frequency, carrier)
+    t = sample_times(duration, sample_rate, loop_duration)
+    phase = np.empty_like(t)
     
     # Add pink noise at -25dB (amplitude ~0.056)
-    pink = generate_pink_noise(duration, sample_rate, amplitude=0.056)
-    left += pink
-    right += pink
+    left = generate_pink_noise(duration, sample_rate, amplitude=0.056, dtype=dtype, noise=noise)
+    right = left.copy()
+    
+    # Generate carrier tones
+    add_sine(left, carrier, t, phase)
+    add_sine(right, carrier + frequency, t, phase)
+    del t, phase
     
     # Normalize
-    left = left / np.max(np.abs(left)) * 0.8
-    right = right / np.max(np.abs(right)) * 0.8
+    normalize(left)
+    normalize(right)
     
     # Apply fade
-    left = apply_fade(left, sample_rate, FADE_DURATION)
-    right = apply_fade(right, sample_rate, FADE_DURATION)
+    apply_fade(left, sample_rate, track_fade(loop_duration))
+    apply_fade(right, sample_rate, track_fade(loop_duration))
     
     # Combine to stereo
-    stereo = np.column_stack((left, right))
-    return stereo
+    return to_stereo(left, right, out)
 
-def generate_isochronic_tone(frequency, base_tone=180, duration=DURATION, sample_rate=SAMPLE_RATE):
+def generate_isochronic_tone(frequency, base_tone=180, duration=DURATION, sample_rate=SAMPLE_RATE, dtype="float64", loop_duration=None, duty=0.5, ramp_shape="butterworth", ramp_width=0.1, out=None):
     """
     Generate isochronic tone
-    - Square-wave amplitude modulation
-    - 50% duty cycle
-    - Smoothed envelope to avoid harsh clicks
+    - Pulsed amplitude modulation, 50% duty cycle by default
+    - Smoothed envelope to avoid harsh clicks: by default the Butterworth
+      low-pass (2x the pulse rate) of a square wave; "cosine" or "linear"
+      ramp shapes use edges lasting ramp_width of a period instead
+    - The envelope is periodic, so one period is computed (and cached)
+      and copied rather than filtered over the whole track
     """
-    t = np.linspace(0, duration, int(sample_rate * duration))
+    frequency, base_tone = loop_frequencies(loop_duration, sample_rate, frequency, base_tone)
+    t = sample_times(duration, sample_rate, loop_duration)
+    phase = np.empty_like(t)
     
     # Base carrier tone
-    carrier = np.sin(2 * np.pi * base_tone * t)
-    
-    # Generate square wave for amplitude modulation
-    modulation = signal.square(2 * np.pi * frequency * t, duty=0.5)
-    
-    # Smooth the modulation to avoid clicks (low-pass filter)
-    b, a = signal.butter(4, frequency * 2, btype='low', fs=sample_rate)
-    modulation_smooth = signal.filtfilt(b, a, modulation)
-    
-    # Normalize modulation to 0-1 range
-    modulation_smooth = (modulation_smooth + 1) / 2
+    audio = np.zeros(len(t), dtype=dtype)
+    add_sine(audio, base_tone, t, phase)
+    del t, phase
     
-    # Apply modulation
-    audio = carrier * modulation_smooth
+    # Modulated by an envelope copied from one precomputed period
+    with stage("envelope"):
+        modulation = pulse_envelope(frequency, 0, len(audio), sample_rate, duty, ramp_shape, ramp_width)
+    audio *= modulation
+    del modulation
     
     # Normalize
-    audio = audio / np.max(np.abs(audio)) * 0.8
+    normalize(audio)
     
     # Apply fade
-    audio = apply_fade(audio, sample_rate, FADE_DURATION)
+    apply_fade(audio, sample_rate, track_fade(loop_duration))
     
     # Convert to stereo (mono-compatible)
-    stereo = np.column_stack((audio, audio))
-    return stereo
+    return to_stereo(audio, out=out)
 
-def generate_brown_noise(duration=DURATION, sample_rate=SAMPLE_RATE):
+def frequency_grid(frequencies, carriers):
+    """Every (frequency, carrier) pair of two lists, grouped by carrier"""
+    return [(frequency, carrier) for carrier in carriers for frequency in frequencies]
+
+def generate_binaural_batch(specs, duration=DURATION, sample_rate=SAMPLE_RATE, dtype="float64", loop_duration=None):
+    """
+    Generate many binaural beats, sharing their common intermediates
+    - specs: (frequency, carrier, seed) rows; yields one stereo track per
+      row, each identical to generate_binaural_beat(frequency, carrier)
+      rendered with noise=WhiteNoise(seed)
+    - The time base and fade ramp are built once, the pink bed once per
+      seed, each sine once per frequency, and the finished left channel
+      once per (carrier, seed), since it does not depend on the beat
+    - Tracks are yielded one at a time, so memory grows with the number
+      of distinct carriers and seeds, not with the number of specs
+    """
+    t = sample_times(duration, sample_rate, loop_duration)
+    fade_in = fade_ramp(sample_rate, track_fade(loop_duration), dtype)
+    beds = {}
+    sines = {}
+    lefts = {}
+    
+    def bed(seed):
+        if seed not in beds:
+            noise = WhiteNoise(seed)
+            beds[seed] = generate_pink_noise(duration, sample_rate, amplitude=0.056, dtype=dtype, noise=noise)
+        return beds[seed]
+    
+    def sine(frequency):
+        if frequency not in sines:
+            sines[frequency] = np.sin(t * (2 * np.pi * frequency))
+        return sines[frequency]
+    
+    def channel(seed, frequency):
+        audio = bed(seed).copy()
+        audio += sine(frequency)
+        normalize(audio)
+        return apply_fade(audio, sample_rate, None, fade_in)
+    
+    for frequency, carrier, seed in specs:
+        frequency, carrier = loop_frequencies(loop_duration, sample_rate, frequency, carrier)
+        if (carrier, seed) not in lefts:
+            lefts[carrier, seed] = channel(seed, carrier)
+        # The beat tone is unique to this spec; don't keep it around
+        right = channel(seed, carrier + frequency)
+        sines.pop(carrier + frequency, None)
+        yield to_stereo(lefts[carrier, seed], right)
+
+def generate_isochronic_batch(specs, duration=DURATION, sample_rate=SAMPLE_RATE, dtype="float64", loop_duration=None, duty=0.5, ramp_shape="butterworth", ramp_width=0.1):
+    """
+    Generate many isochronic tones, sharing their common intermediates
+    - specs: (frequency, base_tone) rows; yields one stereo track per row,
+      each identical to generate_isochronic_tone(frequency, base_tone)
+      with the batch's envelope settings
+    - The time base and fade ramp are built once, each base tone once per
+      batch and each envelope once per pulse frequency
+    """
+    t = sample_times(duration, sample_rate, loop_duration)
+    fade_in = fade_ramp(sample_rate, track_fade(loop_duration), dtype)
+    tones = {}
+    envelopes = {}
+    
+    for frequency, base_tone in specs:
+        frequency, base_tone = loop_frequencies(loop_duration, sample_rate, frequency, base_tone)
+        if base_tone not in tones:
+            tones[base_tone] = np.sin(t * (2 * np.pi * base_tone)).astype(dtype, copy=False)
+        if frequency not in envelopes:
+            envelopes[frequency] = pulse_envelope(frequency, 0, len(t), sample_rate, duty, ramp_shape, ramp_width)
+        
+        audio = np.empty(len(t), dtype=dtype)
+        np.multiply(tones[base_tone], envelopes[frequency], out=audio, casting="same_kind")
+        normalize(audio)
+        apply_fade(audio, sample_rate, None, fade_in)
+        yield to_stereo(audio)
+
+def generate_brown_noise(duration=DURATION, sample_rate=SAMPLE_RATE, dtype="float64", loop_duration=None, noise=None, out=None):
     """Generate brown noise (red noise, 1/f^2)"""
     samples = int(duration * sample_rate)
-    white = np.random.randn(samples)
     
     # Apply 1/f^2 filter
-    fft = np.fft.rfft(white)
-    freqs = np.fft.rfftfreq(samples, 1/sample_rate)
-    freqs[0] = 1
-    brown_filter = 1 / freqs
-    fft *= brown_filter
-    brown = np.fft.irfft(fft, n=samples)
+    brown = shaped_noise(samples, sample_rate, 1.0, dtype, noise or WhiteNoise())
     
     # Normalize
-    brown = brown / np.max(np.abs(brown)) * 0.8
-    brown = apply_fade(brown, sample_rate, FADE_DURATION)
+    normalize(brown)
+    apply_fade(brown, sample_rate, track_fade(loop_duration))
     
-    stereo = np.column_stack((brown, brown))
-    return stereo
+    return to_stereo(brown, out=out)
+
+def ocean_swell(noise, total_samples, sample_rate):
+    """
+    Control-rate swell gain for ocean tracks: 0.7 +/- 0.3, moving at 0.5-2 Hz
+    - Zero-phase band-passed noise at CONTROL_RATE, upsampled when applied
+    """
+    sos = design_sos(4, (0.5, 2), 'band', sample_rate / control_factor(sample_rate))
+    swell = control_noise(sos, noise, total_samples, sample_rate)
+    normalize(swell, 0.3)
+    swell += 0.7
+    return swell
 
-def generate_ocean_noise(duration=DURATION, sample_rate=SAMPLE_RATE):
+def wind_gusts(total_samples, sample_rate):
+    """Control-rate gust gain for wind tracks: a 0.1 Hz swing between 0 and 1"""
+    t = control_times(total_samples, sample_rate)
+    return 0.5 + 0.5 * np.sin(2 * np.pi * 0.1 * t)
+
+def rain_blocks(total_samples, sample_rate, noise, block_size=BLOCK_SIZE):
+    """
+    Raw mono rain: high-passed hiss (2 kHz) plus 0.3 of low-passed rumble (200 Hz)
+    - Each filter's sections run twice in one causal pass, matching the
+      magnitude response the tracks used to get from filtfilt
+    """
+    hiss = sos_blocks(design_sos(4, 2000, 'high', sample_rate, passes=2), noise.child(0), total_samples, block_size)
+    rumble = sos_blocks(design_sos(2, 200, 'low', sample_rate, passes=2), noise.child(1), total_samples, block_size)
+    for block, low in zip(hiss, rumble):
+        low *= 0.3
+        block += low
+        yield block
+
+def wind_blocks(total_samples, sample_rate, noise, block_size=BLOCK_SIZE):
+    """Raw mono wind: 200-2000 Hz band-passed noise under the gust curve"""
+    bands = sos_blocks(design_sos(4, (200, 2000), 'band', sample_rate, passes=2), noise, total_samples, block_size)
+    gusts = control_blocks(wind_gusts(total_samples, sample_rate), sample_rate, total_samples, block_size)
+    for block, gain in zip(bands, gusts):
+        block *= gain
+        yield block
+
+def generate_ocean_noise(duration=DURATION, sample_rate=SAMPLE_RATE, dtype="float64", loop_duration=None, noise=None, out=None):
     """Generate ocean-style filtered noise"""
     samples = int(duration * sample_rate)
-    white = np.random.randn(samples)
-    
-    # Low-pass filter for ocean-like sound (0.5-2 Hz modulation)
-    b, a = signal.butter(4, [0.5, 2], btype='band', fs=sample_rate)
-    modulation = signal.filtfilt(b, a, np.random.randn(samples))
-    modulation = (modulation / np.max(np.abs(modulation)) * 0.3) + 0.7
+    noise = noise or WhiteNoise()
     
     # Apply brown noise characteristics
-    fft = np.fft.rfft(white)
-    freqs = np.fft.rfftfreq(samples, 1/sample_rate)
-    freqs[0] = 1
-    ocean_filter = 1 / (freqs ** 0.8)  # Between pink and brown
-    fft *= ocean_filter
-    ocean = np.fft.irfft(fft, n=samples)
+    ocean = shaped_noise(samples, sample_rate, 0.8, dtype, noise.child(0))  # Between pink and brown
     
-    # Apply modulation
-    ocean = ocean * modulation
+    # Slow swell (0.5-2 Hz), computed at the control rate
+    modulate(ocean, ocean_swell(noise.child(1), samples, sample_rate), sample_rate)
     
     # Normalize
-    ocean = ocean / np.max(np.abs(ocean)) * 0.8
-    ocean = apply_fade(ocean, sample_rate, FADE_DURATION)
+    normalize(ocean)
+    apply_fade(ocean, sample_rate, track_fade(loop_duration))
     
-    stereo = np.column_stack((ocean, ocean))
-    return stereo
+    return to_stereo(ocean, out=out)
 
-def generate_rain_noise(duration=DURATION, sample_rate=SAMPLE_RATE):
-    """Generate rain-style filtered noise"""
+def generate_rain_noise(duration=DURATION, sample_rate=SAMPLE_RATE, dtype="float64", loop_duration=None, noise=None, out=None):
+    """Generate rain-style filtered noise (high-passed hiss over low rumble)"""
     samples = int(duration * sample_rate)
-    white = np.random.randn(samples)
-    
-    # High-pass filter for rain-like sound
-    b, a = signal.butter(4, 2000, btype='high', fs=sample_rate)
-    rain = signal.filtfilt(b, a, white)
-    
-    # Add some low-frequency rumble
-    b2, a2 = signal.butter(2, 200, btype='low', fs=sample_rate)
-    rumble = signal.filtfilt(b2, a2, np.random.randn(samples)) * 0.3
-    
-    rain = rain + rumble
+    rain = gather_blocks(rain_blocks(samples, sample_rate, noise or WhiteNoise()), samples, dtype)
     
     # Normalize
-    rain = rain / np.max(np.abs(rain)) * 0.8
-    rain = apply_fade(rain, sample_rate, FADE_DURATION)
+    normalize(rain)
+    apply_fade(rain, sample_rate, track_fade(loop_duration))
     
-    stereo = np.column_stack((rain, rain))
-    return stereo
+    return to_stereo(rain, out=out)
 
-def generate_wind_noise(duration=DURATION, sample_rate=SAMPLE_RATE):
-    """Generate wind-style filtered noise"""
+def generate_wind_noise(duration=DURATION, sample_rate=SAMPLE_RATE, dtype="float64", loop_duration=None, noise=None, out=None):
+    """Generate wind-style filtered noise (200-2000 Hz band with 0.1 Hz gusts)"""
     samples = int(duration * sample_rate)
-    white = np.random.randn(samples)
+    wind = gather_blocks(wind_blocks(samples, sample_rate, noise or WhiteNoise()), samples, dtype)
     
-    # Band-pass filter for wind-like sound (200-2000 Hz)
-    b, a = signal.butter(4, [200, 2000], btype='band', fs=sample_rate)
-    wind = signal.filtfilt(b, a, white)
+    # Normalize
+    normalize(wind)
+    apply_fade(wind, sample_rate, track_fade(loop_duration))
     
-    # Add slow modulation (gusts)
-    t = np.linspace(0, duration, samples)
-    modulation = 0.5 + 0.5 * np.sin(2 * np.pi * 0.1 * t)  # 0.1 Hz modulation
-    wind = wind * modulation
+    return to_stereo(wind, out=out)
+
+def generate_additive_tone(partials, duration=DURATION, sample_rate=SAMPLE_RATE, dtype="float64", loop_duration=None, out=None):
+    """
+    Generate a harmonic tone from a partial table
+    - partials: (frequency, amplitude[, phase]) rows, rendered in one
+      batched pass by the shared additive kernel
+    """
+    partials = loop_partials(partials, loop_duration, sample_rate)
+    with stage("oscillator"):
+        audio = render_partials(partials, int(sample_rate * duration), sample_rate, dtype)
     
     # Normalize
-    wind = wind / np.max(np.abs(wind)) * 0.8
-    wind = apply_fade(wind, sample_rate, FADE_DURATION)
+    normalize(audio)
+    apply_fade(audio, sample_rate, track_fade(loop_duration))
     
-    stereo = np.column_stack((wind, wind))
-    return stereo
+    return to_stereo(audio, out=out)
 
-def generate_om_drone(duration=DURATION, sample_rate=SAMPLE_RATE):
+def loop_partials(partials, loop_duration, sample_rate):
+    """Snap every partial of a table to whole cycles over the loop"""
+    if not loop_duration:
+        return partials
+    freqs = loop_frequencies(loop_duration, sample_rate, *(p[0] for p in partials))
+    return [(f, *p[1:]) for f, p in zip(freqs, partials)]
+
+def generate_om_drone(duration=DURATION, sample_rate=SAMPLE_RATE, dtype="float64", loop_duration=None, out=None):
     """Generate Om-style harmonic drone (136.1 Hz)"""
-    t = np.linspace(0, duration, int(sample_rate * duration))
+    return generate_additive_tone(OM_DRONE_PARTIALS, duration, sample_rate, dtype, loop_duration, out)
+
+def generate_low_harmonic_pad(duration=DURATION, sample_rate=SAMPLE_RATE, dtype="float64", loop_duration=None, out=None):
+    """Generate low harmonic pad (multiple frequencies)"""
+    return generate_additive_tone(LOW_PAD_PARTIALS, duration, sample_rate, dtype, loop_duration, out)
+
+def stream_binaural_beat(frequency, carrier=220, duration=DURATION, sample_rate=SAMPLE_RATE, block_size=BLOCK_SIZE, dtype="float64", loop_duration=None, noise=None, fade_duration=None):
+    """Block-wise version of generate_binaural_beat"""
+    frequency, carrier = loop_frequencies(loop_duration, sample_rate, frequency, carrier)
+    total_samples = int(sample_rate * duration)
+    noise = noise or WhiteNoise()
     
-    # Fundamental frequency (136.1 Hz - "Om" frequency)
-    fundamental = 136.1
+    def raw_blocks():
+        # Noise is addressed by sample index, so both passes get the same bed
+        pink_blocks = colored_noise_blocks(
+            PINK_EXPONENT, total_samples, sample_rate, noise,
+            amplitude=0.056, block_size=block_size,
+        )
+        for (start, stop), pink in zip(block_ranges(total_samples, block_size), pink_blocks):
+            count = stop - start
+            with stage("oscillator"):
+                left = sine_block(carrier, start, count, sample_rate) + pink
+                right = sine_block(carrier + frequency, start, count, sample_rate) + pink
+            yield np.column_stack((left, right))
     
-    # Generate harmonics
-    audio = np.sin(2 * np.pi * fundamental * t)  # Fundamental
-    audio += 0.5 * np.sin(2 * np.pi * fundamental * 2 * t)  # 2nd harmonic
-    audio += 0.3 * np.sin(2 * np.pi * fundamental * 3 * t)  # 3rd harmonic
-    audio += 0.2 * np.sin(2 * np.pi * fundamental * 4 * t)  # 4th harmonic
-    audio += 0.1 * np.sin(2 * np.pi * fundamental * 5 * t)  # 5th harmonic
+    return normalized_blocks(raw_blocks, total_samples, sample_rate, track_fade(loop_duration, fade_duration), dtype)
+
+def stream_isochronic_tone(frequency, base_tone=180, duration=DURATION, sample_rate=SAMPLE_RATE, block_size=BLOCK_SIZE, dtype="float64", loop_duration=None, duty=0.5, ramp_shape="butterworth", ramp_width=0.1, fade_duration=None):
+    """
+    Block-wise version of generate_isochronic_tone
+    - Uses the same cached envelope period, indexed by absolute sample
+      position, so the envelope is zero-phase like the in-memory render
+    """
+    frequency, base_tone = loop_frequencies(loop_duration, sample_rate, frequency, base_tone)
+    total_samples = int(sample_rate * duration)
     
-    # Normalize
-    audio = audio / np.max(np.abs(audio)) * 0.8
-    audio = apply_fade(audio, sample_rate, FADE_DURATION)
+    def raw_blocks():
+        for start, stop in block_ranges(total_samples, block_size):
+            count = stop - start
+            with stage("oscillator"):
+                carrier = sine_block(base_tone, start, count, sample_rate)
+            with stage("envelope"):
+                modulation = pulse_envelope(frequency, start, count, sample_rate, duty, ramp_shape, ramp_width)
+            audio = carrier * modulation
+            yield np.column_stack((audio, audio))
     
-    stereo = np.column_stack((audio, audio))
-    return stereo
+    return normalized_blocks(raw_blocks, total_samples, sample_rate, track_fade(loop_duration, fade_duration), dtype)
 
-def generate_low_harmonic_pad(duration=DURATION, sample_rate=SAMPLE_RATE):
-    """Generate low harmonic pad (multiple frequencies)"""
-    t = np.linspace(0, duration, int(sample_rate * duration))
+def stream_additive_tone(partials, duration=DURATION, sample_rate=SAMPLE_RATE, block_size=BLOCK_SIZE, dtype="float64", loop_duration=None, fade_duration=None):
+    """Block-wise version of generate_additive_tone"""
+    partials = loop_partials(partials, loop_duration, sample_rate)
+    total_samples = int(sample_rate * duration)
     
-    # Multiple low frequencies for rich pad sound
-    frequencies = [65.4, 98.0, 130.8, 196.0]  # C2, G2, C3, G3
-    audio = np.zeros(len(t))
+    def raw_blocks():
+        return mono_to_stereo(additive_blocks(partials, total_samples, sample_rate, block_size))
     
-    for i, freq in enumerate(frequencies):
-        amplitude = 1.0 / (i + 1)  # Decreasing amplitude
-        audio += amplitude * np.sin(2 * np.pi * freq * t)
+    return normalized_blocks(raw_blocks, total_samples, sample_rate, track_fade(loop_duration, fade_duration), dtype)
+
+def stream_om_drone(duration=DURATION, sample_rate=SAMPLE_RATE, block_size=BLOCK_SIZE, dtype="float64", loop_duration=None, fade_duration=None):
+    """Block-wise version of generate_om_drone"""
+    return stream_additive_tone(OM_DRONE_PARTIALS, duration, sample_rate, block_size, dtype, loop_duration, fade_duration)
+
+def stream_low_harmonic_pad(duration=DURATION, sample_rate=SAMPLE_RATE, block_size=BLOCK_SIZE, dtype="float64", loop_duration=None, fade_duration=None):
+    """Block-wise version of generate_low_harmonic_pad"""
+    return stream_additive_tone(LOW_PAD_PARTIALS, duration, sample_rate, block_size, dtype, loop_duration, fade_duration)
+
+def stream_pink_noise_track(duration=DURATION, sample_rate=SAMPLE_RATE, block_size=BLOCK_SIZE, dtype="float64", loop_duration=None, noise=None, fade_duration=None):
+    """Block-wise version of generate_pink_noise_track"""
+    total_samples = int(sample_rate * duration)
+    pink = colored_noise_blocks(PINK_EXPONENT, total_samples, sample_rate, noise or WhiteNoise(), 0.8, block_size)
+    return faded_blocks(mono_to_stereo(pink), total_samples, sample_rate, track_fade(loop_duration, fade_duration), dtype)
+
+def stream_brown_noise(duration=DURATION, sample_rate=SAMPLE_RATE, block_size=BLOCK_SIZE, dtype="float64", loop_duration=None, noise=None, fade_duration=None):
+    """Block-wise version of generate_brown_noise"""
+    total_samples = int(sample_rate * duration)
+    brown = colored_noise_blocks(BROWN_EXPONENT, total_samples, sample_rate, noise or WhiteNoise(), 0.8, block_size)
+    return faded_blocks(mono_to_stereo(brown), total_samples, sample_rate, track_fade(loop_duration, fade_duration), dtype)
+
+def stream_ocean_noise(duration=DURATION, sample_rate=SAMPLE_RATE, block_size=BLOCK_SIZE, dtype="float64", loop_duration=None, noise=None, fade_duration=None):
+    """Block-wise version of generate_ocean_noise (same noise sources and swell)"""
+    total_samples = int(sample_rate * duration)
+    noise = noise or WhiteNoise()
     
-    # Normalize
-    audio = audio / np.max(np.abs(audio)) * 0.8
-    audio = apply_fade(audio, sample_rate, FADE_DURATION)
+    swell = control_blocks(ocean_swell(noise.child(1), total_samples, sample_rate), sample_rate, total_samples, block_size)
+    ocean = colored_noise_blocks(OCEAN_EXPONENT, total_samples, sample_rate, noise.child(0), 0.8, block_size)
+    
+    def modulated():
+        for block, modulation in zip(ocean, swell):
+            block *= modulation
+            yield block
     
-    stereo = np.column_stack((audio, audio))
-    return stereo
+    return faded_blocks(mono_to_stereo(modulated()), total_samples, sample_rate, track_fade(loop_duration, fade_duration), dtype)
+
+def stream_rain_noise(duration=DURATION, sample_rate=SAMPLE_RATE, block_size=BLOCK_SIZE, dtype="float64", loop_duration=None, noise=None, fade_duration=None):
+    """Block-wise version of generate_rain_noise"""
+    total_samples = int(sample_rate * duration)
+    noise = noise or WhiteNoise()
+    
+    def raw_blocks():
+        return mono_to_stereo(rain_blocks(total_samples, sample_rate, noise, block_size))
+    
+    return normalized_blocks(raw_blocks, total_samples, sample_rate, track_fade(loop_duration, fade_duration), dtype)
+
+def stream_wind_noise(duration=DURATION, sample_rate=SAMPLE_RATE, block_size=BLOCK_SIZE, dtype="float64", loop_duration=None, noise=None, fade_duration=None):
+    """Block-wise version of generate_wind_noise"""
+    total_samples = int(sample_rate * duration)
+    noise = noise or WhiteNoise()
+    
+    def raw_blocks():
+        return mono_to_stereo(wind_blocks(total_samples, sample_rate, noise, block_size))
+    
+    return normalized_blocks(raw_blocks, total_samples, sample_rate, track_fade(loop_duration, fade_duration), dtype)
+
+# Noise tracks get an equal-power loop crossfade; everything else is periodic
+LOOP_NOISE_GENERATORS = {
+    "generate_pink_noise_track",
+    "generate_brown_noise",
+    "generate_ocean_noise",
+    "generate_rain_noise",
+    "generate_wind_noise",
+}
+
+# Modules whose code shapes rendered output besides the generator itself:
+# fades, noise, filters, envelopes, quantisation, encoding and metering
+RENDER_MODULES = ("audio_stream", "colored_noise", "modulation", "encode_audio", "loudness")
+
+# Block-wise equivalents used by --stream
+STREAM_GENERATORS = {
+    "generate_binaural_beat": "stream_binaural_beat",
+    "generate_pink_noise_track": "stream_pink_noise_track",
+    "generate_brown_noise": "stream_brown_noise",
+    "generate_ocean_noise": "stream_ocean_noise",
+    "generate_rain_noise": "stream_rain_noise",
+    "generate_wind_noise": "stream_wind_noise",
+    "generate_isochronic_tone": "stream_isochronic_tone",
+    "generate_additive_tone": "stream_additive_tone",
+    "generate_om_drone": "stream_om_drone",
+    "generate_low_harmonic_pad": "stream_low_harmonic_pad",
+}
 
 def save_audio(audio, filename, sample_rate=SAMPLE_RATE):
     """Save audio to WAV file"""
     # Convert to 16-bit PCM
-    audio_int = np.int16(audio * 32767)
-    wavfile.write(filename, sample_rate, audio_int)
+    with stage("quantize"):
+        audio_int = quantize(audio)
+    with stage("write"), atomic_output(filename) as tmp_path:
+        wavfile.write(tmp_path, sample_rate, audio_int)
     print(f"Generated: {filename}")
 
-def main():
-    """Generate all 21 audio tracks"""
-    output_dir = "../assets/audio"
-    os.makedirs(output_dir, exist_ok=True)
+def generate_pink_noise_track(duration=DURATION, sample_rate=SAMPLE_RATE, dtype="float64", loop_duration=None, noise=None, out=None):
+    """Generate standalone pink noise track"""
+    pink = generate_pink_noise(duration, sample_rate, amplitude=0.8, dtype=dtype, noise=noise)
+    apply_fade(pink, sample_rate, track_fade(loop_duration))
     
-    print("Generating 21 Harmonia audio tracks...")
-    print("=" * 50)
+    return to_stereo(pink, out=out)
+
+def build_jobs(duration=DURATION, dtype="float64", loop=False, envelope=None):
+    """
+    Describe every catalogue track as an independent render job
+    - Each job is (track name, generator function name, generator kwargs)
+    - Jobs share no state, so they can run in any order or process
+    - With loop=True every track is rendered as a seamless loop of duration
+    - envelope: extra isochronic kwargs (duty, ramp_shape, ramp_width)
+    """
+    jobs = []
     
     # 1. Binaural Beats (7 tracks)
-    print("\n1. Generating Binaural Beats...")
-    binaural_freqs = [
-        (2, "delta-2hz"),
-        (3, "delta-3hz"),
-        (4, "theta-4hz"),
-        (6, "theta-6hz"),
-        (8, "alpha-8hz"),
-        (10, "alpha-10hz"),
-        (14, "beta-14hz"),
+    for freq, name in BINAURAL_TRACKS:
+        jobs.append((f"{name}-binaural", "generate_binaural_beat", {"frequency": freq}))
+    
+    # 2. Isochronic Tones (7 tracks)
+    for freq in ISOCHRONIC_FREQS:
+        jobs.append((f"{freq}hz-isochronic", "generate_isochronic_tone", {"frequency": freq, **(envelope or {})}))
+    
+    # 3. Ambient/Harmonic Sounds (7 tracks)
+    jobs.append(("om-drone", "generate_om_drone", {}))
+    jobs.append(("low-harmonic-pad", "generate_low_harmonic_pad", {}))
+    jobs.append(("brown-noise", "generate_brown_noise", {}))
+    jobs.append(("pink-noise", "generate_pink_noise_track", {}))
+    jobs.append(("ocean-waves", "generate_ocean_noise", {}))
+    jobs.append(("rain", "generate_rain_noise", {}))
+    jobs.append(("wind", "generate_wind_noise", {}))
+    
+    for _, _, params in jobs:
+        params["duration"] = duration
+        params["dtype"] = dtype
+        if loop:
+            # Render a crossfade's worth extra; render_track wraps it round.
+            # Short loops get a shorter crossfade so it never overlaps itself
+            params["duration"] = duration + min(LOOP_CROSSFADE, duration / 2)
+            params["loop_duration"] = duration
+    return jobs
+
+def track_seed(name, seed=DEFAULT_SEED):
+    """Derive a stable SeedSequence entropy for a track from the base seed and its name"""
+    return (seed, zlib.crc32(name.encode("utf-8")))
+
+def job_kwargs(job, stream=False, seed=DEFAULT_SEED, fade_duration=None):
+    """
+    Generator kwargs for a job, plus the track's noise stream for noise generators
+    - fade_duration overrides the track fade (block-wise generators only);
+      0 renders the track without any fade
+    """
+    name, _, params = job
+    func = globals()[job_generator(job, stream)]
+    parameters = inspect.signature(func).parameters
+    kwargs = dict(params)
+    if "noise" in parameters:
+        kwargs["noise"] = WhiteNoise(track_seed(name, seed))
+    if fade_duration is not None:
+        if "fade_duration" not in parameters:
+            raise ValueError(f"{func.__name__} has no fade override")
+        kwargs["fade_duration"] = fade_duration
+    return kwargs
+
+def track_path(output_dir, name, fmt="wav"):
+    """Output file path for a track in the given output format"""
+    ext = ".wav" if fmt == "wav" else ENCODE_PROFILES[fmt]["ext"]
+    return f"{output_dir}/{name}{ext}"
+
+def write_blocks(blocks, filename, fmt="wav", sample_rate=SAMPLE_RATE, channels=2):
+    """
+    Write a block stream as WAV or pipe it straight into an encoder
+    - filename only appears once the stream and the encoder both finished
+    """
+    with stage("write"), atomic_output(filename) as tmp_path:
+        if fmt == "wav":
+            writer = WavStreamWriter(tmp_path, sample_rate, channels)
+        else:
+            writer = open_encoder(fmt, tmp_path, sample_rate, channels)
+        with writer:
+            for block in blocks:
+                writer.write(block)
+    print(f"Generated: {filename}")
+
+def loudness_gain(name, blocks, target_lufs, sample_rate=SAMPLE_RATE):
+    """
+    Measure a rendered track and return the gain that brings it to target_lufs
+    - The gain is capped so the true peak stays under TRUE_PEAK_CEILING
+    """
+    with stage("loudness"):
+        report = measure_loudness(blocks, sample_rate)
+    gain, limited = normalization_gain(report, target_lufs)
+    if limited:
+        reached = report["integrated_lufs"] + 20 * np.log10(gain)
+        print(f"Loudness: {name} limited to {reached:.1f} LUFS by the {TRUE_PEAK_CEILING:g} dBTP ceiling")
+    return gain
+
+def scaled_blocks(blocks, gain):
+    """Apply a constant gain to a block stream in place"""
+    for block in blocks:
+        block *= gain
+        yield block
+
+def loop_render(job, blocks):
+    """
+    Wrap a loop job's render (LOOP_CROSSFADE longer than the loop) into a
+    seamless loop; other jobs pass through untouched
+    - Tonal tracks are already periodic over the loop, so a linear
+      crossfade is exact there and only settles filter start-up transients
+    - Noise tracks get an equal-power crossfade to hold their level
+    """
+    _, generator, params = job
+    loop_duration = params.get("loop_duration")
+    if not loop_duration:
+        return blocks
+    sample_rate = params.get("sample_rate", SAMPLE_RATE)
+    loop_samples = int(sample_rate * loop_duration)
+    crossfade_samples = int(sample_rate * params["duration"]) - loop_samples
+    shape = "equal-power" if generator in LOOP_NOISE_GENERATORS else "linear"
+    return looped_blocks(blocks, loop_samples, crossfade_samples, shape)
+
+def job_generator(job, stream=False):
+    """Name of the generator function that renders a job"""
+    _, generator, _ = job
+    if stream and generator in STREAM_GENERATORS:
+        return STREAM_GENERATORS[generator]
+    return generator
+
+def render_sources():
+    """Source files whose edits can change any render: this script and RENDER_MODULES"""
+    return [os.path.abspath(__file__), *(sys.modules[name].__file__ for name in RENDER_MODULES)]
+
+def job_cache_key(job, stream=False, fmt="wav", target_lufs=None, seed=DEFAULT_SEED):
+    """
+    Render cache key for a job
+    - Covers the generator name, every parameter including defaults
+      (frequency, carrier, duration, sample rate, ...), the fade length,
+      the track seed, the output encoding, the loudness target, the
+      generator's source code and the source of every helper module
+    """
+    name, _, params = job
+    generator = job_generator(job, stream)
+    func = globals()[generator]
+    bound = inspect.signature(func).bind(**params)
+    bound.apply_defaults()
+    return render_key(
+        generator, dict(bound.arguments), inspect.getsource(func),
+        fade_duration=FADE_DURATION, seed=track_seed(name, seed),
+        encoding=ENCODE_PROFILES.get(fmt, fmt),
+        target_lufs=target_lufs, true_peak_ceiling=TRUE_PEAK_CEILING,
+        helpers=files_hash(render_sources()),
+    )
+
+def render_track(job, output_dir, stream=False, fmt="wav", target_lufs=None, seed=DEFAULT_SEED):
+    """
+    Render and save a single track job
+    - Noise comes from the track's own seeded stream, so output does not
+      depend on job order, worker count or block size
+    - With stream=True, tracks that have a block-wise generator are
+      written incrementally instead of being built in memory
+    - Non-WAV formats are encoded on the fly, with no intermediate WAV
+    - With target_lufs, the track is metered (BS.1770) and rescaled to the
+      target; streamed tracks are re-rendered after a metering pass
+    - Loop jobs are wrapped into seamless loops before metering and writing
+    - Other in-memory WAV renders quantise straight into a preallocated
+      memory-mapped output file, so no float stereo or int16 copy of the
+      track is made
+    - Returns (track name, elapsed seconds)
+    """
+    name, _, params = job
+    generator = job_generator(job, stream)
+    filename = track_path(output_dir, name, fmt)
+    sample_rate = params.get("sample_rate", SAMPLE_RATE)
+    start = time.perf_counter()
+    
+    kwargs = job_kwargs(job, stream, seed)
+    if generator in STREAM_GENERATORS.values():
+        def render():
+            with stage("synthesis"):
+                blocks = globals()[generator](**kwargs)
+            return loop_render(job, blocks)
+        
+        blocks = render()
+        if target_lufs is not None:
+            gain = loudness_gain(name, blocks, target_lufs, sample_rate)
+            blocks = scaled_blocks(render(), gain)
+        write_blocks(blocks, filename, fmt, sample_rate)
+    elif fmt == "wav" and target_lufs is None and not params.get("loop_duration"):
+        frames = int(sample_rate * params.get("duration", DURATION))
+        # The preallocated file reads as valid silence until the render fills it
+        with atomic_output(filename) as tmp_path:
+            with WavMemmapWriter(tmp_path, sample_rate, frames) as writer, stage("synthesis"):
+                globals()[generator](**kwargs, out=writer.frames)
+        print(f"Generated: {filename}")
+    else:
+        with stage("synthesis"):
+            audio = globals()[generator](**kwargs)
+        if params.get("loop_duration"):
+            with stage("loop"):
+                audio = np.concatenate(list(loop_render(job, [audio])))
+        if target_lufs is not None:
+            audio *= loudness_gain(name, [audio], target_lufs, sample_rate)
+        write_audio(audio, filename, fmt, sample_rate)
+    
+    return name, time.perf_counter() - start
+
+def write_audio(audio, filename, fmt="wav", sample_rate=SAMPLE_RATE):
+    """Write an in-memory track as WAV or encode it block by block"""
+    if fmt == "wav":
+        save_audio(audio, filename, sample_rate)
+    else:
+        blocks = (audio[i:i + BLOCK_SIZE] for i in range(0, len(audio), BLOCK_SIZE))
+        write_blocks(blocks, filename, fmt, sample_rate)
+
+def render_bundle(job, output_dir, stream=False, fmt="wav", target_lufs=None, seed=DEFAULT_SEED, full_duration=DURATION):
+    """
+    Render a loop job as a bundle: a short seamless loop plus a JSON recipe
+    - The loop is only a few seconds long, so it is rendered in memory
+    - Dual-mono tracks are stored as mono loops
+    - The recipe records the full duration and fade for audio_bundle's expander
+    - Returns (track name, elapsed seconds)
+    """
+    name, _, params = job
+    generator = job_generator(job, stream)
+    sample_rate = params.get("sample_rate", SAMPLE_RATE)
+    start = time.perf_counter()
+    
+    rendered = globals()[generator](**job_kwargs(job, stream, seed))
+    blocks = [rendered] if isinstance(rendered, np.ndarray) else rendered
+    audio = np.concatenate(list(loop_render(job, blocks)))
+    if target_lufs is not None:
+        audio *= loudness_gain(name, [audio], target_lufs, sample_rate)
+    channels = 1 if np.array_equal(audio[:, 0], audio[:, 1]) else 2
+    audio = audio[:, :channels]
+    
+    ext = ".wav" if fmt == "wav" else ENCODE_PROFILES[fmt]["ext"]
+    loop_file = loop_path(output_dir, name, ext)
+    write_blocks([audio], loop_file, fmt, sample_rate, channels)
+    write_recipe(
+        recipe_path(output_dir, name), name, generator, params, track_seed(name, seed),
+        loop_file, fmt, len(audio), channels, sample_rate, full_duration,
+        FADE_DURATION, target_lufs,
+    )
+    
+    return name, time.perf_counter() - start
+
+def build_grid_batches(frequencies, carriers, base_tones, duration=DURATION, dtype="float64", loop=False, workers=1, envelope=None, seed=DEFAULT_SEED):
+    """
+    Describe a frequency grid as batch jobs for the batch generators
+    - Each batch is (generator function name, generator kwargs, track names);
+      the kwargs hold the batch's specs
+    - Binaural tracks cover frequencies x carriers and share one pink bed
+      (one seed for the whole grid); isochronic tracks cover
+      frequencies x base_tones
+    - Each grid is split into up to workers contiguous batches, so a
+      process pool still shares intermediates within every batch
+    - envelope: extra isochronic kwargs (duty, ramp_shape, ramp_width)
+    """
+    seed = track_seed("binaural-grid", seed)
+    grids = [
+        ("generate_binaural_batch", "binaural",
+         [(f, c, seed) for f, c in frequency_grid(frequencies, carriers)]),
+        ("generate_isochronic_batch", "isochronic", frequency_grid(frequencies, base_tones)),
     ]
     
-    for freq, name in binaural_freqs:
-        audio = generate_binaural_beat(freq)
-        save_audio(audio, f"{output_dir}/{name}-binaural.wav", SAMPLE_RATE)
+    batches = []
+    for generator, kind, specs in grids:
+        for part in np.array_split(np.arange(len(specs)), min(max(workers, 1), len(specs))):
+            part_specs = [specs[i] for i in part]
+            names = [f"grid-{spec[0]:g}hz-{spec[1]:g}hz-{kind}" for spec in part_specs]
+            params = {"specs": part_specs, "duration": duration, "dtype": dtype}
+            if kind == "isochronic":
+                params.update(envelope or {})
+            if loop:
+                params["duration"] = duration + min(LOOP_CROSSFADE, duration / 2)
+                params["loop_duration"] = duration
+            batches.append((generator, params, names))
+    return batches
+
+def render_batch(batch, output_dir, fmt="wav", target_lufs=None):
+    """
+    Render and save every track of a batch job
+    - Tracks are written as the batch generator yields them, one at a time
+    - Returns [(track name, elapsed seconds)], timing each track from the
+      end of the previous one, so shared setup is billed to the first
+    """
+    generator, params, names = batch
+    sample_rate = params.get("sample_rate", SAMPLE_RATE)
+    timings = []
+    start = time.perf_counter()
     
-    # 2. Isochronic Tones (7 tracks)
-    print("\n2. Generating Isochronic Tones...")
-    isochronic_freqs = [4, 6, 8, 10, 12, 16, 20]
+    for name, audio in zip(names, globals()[generator](**params)):
+        if params.get("loop_duration"):
+            audio = np.concatenate(list(loop_render((name, generator, params), [audio])))
+        if target_lufs is not None:
+            audio *= loudness_gain(name, [audio], target_lufs, sample_rate)
+        write_audio(audio, track_path(output_dir, name, fmt), fmt, sample_rate)
+        now = time.perf_counter()
+        timings.append((name, now - start))
+        start = now
     
-    for freq in isochronic_freqs:
-        audio = generate_isochronic_tone(freq)
-        save_audio(audio, f"{output_dir}/{freq}hz-isochronic.wav", SAMPLE_RATE)
+    return timings
+
+def run_batches(batches, output_dir, workers=1, fmt="wav", target_lufs=None):
+    """
+    Run batch jobs serially or across a process pool
+    - Batches bypass the render cache; grids are cheap to regenerate
+    - Returns {track name: elapsed seconds} in batch order
+    """
+    timings = {}
+    if workers <= 1:
+        for batch in batches:
+            timings.update(render_batch(batch, output_dir, fmt, target_lufs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(render_batch, batch, output_dir, fmt, target_lufs) for batch in batches]
+            for future in as_completed(futures):
+                timings.update(future.result())
+    return {name: timings[name] for _, _, names in batches for name in names}
+
+def parse_values(text):
+    """
+    Parse a comma-separated list of numbers and start:stop:step ranges
+    (stop inclusive), e.g. "1,2.5,4:12:2" -> [1, 2.5, 4, 6, 8, 10, 12]
+    """
+    values = []
+    for item in text.split(","):
+        if ":" in item:
+            start, stop, step = (float(part) for part in item.split(":"))
+            count = int(round((stop - start) / step)) + 1
+            values.extend(start + step * np.arange(count))
+        else:
+            values.append(float(item))
+    return [float(value) for value in values]
+
+def profile_job(render, job, *args):
+    """Run render(job, *args) under a Profile named after the track; returns ((name, elapsed), report)"""
+    return profiled(render, job[0], job, *args)
+
+def run_jobs(jobs, output_dir, workers=1, stream=False, cache=None, force=False, fmt="wav", target_lufs=None, bundle_duration=None, seed=DEFAULT_SEED, profiles=None):
+    """
+    Run render jobs serially or across a process pool
+    - Each worker drives its own encoder, so --jobs N also encodes N
+      tracks concurrently
+    - With a RenderCache, jobs whose key is already cached are restored
+      instead of rendered (unless force=True) and new renders are stored
+    - With bundle_duration, loop jobs are written as bundles describing a
+      track of that length (bundles are small and bypass the cache)
+    - With a profiles dict, each rendered track runs under render_profile
+      and its per-stage report is stored there by track name (cache hits
+      are not rendered, so they have no report)
+    - Returns {track name: elapsed seconds, or None for cache hits} in job order
+    """
+    timings = {}
+    keys = {}
+    pending = []
+    for job in jobs:
+        name = job[0]
+        filename = track_path(output_dir, name, fmt)
+        if cache is not None:
+            key = keys[name] = job_cache_key(job, stream, fmt, target_lufs, seed)
+            if not force and cache.lookup(key):
+                cache.restore(key, filename)
+                print(f"Cached: {filename}")
+                timings[name] = None
+                continue
+        # Outputs may be hard links into the cache; never overwrite in place
+        if not bundle_duration and os.path.exists(filename):
+            os.remove(filename)
+        pending.append(job)
     
-    # 3. Ambient/Harmonic Sounds (7 tracks)
-    print("\n3. Generating Ambient/Harmonic Sounds...")
+    def finished(result):
+        if profiles is not None:
+            result, report = result
+            profiles[result[0]] = report
+        name, elapsed = result
+        timings[name] = elapsed
+        if cache is not None:
+            cache.store(keys[name], name, track_path(output_dir, name, fmt))
     
-    # Om drone
-    audio = generate_om_drone()
-    save_audio(audio, f"{output_dir}/om-drone.wav", SAMPLE_RATE)
+    render = partial(render_bundle, full_duration=bundle_duration) if bundle_duration else render_track
+    if profiles is not None:
+        render = partial(profile_job, render)
+    try:
+        if workers <= 1:
+            for job in pending:
+                finished(render(job, output_dir, stream, fmt, target_lufs, seed))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(render, job, output_dir, stream, fmt, target_lufs, seed) for job in pending]
+                for future in as_completed(futures):
+                    finished(future.result())
+    finally:
+        # Keep whatever finished even if a later track failed
+        if cache is not None:
+            for track in cache.evict():
+                print(f"Evicted from cache: {track}")
+            cache.save()
     
-    # Low harmonic pad
-    audio = generate_low_harmonic_pad()
-    save_audio(audio, f"{output_dir}/low-harmonic-pad.wav", SAMPLE_RATE)
+    return {name: timings[name] for name, _, _ in jobs}
+
+def print_timings(timings, wall_time):
+    """Print per-track render times"""
+    print("\nPer-track timing:")
+    width = max(len(name) for name in timings)
+    for name, elapsed in timings.items():
+        if elapsed is None:
+            print(f"  {name:<{width}}   cached")
+        else:
+            print(f"  {name:<{width}}  {elapsed:7.2f}s")
+    rendered = [elapsed for elapsed in timings.values() if elapsed is not None]
+    print(f"  {'total (cpu)':<{width}}  {sum(rendered):7.2f}s")
+    print(f"  {'total (wall)':<{width}}  {wall_time:7.2f}s")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Harmonia audio tracks")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="number of tracks to render in parallel (0 = one per CPU core)",
+    )
+    parser.add_argument(
+        "-o", "--output-dir", default=OUTPUT_DIR,
+        help=f"directory for rendered tracks (default: {OUTPUT_DIR})",
+    )
+    parser.add_argument(
+        "-d", "--duration", type=float, default=DURATION,
+        help=f"track length in seconds (default: {DURATION})",
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="render block-by-block where supported so memory stays flat for long tracks",
+    )
+    parser.add_argument(
+        "-f", "--format", choices=OUTPUT_FORMATS, default="wav",
+        help="output format; encoder profiles pipe PCM straight into ffmpeg/lame",
+    )
+    parser.add_argument(
+        "--dtype", choices=["float64", "float32"], default="float64",
+        help="sample precision used during synthesis (float32 halves memory)",
+    )
+    parser.add_argument(
+        "--loop", action="store_true",
+        help="render seamless loops of --duration seconds (no fades, whole-cycle "
+             "tonal frequencies, wrap-around crossfade)",
+    )
+    parser.add_argument(
+        "--bundle", action="store_true",
+        help="emit a recipe + short seamless loop per track instead of full-length audio "
+             "(expand with expand-audio.py)",
+    )
+    parser.add_argument(
+        "--loop-seconds", type=float, default=BUNDLE_LOOP_SECONDS,
+        help=f"loop length stored in --bundle mode (default: {BUNDLE_LOOP_SECONDS})",
+    )
+    parser.add_argument(
+        "--grid", metavar="FREQS", type=parse_values,
+        help="instead of the catalogue, batch-render binaural and isochronic tracks for "
+             "these beat/pulse frequencies, e.g. 1:40:0.5 or 2,4,8 (in memory; ignores --stream)",
+    )
+    parser.add_argument(
+        "--carriers", type=parse_values, default=[220.0],
+        help="binaural carrier frequencies for --grid (default: 220)",
+    )
+    parser.add_argument(
+        "--base-tones", type=parse_values, default=[180.0],
+        help="isochronic base tones for --grid (default: 180)",
+    )
+    parser.add_argument(
+        "--duty", type=float, default=0.5,
+        help="isochronic pulse duty cycle (default: 0.5)",
+    )
+    parser.add_argument(
+        "--ramp-shape", choices=ENVELOPE_SHAPES, default="butterworth",
+        help="isochronic pulse edges: low-passed square wave, or cosine/linear ramps "
+             "(default: butterworth)",
+    )
+    parser.add_argument(
+        "--ramp-width", type=float, default=0.1,
+        help="cosine/linear ramp length as a fraction of the pulse period (default: 0.1)",
+    )
+    parser.add_argument(
+        "--target-lufs", type=float, default=None,
+        help=f"normalise every track to this integrated loudness, e.g. -20 "
+             f"(true peak capped at {TRUE_PEAK_CEILING:g} dBTP; default: peak normalisation only)",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=DEFAULT_SEED,
+        help=f"base noise seed; each track mixes in its own name, so renders are "
+             f"reproducible and independent of --jobs/--stream (default: {DEFAULT_SEED})",
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="re-render every track even if an up-to-date render is cached",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="bypass the render cache entirely",
+    )
+    parser.add_argument(
+        "--cache-dir", default=CACHE_DIR,
+        help=f"render cache directory (default: {CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--cache-size-mb", type=int, default=CACHE_SIZE_MB,
+        help=f"evict least recently used renders beyond this size (default: {CACHE_SIZE_MB})",
+    )
+    parser.add_argument(
+        "--publish", metavar="DIR",
+        help="after rendering, publish the tracks to DIR as content-addressed objects with a "
+             "versioned manifest.json for on-demand download (see publish-assets.py; not with --bundle)",
+    )
+    parser.add_argument(
+        "--profile", metavar="PATH", nargs="?", const=PROFILE_FILE,
+        help=f"time each pipeline stage (synthesis, filtering, normalisation, encoding...) with "
+             f"allocation and RSS peaks per track, and write the report as JSON (default: {PROFILE_FILE}; "
+             f"cached tracks are not re-rendered, combine with --force to profile them)",
+    )
+    parser.add_argument(
+        "--flamegraph", metavar="PATH",
+        help="also write the profile as folded stacks for flamegraph.pl/inferno/speedscope "
+             "(implies --profile)",
+    )
+    args = parser.parse_args(argv)
+    if args.publish and args.bundle:
+        parser.error("--publish cannot be combined with --bundle (bundles are recipes, not playable tracks)")
+    return args
+
+def publish_tracks(names, output_dir, fmt, publish_dir):
+    """Publish rendered tracks from output_dir to publish_dir and report the manifest revision"""
+    assets = {name: track_path(output_dir, name, fmt) for name in names}
+    manifest, changed = publish(assets, publish_dir)
+    print(f"Published to {publish_dir} (manifest revision {manifest['revision']}, "
+          f"{len(changed)} track(s) changed)")
+
+def print_profile(reports, limit=8):
+    """Print the stages that took the most self time over all tracks"""
+    totals = stage_totals(reports)
+    if not totals:
+        return
+    print("\nSlowest stages (self time, all tracks):")
+    width = max(len(name) for name, _ in totals[:limit])
+    for name, seconds in totals[:limit]:
+        print(f"  {name:<{width}} {seconds:7.2f}s")
+    peak = max(report["peak_rss_mb"] for report in reports)
+    print(f"  peak RSS {peak:.0f} MB")
+
+def main(argv=None):
+    """Generate all 21 audio tracks"""
+    args = parse_args(argv)
+    output_dir = args.output_dir
+    os.makedirs(output_dir, exist_ok=True)
     
-    # Brown noise
-    audio = generate_brown_noise()
-    save_audio(audio, f"{output_dir}/brown-noise.wav", SAMPLE_RATE)
+    workers = args.jobs if args.jobs > 0 else os.cpu_count()
+    envelope = {"duty": args.duty, "ramp_shape": args.ramp_shape, "ramp_width": args.ramp_width}
+    if args.grid:
+        batches = build_grid_batches(
+            args.grid, args.carriers, args.base_tones, args.duration, args.dtype, args.loop, workers, envelope,
+            args.seed,
+        )
+        count = sum(len(names) for _, _, names in batches)
+        print(f"Generating {count} Harmonia grid tracks in {len(batches)} batch(es) ({workers} worker(s))...")
+        print("=" * 50)
+        start = time.perf_counter()
+        timings = run_batches(batches, output_dir, workers, args.format, args.target_lufs)
+        print_timings(timings, time.perf_counter() - start)
+        if args.publish:
+            publish_tracks([name for _, _, names in batches for name in names], output_dir, args.format, args.publish)
+        print(f"\n✅ All {count} grid tracks generated in {output_dir}")
+        return
     
-    # Pink noise
-    pink = generate_pink_noise(DURATION, SAMPLE_RATE, amplitude=0.8)
-    pink = apply_fade(pink, SAMPLE_RATE, FADE_DURATION)
-    stereo = np.column_stack((pink, pink))
-    save_audio(stereo, f"{output_dir}/pink-noise.wav", SAMPLE_RATE)
+    cache = None
+    if args.bundle:
+        # Bundles describe --duration tracks but store a --loop-seconds loop
+        jobs = build_jobs(args.loop_seconds, args.dtype, loop=True, envelope=envelope)
+        bundle_duration = args.duration
+    else:
+        jobs = build_jobs(args.duration, args.dtype, args.loop, envelope)
+        bundle_duration = None
+        if not args.no_cache:
+            cache = RenderCache(args.cache_dir, args.cache_size_mb * 1024 * 1024)
     
-    # Ocean noise
-    audio = generate_ocean_noise()
-    save_audio(audio, f"{output_dir}/ocean-waves.wav", SAMPLE_RATE)
+    kind = "bundles" if args.bundle else "tracks"
+    print(f"Generating {len(jobs)} Harmonia audio {kind} ({workers} worker(s))...")
+    print("=" * 50)
     
-    # Rain noise
-    audio = generate_rain_noise()
-    save_audio(audio, f"{output_dir}/rain.wav", SAMPLE_RATE)
+    profile_path = args.profile or (PROFILE_FILE if args.flamegraph else None)
+    profiles = {} if profile_path else None
+    start = time.perf_counter()
+    timings = run_jobs(
+        jobs, output_dir, workers, args.stream, cache, args.force, args.format,
+        args.target_lufs, bundle_duration, args.seed, profiles,
+    )
+    wall_time = time.perf_counter() - start
     
-    # Wind noise
-    audio = generate_wind_noise()
-    save_audio(audio, f"{output_dir}/wind.wav", SAMPLE_RATE)
+    print_timings(timings, wall_time)
+    if profiles is not None:
+        reports = [profiles[name] for name, _, _ in jobs if name in profiles]
+        print_profile(reports)
+        write_profile(profile_path, reports, wall_time)
+        print(f"Profile: {profile_path}")
+        if args.flamegraph:
+            write_folded(args.flamegraph, reports)
+            print(f"Folded stacks: {args.flamegraph}")
+    if args.publish:
+        publish_tracks([name for name, _, _ in jobs], output_dir, args.format, args.publish)
     
     print("\n" + "=" * 50)
-    print("✅ All 21 audio tracks generated successfully!")
+    print(f"✅ All {len(jobs)} audio {kind} up to date!")
     print(f"Output directory: {output_dir}")
-    print("\nNext step: Convert WAV to MP3 for mobile app")
+    if args.format == "wav" and not args.bundle:
+        print("\nNext step: Convert WAV to MP3 for mobile app (or re-run with --format mp3-128)")
 
 if __name__ == "__main__":
     main()
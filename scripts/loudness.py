@@ -0,0 +1,181 @@
+"""
+Harmonia loudness and true-peak meter
+Block-wise ITU-R BS.1770 style measurement for streamed audio:
+- K-weighting (high shelf + RLB high-pass) as a two-section SOS filter
+  whose state is carried across blocks
+- Mean-square energy per 100 ms step, combined into 400 ms gating
+  blocks with 75% overlap, absolute (-70 LUFS) and relative (-10 LU) gates
+- True peak from 4x polyphase oversampling with a carried input history
+- Normalisation gain toward a LUFS target under a true-peak ceiling
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import signal
+
+BLOCK_SECONDS = 0.4  # gating block length
+STEP_SECONDS = 0.1  # gating block hop (75% overlap)
+ABSOLUTE_GATE = -70.0  # LUFS
+RELATIVE_GATE = -10.0  # LU below the absolute-gated loudness
+LOUDNESS_OFFSET = -0.691  # BS.1770 calibration constant
+
+OVERSAMPLE = 4  # true-peak oversampling factor
+TAPS_PER_PHASE = 12  # 48-tap interpolation filter
+TRUE_PEAK_CEILING = -1.0  # dBTP limit when normalising to a LUFS target
+
+def k_weighting(sample_rate):
+    """
+    BS.1770 K-weighting filter for any sample rate, as SOS
+    - Stage 1: +4 dB high shelf around 1.7 kHz (head acoustics)
+    - Stage 2: RLB high-pass around 38 Hz
+    - Below ~3.7 kHz sampling the shelf corner is clamped under Nyquist;
+      readings there are approximate but the filter stays stable
+    """
+    # Stage 1 high shelf, bilinear design that reproduces the 48 kHz table exactly
+    k = np.tan(np.pi * min(1681.974450955533, 0.45 * sample_rate) / sample_rate)
+    q = 0.7071752369554196
+    vh = 10 ** (3.999843853973347 / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = [
+        (vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0,
+        1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0,
+    ]
+
+    # Stage 2 high-pass
+    k = np.tan(np.pi * 38.13547087602444 / sample_rate)
+    q = 0.5003270373238773
+    a0 = 1 + k / q + k * k
+    high = [1.0, -2.0, 1.0, 1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+
+    return np.array([shelf, high])
+
+def oversampling_filter():
+    """Polyphase interpolation FIR for the true-peak meter (unity passband gain)"""
+    return signal.firwin(OVERSAMPLE * TAPS_PER_PHASE, 1 / OVERSAMPLE) * OVERSAMPLE
+
+def to_db(value):
+    """20*log10(value), -inf for silence"""
+    return float(20 * np.log10(value)) if value > 0 else -np.inf
+
+class LoudnessMeter:
+    """
+    Integrated loudness and true peak over a stream of float blocks
+    - Blocks are (frames, channels) or 1-D mono arrays in [-1, 1]
+    - All channels are weighted 1.0 (the catalogue is mono/stereo)
+    - Results do not depend on how the signal is split into blocks
+    """
+
+    def __init__(self, sample_rate, channels=2):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.step = int(round(sample_rate * STEP_SECONDS))
+        self.steps_per_block = int(round(BLOCK_SECONDS / STEP_SECONDS))
+
+        self.sos = k_weighting(sample_rate)
+        self.zi = np.zeros((self.sos.shape[0], 2, channels))
+        self.energies = []  # per-step channel energy sums, arrays of (steps, channels)
+        self.pending = np.zeros(channels)  # energy of the unfinished step
+        self.pending_count = 0
+
+        # phases[j, p] = fir[OVERSAMPLE * (TAPS_PER_PHASE - 1 - j) + p]
+        self.phases = oversampling_filter().reshape(TAPS_PER_PHASE, OVERSAMPLE)[::-1].astype(np.float32)
+        self.history = np.zeros((TAPS_PER_PHASE, channels), dtype=np.float32)
+        self.peak = 0.0
+
+    def feed(self, block):
+        """Meter the next block of samples"""
+        block = np.asarray(block, dtype=np.float64).reshape(len(block), self.channels)
+        if len(block) == 0:
+            return
+        self._feed_loudness(block)
+        self._feed_true_peak(block)
+
+    def _feed_loudness(self, block):
+        weighted, self.zi = signal.sosfilt(self.sos, block, axis=0, zi=self.zi)
+        squares = np.square(weighted, out=weighted)
+
+        # Complete the step left open by the previous block
+        head = min(self.step - self.pending_count, len(squares))
+        self.pending += squares[:head].sum(axis=0)
+        self.pending_count += head
+        if self.pending_count < self.step:
+            return
+        steps = [self.pending[None, :]]
+
+        rest = squares[head:]
+        whole = len(rest) - len(rest) % self.step
+        if whole:
+            steps.append(rest[:whole].reshape(-1, self.step, self.channels).sum(axis=1))
+        self.energies.append(np.concatenate(steps))
+        self.pending = rest[whole:].sum(axis=0)
+        self.pending_count = len(rest) - whole
+
+    def _feed_true_peak(self, block):
+        # Output phase p of input sample m is sum_d x[m - d] * fir[4d + p]: one
+        # (frames x taps) @ (taps x phases) product per channel. The carried
+        # history covers the FIR span, so every output is exact across blocks.
+        # float32 is plenty for a peak reading and runs ~2.5x faster.
+        padded = np.concatenate((self.history, block.astype(np.float32)))
+        for channel in range(self.channels):
+            column = np.ascontiguousarray(padded[1:, channel])
+            windows = sliding_window_view(column, TAPS_PER_PHASE)
+            upsampled = windows @ self.phases
+            self.peak = max(self.peak, float(upsampled.max()), -float(upsampled.min()))
+        self.history = padded[-TAPS_PER_PHASE:]
+
+    def block_loudness(self):
+        """Mean-square energy per channel of every 400 ms gating block"""
+        if not self.energies:
+            return np.zeros((0, self.channels))
+        steps = np.concatenate(self.energies)
+        count = len(steps) - self.steps_per_block + 1
+        if count <= 0:
+            return np.zeros((0, self.channels))
+        cumulative = np.concatenate((np.zeros((1, self.channels)), np.cumsum(steps, axis=0)))
+        window = cumulative[self.steps_per_block:] - cumulative[:count]
+        return window / (self.step * self.steps_per_block)
+
+    def integrated(self):
+        """Gated integrated loudness in LUFS (-inf if every block is gated)"""
+        power = self.block_loudness().sum(axis=1)
+        with np.errstate(divide="ignore"):
+            loudness = LOUDNESS_OFFSET + 10 * np.log10(power)
+        gated = power[loudness > ABSOLUTE_GATE]
+        if len(gated) == 0:
+            return -np.inf
+        threshold = LOUDNESS_OFFSET + 10 * np.log10(gated.mean()) + RELATIVE_GATE
+        gated = power[loudness > max(threshold, ABSOLUTE_GATE)]
+        return float(LOUDNESS_OFFSET + 10 * np.log10(gated.mean()))
+
+    def true_peak(self):
+        """Oversampled peak, linear full scale"""
+        return self.peak
+
+    def report(self):
+        return {
+            "integrated_lufs": self.integrated(),
+            "true_peak": self.true_peak(),
+            "true_peak_dbtp": to_db(self.true_peak()),
+        }
+
+def measure_loudness(blocks, sample_rate, channels=2):
+    """Meter a block stream (or a list holding one whole array)"""
+    meter = LoudnessMeter(sample_rate, channels)
+    for block in blocks:
+        meter.feed(block)
+    return meter.report()
+
+def normalization_gain(report, target_lufs, ceiling_dbtp=TRUE_PEAK_CEILING):
+    """
+    Linear gain that brings a measured track to target_lufs
+    - Returns (gain, limited); limited is True when the true-peak ceiling
+      capped the gain, leaving the track quieter than the target
+    """
+    if not np.isfinite(report["integrated_lufs"]):
+        return 1.0, False
+    gain = 10 ** ((target_lufs - report["integrated_lufs"]) / 20)
+    ceiling = 10 ** (ceiling_dbtp / 20)
+    if report["true_peak"] * gain > ceiling:
+        return ceiling / report["true_peak"], True
+    return gain, False
@@ -0,0 +1,88 @@
+"""
+Harmonia filter and modulation engine
+Shared by the ambient generators (ocean, rain, wind):
+- Butterworth filters designed once per (order, cutoff, type, rate) and
+  cached as second-order sections; SOS stays stable at sub-hertz cutoffs
+  where (b, a) coefficients lose precision
+- Sub-audio control signals (swells, gusts) computed at CONTROL_RATE and
+  linearly upsampled to audio rate block by block
+- Audio-band noise filtered block-wise with the section state carried
+  across blocks, so output does not depend on block size
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from scipy import signal
+
+from audio_stream import BLOCK_SIZE, block_ranges
+from render_profile import stage
+
+CONTROL_RATE = 100  # Hz; ample for modulation below ~10 Hz
+
+@lru_cache(maxsize=None)
+def design_sos(order, cutoff, btype, sample_rate, passes=1):
+    """
+    Butterworth filter as cached SOS (treat the result as read-only)
+    - cutoff: a frequency, or a (low, high) tuple for band filters
+    - passes=2 cascades the sections twice: a single causal pass then has
+      the same magnitude response as filtfilt with the one-pass design
+    """
+    sos = signal.butter(order, cutoff, btype=btype, fs=sample_rate, output='sos')
+    return np.vstack([sos] * passes)
+
+def control_factor(sample_rate):
+    """Audio samples per control sample (the control rate is sample_rate / factor)"""
+    return max(1, round(sample_rate / CONTROL_RATE))
+
+def control_times(total_samples, sample_rate):
+    """
+    Times of the control samples spanning total_samples audio samples
+    - One extra sample past the end, so every audio sample has a control
+      sample on both sides to interpolate between
+    """
+    factor = control_factor(sample_rate)
+    return np.arange(total_samples // factor + 2) * (factor / sample_rate)
+
+def control_noise(sos, noise, total_samples, sample_rate):
+    """
+    Zero-phase filtered control-rate noise spanning total_samples audio samples
+    - sos must be designed at the control rate, sample_rate / control_factor
+    - noise is the WhiteNoise stream to filter
+    """
+    count = len(control_times(total_samples, sample_rate))
+    white = noise.read(0, count)
+    with stage("filter"):
+        # Very short tracks have fewer samples than filtfilt's default padding
+        return signal.sosfiltfilt(sos, white, padlen=min(3 * (2 * len(sos) + 1), count - 1))
+
+def upsample(control, factor, start, count):
+    """Audio samples [start, start + count) of a control signal, linearly interpolated"""
+    index, offset = np.divmod(np.arange(start, start + count), factor)
+    frac = offset / factor
+    out = control[index] * (1 - frac)
+    out += control[index + 1] * frac
+    return out
+
+def control_blocks(control, sample_rate, total_samples, block_size=BLOCK_SIZE):
+    """Stream a control signal upsampled to audio rate"""
+    factor = control_factor(sample_rate)
+    for start, stop in block_ranges(total_samples, block_size):
+        yield upsample(control, factor, start, stop - start)
+
+def modulate(audio, control, sample_rate, block_size=BLOCK_SIZE):
+    """Multiply a whole mono track by an upsampled control signal, in place, a block at a time"""
+    blocks = control_blocks(control, sample_rate, len(audio), block_size)
+    for (start, stop), gain in zip(block_ranges(len(audio), block_size), blocks):
+        audio[start:stop] *= gain
+    return audio
+
+def sos_blocks(sos, noise, total_samples, block_size=BLOCK_SIZE):
+    """Filter a WhiteNoise stream block by block, carrying the section state"""
+    zi = np.zeros((sos.shape[0], 2))
+    for start, stop in block_ranges(total_samples, block_size):
+        with stage("noise"):
+            white = noise.read(start, stop - start)
+        with stage("filter"):
+            block, zi = signal.sosfilt(sos, white, zi=zi)
+        yield block
@@ -0,0 +1,35 @@
+import argparse
+import os
+import sys
+import time
+
+from asset_manifest import MANIFEST_NAME, find_assets, publish
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Publish rendered Harmonia tracks as content-addressed objects with a versioned manifest",
+    )
+    parser.add_argument("asset_dir", nargs="?", default="../assets/audio",
+                        help="directory of rendered tracks (default: ../assets/audio)")
+    parser.add_argument("-o", "--output-dir", default="../dist/audio",
+                        help="publish directory served by the CDN or serve-assets.py (default: ../dist/audio)")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    assets = find_assets(args.asset_dir)
+    if not assets:
+        print(f"No tracks found in {args.asset_dir}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    manifest, changed = publish(assets, args.output_dir)
+    elapsed = time.perf_counter() - start
+
+    total = sum(entry["size"] for entry in manifest["tracks"].values())
+    print(f"Published {len(assets)} tracks ({total / 1e6:.1f} MB) in {elapsed:.2f}s")
+    print(f"Manifest: {os.path.join(args.output_dir, MANIFEST_NAME)} (revision {manifest['revision']})")
+    if changed:
+        print(f"Changed since the last manifest: {', '.join(changed)}")
+    else:
+        print("No track changed since the last manifest")
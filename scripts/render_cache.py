@@ -0,0 +1,138 @@
+"""
+Harmonia content-addressed render cache
+Skips re-rendering tracks whose generator inputs have not changed:
+- Keys are a SHA-256 of the generator name, its resolved parameters, a
+  hash of the generator's source code and a hash of the helper modules
+  it renders through
+- Rendered files live in the cache directory under their key and are
+  hard-linked (or copied) into the output directory on a hit
+- A manifest.json tracks entry sizes and last use for LRU eviction
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+CACHE_DIR = ".render-cache"
+CACHE_SIZE_MB = 2048
+MANIFEST_NAME = "manifest.json"
+
+# Bump when the key format changes; helper edits are covered by files_hash
+CACHE_VERSION = 2
+
+def source_hash(source):
+    """Short hash of generator source code"""
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+
+def files_hash(paths):
+    """Short hash of the contents of source files, in order"""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+def render_key(generator, params, source, **extra):
+    """Hash everything that determines a render's output"""
+    payload = {
+        "version": CACHE_VERSION,
+        "generator": generator,
+        "params": params,
+        "source": source_hash(source),
+        **extra,
+    }
+    blob = json.dumps(payload, sort_keys=True, default=repr)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def link_or_copy(src, dest):
+    """Hard-link src to dest, falling back to a copy across filesystems"""
+    if os.path.exists(dest):
+        os.remove(dest)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+
+class RenderCache:
+    """On-disk render cache with a JSON manifest and LRU size limit"""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_SIZE_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.manifest_path = os.path.join(cache_dir, MANIFEST_NAME)
+        os.makedirs(cache_dir, exist_ok=True)
+        self.entries = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                entries = json.load(f).get("entries", {})
+        except (OSError, ValueError):
+            entries = {}
+        # Drop entries whose files were removed behind our back
+        entries = {
+            key: entry for key, entry in entries.items()
+            if os.path.exists(self.path(key, entry["ext"]))
+        }
+        # ...and files the manifest never recorded (e.g. an interrupted run)
+        known = {self.path(key, entry["ext"]) for key, entry in entries.items()}
+        known.add(self.manifest_path)
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if path not in known and os.path.isfile(path):
+                os.remove(path)
+        return entries
+
+    def path(self, key, ext):
+        return os.path.join(self.cache_dir, f"{key}{ext}")
+
+    def lookup(self, key):
+        """Return the cached file path for key, or None"""
+        entry = self.entries.get(key)
+        return self.path(key, entry["ext"]) if entry else None
+
+    def restore(self, key, dest):
+        """Place the cached render for key at dest and mark it used"""
+        src = self.lookup(key)
+        if not (os.path.exists(dest) and os.path.samefile(src, dest)):
+            link_or_copy(src, dest)
+        self.entries[key]["last_used"] = time.time()
+
+    def store(self, key, track, src):
+        """Add a freshly rendered file to the cache"""
+        ext = os.path.splitext(src)[1]
+        link_or_copy(src, self.path(key, ext))
+        now = time.time()
+        self.entries[key] = {
+            "track": track,
+            "ext": ext,
+            "size": os.path.getsize(src),
+            "created": now,
+            "last_used": now,
+        }
+
+    def total_bytes(self):
+        return sum(entry["size"] for entry in self.entries.values())
+
+    def evict(self):
+        """Remove least recently used entries until under the size limit"""
+        evicted = []
+        total = self.total_bytes()
+        by_age = sorted(self.entries.items(), key=lambda item: item[1]["last_used"])
+        for key, entry in by_age:
+            if total <= self.max_bytes:
+                break
+            os.remove(self.path(key, entry["ext"]))
+            total -= entry["size"]
+            del self.entries[key]
+            evicted.append(entry["track"])
+        return evicted
+
+    def save(self):
+        """Atomically write the manifest"""
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "entries": self.entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
@@ -0,0 +1,176 @@
+"""
+Harmonia render profiler
+Opt-in per-stage instrumentation behind generate_audio.py --profile:
+- stage(name) marks a pipeline stage; stages nest, and with no active
+  Profile they cost a single function call
+- Each stage records its calls, wall time (total and self), the most
+  memory it had allocated at once (tracemalloc) and how far it raised the
+  process's peak RSS
+- Reports are JSON-ready dicts and can also be written as folded stacks
+  for flamegraph.pl, inferno or speedscope
+Streamed tracks synthesise blocks lazily while they are written, so their
+synthesis stages show up nested under "write".
+"""
+
+import json
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+PROFILE_FILE = "profile.json"
+MB = 1024 * 1024
+
+_active = None
+_disabled = nullcontext()
+
+def peak_rss_mb():
+    """Peak RSS of this process so far (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / MB if sys.platform == "darwin" else peak / 1024
+
+class _Stage:
+    """One open stage on the active profile's stack"""
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        profile = self.profile
+        parent = profile._stack[-1]
+        self.path = parent.path + (self.name,)
+        # Fold the peak so far into the parent before restarting the count
+        current, peak = tracemalloc.get_traced_memory()
+        parent.peak = max(parent.peak, peak)
+        tracemalloc.reset_peak()
+        self.start_memory = self.peak = current
+        self.start_rss = peak_rss_mb()
+        self.child_seconds = 0.0
+        profile._stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        profile = self.profile
+        profile._stack.pop()
+        parent = profile._stack[-1]
+        parent.child_seconds += elapsed
+
+        _, peak = tracemalloc.get_traced_memory()
+        self.peak = max(self.peak, peak)
+        parent.peak = max(parent.peak, self.peak)
+        tracemalloc.reset_peak()
+
+        stats = profile.stages.setdefault(self.path, {
+            "calls": 0, "seconds": 0.0, "self_seconds": 0.0, "alloc_peak_mb": 0.0, "rss_growth_mb": 0.0,
+        })
+        stats["calls"] += 1
+        stats["seconds"] += elapsed
+        stats["self_seconds"] += elapsed - self.child_seconds
+        stats["alloc_peak_mb"] = max(stats["alloc_peak_mb"], (self.peak - self.start_memory) / MB)
+        stats["rss_growth_mb"] += peak_rss_mb() - self.start_rss
+        return False
+
+class Profile:
+    """
+    Collect stage timings for one track while active (a context manager)
+    - Only one profile is active per process; worker processes each run
+      their own
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.stages = {}
+        self._stack = []
+        self._started_tracing = False
+
+    def __enter__(self):
+        global _active
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        root = _Stage(self, self.name)
+        root.path = ()
+        root.start_memory = root.peak = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        root.child_seconds = 0.0
+        self._root = root
+        self._stack = [root]
+        self._start = time.perf_counter()
+        _active = self
+        return self
+
+    def __exit__(self, *exc):
+        global _active
+        self.seconds = time.perf_counter() - self._start
+        root = self._root
+        root.peak = max(root.peak, tracemalloc.get_traced_memory()[1])
+        self.self_seconds = self.seconds - root.child_seconds
+        self.alloc_peak_mb = (root.peak - root.start_memory) / MB
+        self.peak_rss_mb = peak_rss_mb()
+        _active = None
+        if self._started_tracing:
+            tracemalloc.stop()
+        return False
+
+    def report(self):
+        """Per-stage breakdown, slowest stages first"""
+        stages = [
+            {"stage": "/".join(path), **{key: round(value, 6) for key, value in stats.items()}}
+            for path, stats in self.stages.items()
+        ]
+        stages.sort(key=lambda stage: stage["seconds"], reverse=True)
+        return {
+            "track": self.name,
+            "seconds": round(self.seconds, 6),
+            "self_seconds": round(self.self_seconds, 6),
+            "alloc_peak_mb": round(self.alloc_peak_mb, 3),
+            "peak_rss_mb": round(self.peak_rss_mb, 3),
+            "stages": stages,
+        }
+
+def stage(name):
+    """Context manager timing one pipeline stage of the active profile"""
+    if _active is None:
+        return _disabled
+    return _Stage(_active, name)
+
+def profiled(func, name, *args, **kwargs):
+    """Call func under a fresh Profile named name; returns (result, report)"""
+    with Profile(name) as profile:
+        result = func(*args, **kwargs)
+    return result, profile.report()
+
+def folded_stacks(reports):
+    """
+    Folded-stack lines ("track;stage;substage microseconds") of self time,
+    the input format of flamegraph.pl, inferno and speedscope
+    """
+    lines = []
+    for report in reports:
+        track = report["track"]
+        lines.append(f"{track} {round(report['self_seconds'] * 1e6)}")
+        for stage_report in report["stages"]:
+            stack = ";".join([track, *stage_report["stage"].split("/")])
+            lines.append(f"{stack} {round(stage_report['self_seconds'] * 1e6)}")
+    return lines
+
+def stage_totals(reports):
+    """(stage name, self seconds) summed over every track and nesting, largest first"""
+    totals = {}
+    for report in reports:
+        for stage_report in report["stages"]:
+            name = stage_report["stage"].rsplit("/", 1)[-1]
+            totals[name] = totals.get(name, 0.0) + stage_report["self_seconds"]
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+def write_profile(path, reports, wall_time):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"wall_time": wall_time, "tracks": reports}, f, indent=2)
+
+def write_folded(path, reports):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(folded_stacks(reports)) + "\n")
@@ -0,0 +1,39 @@
+import argparse
+import os
+import sys
+import time
+
+from asset_manifest import find_assets
+from segmenter import PLAYLIST_NAME, SEGMENT_PROFILES, SEGMENT_SECONDS, segment_tracks
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Package rendered Harmonia tracks as HLS (fMP4/AAC) segments with a playlist per track",
+    )
+    parser.add_argument("asset_dir", nargs="?", default="../assets/audio",
+                        help="directory of rendered tracks (default: ../assets/audio)")
+    parser.add_argument("-o", "--output-dir", default="../dist/audio/segments",
+                        help="segment directory, one sub-directory per track (default: ../dist/audio/segments)")
+    parser.add_argument("-f", "--format", choices=list(SEGMENT_PROFILES), default="aac-128",
+                        help="AAC encoding of the fMP4 segments (default: aac-128)")
+    parser.add_argument("-s", "--segment-seconds", type=float, default=SEGMENT_SECONDS,
+                        help=f"segment length in seconds, rounded to whole AAC frames (default: {SEGMENT_SECONDS:g})")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of tracks to package in parallel (0 = one per CPU core)")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.segment_seconds <= 0:
+        print("--segment-seconds must be positive")
+        sys.exit(1)
+    assets = find_assets(args.asset_dir)
+    if not assets:
+        print(f"No tracks found in {args.asset_dir}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    counts = segment_tracks(assets, args.output_dir, args.format, args.segment_seconds, args.jobs or os.cpu_count())
+    elapsed = time.perf_counter() - start
+    print(f"Segmented {len(counts)} tracks into {sum(counts.values())} segments in {elapsed:.2f}s")
+    print(f"Playlists: {args.output_dir}/<track>/{PLAYLIST_NAME}")
@@ -0,0 +1,101 @@
+"""
+Harmonia segmented packaging
+Cuts rendered tracks into HLS segments with a playlist per track, so
+playback can start after the first segment instead of the whole file:
+- Each track is encoded once, as one continuous AAC stream, and split by
+  ffmpeg's hls muxer into fMP4 segments (EXT-X-MAP init.mp4 + .m4s), the
+  HLS packed format that players join gaplessly; encoding segments as
+  separate files would restart the encoder (priming, padding) at every
+  boundary and click there
+- Segments are a whole number of AAC frames (1024 samples), so every
+  boundary falls on the same exact sample in the decoded stream; the
+  encoder delay occurs once, at the start of the track
+- Each segment decodes on its own after the init segment
+- Tracks are packaged in parallel (one ffmpeg process each); within a
+  track the single encode is what keeps the joins seamless
+- Output: <output_dir>/<track>/index.m3u8, init.mp4 and seg-NNNNN.m4s;
+  a track's directory is replaced only once its packaging succeeded
+"""
+
+import os
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from asset_manifest import probe
+
+SEGMENT_SECONDS = 6.0
+PLAYLIST_NAME = "index.m3u8"
+INIT_NAME = "init.mp4"
+AAC_FRAME = 1024  # samples per AAC frame
+
+# Segment encodings selectable with segment-audio.py --format
+SEGMENT_PROFILES = {
+    "aac-96": ["-c:a", "aac", "-b:a", "96k"],
+    "aac-128": ["-c:a", "aac", "-b:a", "128k"],
+    "aac-192": ["-c:a", "aac", "-b:a", "192k"],
+}
+
+def segment_name(index):
+    return f"seg-{index:05d}.m4s"
+
+def segment_frames(segment_seconds, sample_rate):
+    """Segment length in samples: segment_seconds rounded to whole AAC frames"""
+    return max(1, round(segment_seconds * sample_rate / AAC_FRAME)) * AAC_FRAME
+
+def hls_command(path, track_dir, fmt, sample_rate, segment_seconds=SEGMENT_SECONDS):
+    """ffmpeg command that encodes a track once and splits it into fMP4 HLS segments"""
+    # The muxer cuts segment n at the first frame at or after n * hls_time
+    # (in microseconds), so aim 1-2 us early: every cut then lands exactly
+    # on a segment_frames boundary for the first ~11000 segments (18 h at 6 s)
+    hls_time = (segment_frames(segment_seconds, sample_rate) * 1_000_000 // sample_rate - 1) / 1_000_000
+    return [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-i", path,
+        "-vn", *SEGMENT_PROFILES[fmt], "-ar", str(sample_rate),
+        "-f", "hls", "-hls_time", f"{hls_time:.6f}", "-hls_playlist_type", "vod",
+        "-hls_segment_type", "fmp4", "-hls_fmp4_init_filename", INIT_NAME,
+        "-hls_segment_filename", os.path.join(track_dir, "seg-%05d.m4s"),
+        os.path.join(track_dir, PLAYLIST_NAME),
+    ]
+
+def segment_track(path, track_dir, fmt="aac-128", segment_seconds=SEGMENT_SECONDS):
+    """
+    Package one track into track_dir
+    - Built in a sibling temporary directory that replaces track_dir only
+      on success, so stale or partial segments are never served
+    - Returns the number of segments
+    """
+    tmp_dir = track_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        command = hls_command(path, tmp_dir, fmt, probe(path)["sample_rate"], segment_seconds)
+        result = subprocess.run(command, capture_output=True)
+        if result.returncode != 0:
+            message = result.stderr.decode("utf-8", "replace").strip()
+            raise RuntimeError(f"ffmpeg could not segment {path} ({result.returncode}): {message}")
+        count = sum(name.endswith(".m4s") for name in os.listdir(tmp_dir))
+        shutil.rmtree(track_dir, ignore_errors=True)
+        os.replace(tmp_dir, track_dir)
+        return count
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+def segment_tracks(assets, output_dir, fmt="aac-128", segment_seconds=SEGMENT_SECONDS, workers=1):
+    """
+    Segment {track name: path} into output_dir/<track>/
+    - workers: tracks packaged at once (None = Python's choice)
+    - Returns {track name: number of segments}
+    """
+    if fmt not in SEGMENT_PROFILES:
+        raise ValueError(f"unsupported segment format {fmt!r}; HLS segments are {', '.join(SEGMENT_PROFILES)}")
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg not found on PATH; needed to encode HLS segments")
+    os.makedirs(output_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            track: pool.submit(segment_track, path, os.path.join(output_dir, track), fmt, segment_seconds)
+            for track, path in sorted(assets.items())
+        }
+        return {track: future.result() for track, future in futures.items()}
@@ -0,0 +1,34 @@
+import argparse
+import os
+import sys
+
+from asset_manifest import MANIFEST_NAME
+from asset_server import DEFAULT_PORT, make_server
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Serve published Harmonia assets locally, with HTTP range requests, as a CDN stand-in",
+    )
+    parser.add_argument("directory", nargs="?", default="../dist/audio",
+                        help="directory written by publish-assets.py and/or segment-audio.py (default: ../dist/audio)")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="address to bind; use 0.0.0.0 to reach it from a device (default: 127.0.0.1)")
+    parser.add_argument("-p", "--port", type=int, default=DEFAULT_PORT, help=f"port (default: {DEFAULT_PORT})")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not os.path.isdir(args.directory):
+        print(f"No {args.directory}; run publish-assets.py or segment-audio.py first")
+        sys.exit(1)
+
+    server = make_server(os.path.abspath(args.directory), args.host, args.port)
+    host, port = server.server_address[:2]
+    entry = MANIFEST_NAME if os.path.isfile(os.path.join(args.directory, MANIFEST_NAME)) else ""
+    print(f"Serving {args.directory} at http://{host}:{port}/{entry} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
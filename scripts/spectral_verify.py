@@ -0,0 +1,207 @@
+"""
+Harmonia spectral verifier
+Checks rendered binaural and isochronic tracks against the parameters
+they were generated from, without listening:
+- Binaural: the carrier in each ear and the L/R offset (the beat)
+- Isochronic: the carrier and the pulse rate of its envelope
+- Only a steady excerpt from the middle of each track is decoded (WAV
+  through a memory map, MP3/Opus through an ffmpeg seek)
+- Each excerpt is decimated to a carrier band and, squared, to an
+  envelope band; Welch spectra of every track are then estimated in one
+  batched call per band, and peaks are refined by parabolic interpolation
+- Expected values come from generate_audio.build_jobs (what main()
+  renders), or from the name of a --grid track
+"""
+
+import inspect
+import os
+import re
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import signal
+from scipy.io import wavfile
+
+import generate_audio
+from asset_manifest import probe
+
+ANALYSIS_SECONDS = 20.0  # excerpt length, taken clear of the fades
+CARRIER_RATE = 2000  # Hz; the carrier band (carriers are a few hundred Hz)
+ENVELOPE_RATE = 200  # Hz; the envelope band (pulse rates are below 40 Hz)
+CARRIER_SEGMENT = 8192  # Welch segment lengths, in decimated samples
+ENVELOPE_SEGMENT = 2048
+ZERO_PAD = 4  # FFT length per segment length, for a finer bin grid
+CARRIER_BAND = (20.0, 900.0)
+ENVELOPE_BAND = (0.5, 40.0)
+CARRIER_TOLERANCE = 0.5  # Hz
+BEAT_TOLERANCE = 0.05  # Hz
+RATE_TOLERANCE = 0.05  # Hz
+GRID_RE = re.compile(r"^grid-([\d.]+)hz-([\d.]+)hz-(binaural|isochronic)$")
+
+def job_arguments(job):
+    """A catalogue job's generator kwargs with the generator's defaults filled in"""
+    _, generator, params = job
+    bound = inspect.signature(getattr(generate_audio, generator)).bind(**params)
+    bound.apply_defaults()
+    return bound.arguments
+
+def catalogue_expectations():
+    """{track name: expectation} for the binaural and isochronic tracks main() renders"""
+    expectations = {}
+    for job in generate_audio.build_jobs():
+        name, generator, _ = job
+        args = job_arguments(job)
+        if generator == "generate_binaural_beat":
+            expectations[name] = {"kind": "binaural", "carrier": args["carrier"], "beat": args["frequency"]}
+        elif generator == "generate_isochronic_tone":
+            expectations[name] = {"kind": "isochronic", "carrier": args["base_tone"], "rate": args["frequency"]}
+    return expectations
+
+def track_expectation(name, catalogue):
+    """Expectation for a track name (catalogue or grid), or None for tracks with nothing to verify"""
+    if name in catalogue:
+        return catalogue[name]
+    match = GRID_RE.match(name)
+    if match is None:
+        return None
+    frequency, carrier, kind = float(match[1]), float(match[2]), match[3]
+    if kind == "binaural":
+        return {"kind": kind, "carrier": carrier, "beat": frequency}
+    return {"kind": kind, "carrier": carrier, "rate": frequency}
+
+def excerpt_span(duration, seconds=ANALYSIS_SECONDS, margin=generate_audio.FADE_DURATION):
+    """(start, length) in seconds of a centred excerpt that avoids the fades when the track allows"""
+    usable = duration - 2 * margin
+    length = min(seconds, usable) if usable > 0 else duration
+    return (duration - length) / 2, length
+
+def read_excerpt(path, seconds=ANALYSIS_SECONDS):
+    """(sample_rate, (frames, channels) float32) excerpt from the middle of a track"""
+    info = probe(path)
+    sample_rate, channels = info["sample_rate"], info["channels"]
+    start, length = excerpt_span(info["duration"], seconds)
+    if path.lower().endswith(".wav"):
+        sample_rate, frames = wavfile.read(path, mmap=True)
+        first = int(start * sample_rate)
+        frames = frames[first:first + int(length * sample_rate)]
+    else:
+        if shutil.which("ffmpeg") is None:
+            raise RuntimeError("ffmpeg not found on PATH; needed to decode compressed audio")
+        command = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-ss", f"{start:.3f}", "-t", f"{length:.3f}",
+            "-i", path, "-f", "s16le", "-ar", str(sample_rate), "-ac", str(channels), "pipe:1",
+        ]
+        result = subprocess.run(command, capture_output=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg could not decode {path}: {result.stderr.decode('utf-8', 'replace').strip()}")
+        frames = np.frombuffer(result.stdout, dtype="<i2")
+    frames = frames.reshape(-1, channels)
+    return sample_rate, frames.astype(np.float32) / 32768
+
+def decimate_track(path, seconds=ANALYSIS_SECONDS):
+    """
+    Decimated bands of one track's excerpt
+    - Returns (carrier rate, (channels, n) carrier band, envelope rate,
+      (m,) envelope band); the envelope is the decimated power of the
+      channel sum, whose carrier terms fall outside the envelope band
+    """
+    sample_rate, frames = read_excerpt(path, seconds)
+    factor = max(1, sample_rate // CARRIER_RATE)
+    carrier = signal.resample_poly(frames.T, 1, factor, axis=-1)
+    carrier_rate = sample_rate / factor
+    power = np.square(carrier.sum(axis=0))
+    envelope_factor = max(1, int(carrier_rate // ENVELOPE_RATE))
+    envelope = signal.resample_poly(power, 1, envelope_factor)
+    return carrier_rate, carrier, carrier_rate / envelope_factor, envelope
+
+def batched_welch(signals, rate, segment):
+    """Welch PSDs of equally long rows, all in one call; returns (frequencies, psd)"""
+    nperseg = min(segment, signals.shape[-1])
+    return signal.welch(signals, rate, nperseg=nperseg, nfft=ZERO_PAD * nperseg, axis=-1)
+
+def peak_frequencies(freqs, psd, band):
+    """Frequency of the strongest peak within band for every row of psd, refined by parabolic interpolation"""
+    inside = np.flatnonzero((freqs >= band[0]) & (freqs <= band[1]))
+    lo, hi = inside[0], inside[-1]
+    index = lo + np.argmax(psd[..., lo:hi + 1], axis=-1)
+    index = np.clip(index, 1, len(freqs) - 2)
+    log_psd = np.log(np.maximum(psd, np.finfo(psd.dtype).tiny))
+    left = np.take_along_axis(log_psd, (index - 1)[..., None], axis=-1)[..., 0]
+    mid = np.take_along_axis(log_psd, index[..., None], axis=-1)[..., 0]
+    right = np.take_along_axis(log_psd, (index + 1)[..., None], axis=-1)[..., 0]
+    curvature = left - 2 * mid + right
+    offset = np.where(curvature < 0, 0.5 * (left - right) / np.where(curvature < 0, curvature, 1), 0.0)
+    return freqs[index] + offset * (freqs[1] - freqs[0])
+
+def measure_bands(bands):
+    """
+    Carrier and envelope peak frequencies of many decimated tracks
+    - bands: list of decimate_track results
+    - Tracks with the same rates and excerpt length share one Welch call
+    - Returns one (per-channel carriers, envelope rate) tuple per track
+    """
+    groups = {}
+    for i, (carrier_rate, carrier, envelope_rate, envelope) in enumerate(bands):
+        groups.setdefault((carrier_rate, carrier.shape, envelope_rate, envelope.shape), []).append(i)
+    results = [None] * len(bands)
+    for (carrier_rate, _, envelope_rate, _), members in groups.items():
+        freqs, psd = batched_welch(np.stack([bands[i][1] for i in members]), carrier_rate, CARRIER_SEGMENT)
+        carriers = peak_frequencies(freqs, psd, CARRIER_BAND)
+        freqs, psd = batched_welch(np.stack([bands[i][3] for i in members]), envelope_rate, ENVELOPE_SEGMENT)
+        rates = peak_frequencies(freqs, psd, ENVELOPE_BAND)
+        for row, i in enumerate(members):
+            results[i] = (carriers[row], rates[row])
+    return results
+
+def compare(expected, carriers, rate):
+    """Verification result for one track: measured values and whether each is within tolerance"""
+    left, right = float(carriers[0]), float(carriers[-1])
+    result = {"kind": expected["kind"], "expected": expected, "carrier": left}
+    failures = []
+    if abs(left - expected["carrier"]) > CARRIER_TOLERANCE:
+        failures.append(f"carrier {left:.2f} Hz, expected {expected['carrier']:g} Hz")
+    if expected["kind"] == "binaural":
+        beat = right - left
+        result["beat"] = beat
+        if abs(beat - expected["beat"]) > BEAT_TOLERANCE:
+            failures.append(f"beat {beat:.3f} Hz, expected {expected['beat']:g} Hz")
+    else:
+        result["rate"] = float(rate)
+        if abs(right - left) > CARRIER_TOLERANCE:
+            failures.append(f"channels differ: {left:.2f} / {right:.2f} Hz")
+        if abs(rate - expected["rate"]) > RATE_TOLERANCE:
+            failures.append(f"pulse rate {rate:.3f} Hz, expected {expected['rate']:g} Hz")
+    result["failures"] = failures
+    return result
+
+def verify_files(paths, workers=1, seconds=ANALYSIS_SECONDS):
+    """
+    Verify tracks against their expected parameters
+    - Returns {path: result}; tracks with nothing to verify (ambient
+      sounds, unknown names) are left out, and unreadable files get an
+      "error" entry
+    """
+    catalogue = catalogue_expectations()
+    expectations = {}
+    for path in paths:
+        expected = track_expectation(os.path.splitext(os.path.basename(path))[0], catalogue)
+        if expected is not None:
+            expectations[path] = expected
+    if not expectations:
+        return {}
+
+    results = {}
+    bands = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {path: pool.submit(decimate_track, path, seconds) for path in expectations}
+        for path, future in futures.items():
+            try:
+                bands[path] = future.result()
+            except (OSError, ValueError, RuntimeError) as e:
+                results[path] = {"kind": expectations[path]["kind"], "expected": expectations[path], "error": str(e)}
+    measured = measure_bands(list(bands.values()))
+    for path, (carriers, rate) in zip(bands, measured):
+        results[path] = compare(expectations[path], carriers, rate)
+    return {path: results[path] for path in expectations}
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The audio scripts are run directly from scripts/, not installed as a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
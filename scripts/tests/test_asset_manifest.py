@@ -0,0 +1,93 @@
+import json
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from asset_manifest import MANIFEST_NAME, file_sha256, find_assets, probe, publish
+from audio_stream import WavStreamWriter
+
+SAMPLE_RATE = 8000
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not on PATH")
+
+def write_wav(path, seconds, frequency=440.0):
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    tone = 0.5 * np.sin(2 * np.pi * frequency * t)
+    with WavStreamWriter(str(path), SAMPLE_RATE) as writer:
+        writer.write(np.column_stack((tone, tone)))
+
+def encode(source, dest, *args):
+    subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-i", str(source), *args, str(dest)],
+        check=True,
+    )
+
+def test_probe_wav(tmp_path):
+    write_wav(tmp_path / "tone.wav", 2.5)
+    assert probe(str(tmp_path / "tone.wav")) == {
+        "codec": "pcm_s16le", "duration": 2.5, "bitrate": SAMPLE_RATE * 32, "sample_rate": SAMPLE_RATE, "channels": 2,
+    }
+
+@needs_ffmpeg
+@pytest.mark.parametrize("args, bitrate", [
+    (["-c:a", "libmp3lame", "-b:a", "128k", "-ar", "44100"], 128000),
+    (["-c:a", "libmp3lame", "-q:a", "4", "-ar", "44100"], None),
+    (["-c:a", "libmp3lame", "-b:a", "64k", "-ar", "22050", "-ac", "1", "-write_xing", "0"], 64000),
+])
+def test_probe_mp3(tmp_path, args, bitrate):
+    write_wav(tmp_path / "tone.wav", 3)
+    encode(tmp_path / "tone.wav", tmp_path / "tone.mp3", *args)
+    info = probe(str(tmp_path / "tone.mp3"))
+    assert info["codec"] == "mp3"
+    # Without a Xing/Info header the encoder's delay and padding can't be removed
+    assert info["duration"] == pytest.approx(3, abs=0.001 if "-write_xing" not in args else 0.1)
+    if bitrate is not None:
+        assert info["bitrate"] == bitrate
+    assert info["channels"] == (1 if "-ac" in args else 2)
+
+@needs_ffmpeg
+def test_probe_opus(tmp_path):
+    write_wav(tmp_path / "tone.wav", 3)
+    encode(tmp_path / "tone.wav", tmp_path / "tone.opus", "-c:a", "libopus", "-b:a", "96k")
+    info = probe(str(tmp_path / "tone.opus"))
+    assert info["codec"] == "opus"
+    assert info["duration"] == pytest.approx(3, abs=0.001)
+    assert info["channels"] == 2
+
+def test_probe_rejects_unknown_files(tmp_path):
+    (tmp_path / "noise.mp3").write_bytes(b"\x00" * 1000)
+    with pytest.raises(ValueError):
+        probe(str(tmp_path / "noise.mp3"))
+    (tmp_path / "notes.txt").write_text("hi")
+    with pytest.raises(ValueError):
+        probe(str(tmp_path / "notes.txt"))
+
+def test_publish_is_content_addressed_and_versioned(tmp_path):
+    assets_dir = tmp_path / "assets"
+    assets_dir.mkdir()
+    write_wav(assets_dir / "a.wav", 1, 440)
+    write_wav(assets_dir / "b.wav", 1, 550)
+    (assets_dir / "readme.txt").write_text("not audio")
+    out = tmp_path / "dist"
+
+    manifest, changed = publish(find_assets(str(assets_dir)), str(out))
+    assert manifest["revision"] == 1 and changed == ["a", "b"]
+    entry = manifest["tracks"]["a"]
+    assert entry["sha256"] == file_sha256(str(assets_dir / "a.wav"))
+    assert entry["object"] == f"objects/{entry['sha256']}.wav"
+    assert (out / entry["object"]).read_bytes() == (assets_dir / "a.wav").read_bytes()
+    assert entry["size"] == (assets_dir / "a.wav").stat().st_size
+    assert json.loads((out / MANIFEST_NAME).read_text()) == manifest
+
+    # Republishing unchanged tracks keeps the revision and every URL
+    again, changed = publish(find_assets(str(assets_dir)), str(out))
+    assert again == manifest and changed == []
+
+    (assets_dir / "b.wav").unlink()
+    write_wav(assets_dir / "b.wav", 1, 660)
+    updated, changed = publish(find_assets(str(assets_dir)), str(out))
+    assert updated["revision"] == 2 and changed == ["b"]
+    assert updated["tracks"]["a"] == manifest["tracks"]["a"]
+    assert updated["tracks"]["b"]["object"] != manifest["tracks"]["b"]["object"]
@@ -0,0 +1,72 @@
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from asset_server import make_server, parse_range
+
+def test_parse_range():
+    assert parse_range("bytes=0-99", 1000) == (0, 100)
+    assert parse_range("bytes=900-", 1000) == (900, 1000)
+    assert parse_range("bytes=-100", 1000) == (900, 1000)
+    assert parse_range("bytes=-5000", 1000) == (0, 1000)
+    assert parse_range("bytes=990-2000", 1000) == (990, 1000)
+    # Multiple or malformed ranges are ignored
+    assert parse_range("bytes=0-1,5-6", 1000) is None
+    assert parse_range("items=0-1", 1000) is None
+    for header in ["bytes=1000-", "bytes=5-4", "bytes=-0"]:
+        with pytest.raises(ValueError):
+            parse_range(header, 1000)
+
+@pytest.fixture
+def server(tmp_path):
+    (tmp_path / "objects").mkdir()
+    (tmp_path / "objects" / "abc123.mp3").write_bytes(bytes(range(256)) * 40)
+    (tmp_path / "manifest.json").write_text("{}")
+    (tmp_path / "segments" / "rain").mkdir(parents=True)
+    (tmp_path / "segments" / "rain" / "index.m3u8").write_text("#EXTM3U\n")
+    server = make_server(str(tmp_path), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def fetch(url, **headers):
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+def test_range_requests(server):
+    body = bytes(range(256)) * 40
+    status, headers, data = fetch(f"{server}/objects/abc123.mp3")
+    assert status == 200 and data == body
+    assert headers["Accept-Ranges"] == "bytes"
+    assert headers["Content-Type"] == "audio/mpeg"
+    assert headers["ETag"] == '"abc123"' and "immutable" in headers["Cache-Control"]
+
+    status, headers, data = fetch(f"{server}/objects/abc123.mp3", Range="bytes=100-355")
+    assert status == 206 and data == body[100:356]
+    assert headers["Content-Range"] == f"bytes 100-355/{len(body)}"
+
+    status, _, data = fetch(f"{server}/objects/abc123.mp3", Range="bytes=-10")
+    assert status == 206 and data == body[-10:]
+
+    status, headers, _ = fetch(f"{server}/objects/abc123.mp3", Range=f"bytes={len(body)}-")
+    assert status == 416 and headers["Content-Range"] == f"bytes */{len(body)}"
+
+def test_cache_headers(server):
+    status, _, _ = fetch(f"{server}/objects/abc123.mp3", **{"If-None-Match": '"abc123"'})
+    assert status == 304
+    status, headers, data = fetch(f"{server}/manifest.json")
+    assert status == 200 and data == b"{}"
+    assert headers["Cache-Control"] == "no-cache"
+    status, _, _ = fetch(f"{server}/objects/missing.mp3")
+    assert status == 404
+    status, headers, _ = fetch(f"{server}/segments/rain/index.m3u8")
+    assert status == 200 and headers["Content-Type"] == "application/vnd.apple.mpegurl"
+    assert headers["Cache-Control"] == "no-cache"
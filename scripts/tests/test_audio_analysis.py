@@ -0,0 +1,131 @@
+import json
+
+import numpy as np
+
+from audio_analysis import (
+    StreamAnalyzer, analyze_file, analyze_samples, finite_or_none, seam_discontinuity, silence_runs, true_runs,
+)
+from audio_stream import write_wav_stream
+
+SAMPLE_RATE = 1000
+
+def loop_breaks(samples, min_length, threshold=10):
+    """The original per-sample loop from analyze-audio.py (closed runs only)"""
+    breaks = []
+    count = 0
+    for i, silent in enumerate(np.abs(samples) < threshold):
+        if silent:
+            count += 1
+        else:
+            if count > min_length:
+                breaks.append((i - count, i))
+            count = 0
+    return breaks
+
+def test_true_runs():
+    mask = np.array([1, 1, 0, 0, 1, 0, 1, 1, 1], dtype=bool)
+    assert true_runs(mask).tolist() == [[0, 2], [4, 5], [6, 9]]
+    assert true_runs(np.zeros(4, dtype=bool)).shape == (0, 2)
+
+def test_silence_runs_match_original_loop():
+    rng = np.random.RandomState(0)
+    samples = rng.randint(-2000, 2000, 20000).astype(np.int16)
+    for start, length in [(100, 30), (5000, 51), (9000, 50), (12000, 400)]:
+        samples[start:start + length] = rng.randint(-9, 10, length)
+    samples[-1] = 1000  # close the final run so the loop sees it too
+
+    runs = silence_runs(samples.reshape(-1, 1), 10, 50)
+    assert [tuple(run) for run in runs.tolist()] == loop_breaks(samples, 50)
+
+def test_trailing_silence_is_reported():
+    samples = np.full(2000, 500, dtype=np.int16)
+    samples[1900:] = 0
+    report = analyze_samples(samples, SAMPLE_RATE)
+    assert report["breaks"] == [(1.9, 2.0)]
+
+def test_stereo_break_needs_both_channels_silent():
+    frames = np.full((2000, 2), 500, dtype=np.int16)
+    frames[100:400, 0] = 0
+    frames[1000:1200] = 0
+    report = analyze_samples(frames.ravel(), SAMPLE_RATE, channels=2)
+    assert report["breaks"] == [(1.0, 1.2)]
+
+def test_levels_clipping_and_dc():
+    frames = np.zeros((2500, 2), dtype=np.int16)
+    frames[:, 0] = 16384
+    frames[:, 1] = -16384
+    frames[10, 0] = 32767
+    frames[20, 1] = -32768
+    report = analyze_samples(frames.ravel(), SAMPLE_RATE, channels=2)
+
+    assert report["clipping_samples"] == 2
+    assert len(report["window_rms"]) == 3
+    np.testing.assert_allclose(report["window_rms"][1:], 0.5)
+    assert report["window_peak"][0] == 1.0
+    assert report["peak"] == 1.0
+    assert report["dc_offset"][0] > 0.49 and report["dc_offset"][1] < -0.49
+
+def noisy_frames_with_gaps(frames, channels=2):
+    rng = np.random.RandomState(1)
+    audio = rng.randint(-3000, 3000, (frames, channels)).astype(np.int16)
+    for start, length in [(0, 80), (990, 60), (1995, 500), (4000, 51), (frames - 70, 70)]:
+        audio[start:start + length] = 0
+    return audio
+
+def test_chunked_analysis_matches_whole_file():
+    frames = noisy_frames_with_gaps(7300)
+    whole = analyze_samples(frames.ravel(), SAMPLE_RATE, channels=2)
+    for chunk in [1, 333, 1000, 1995, 5000]:
+        analyzer = StreamAnalyzer(SAMPLE_RATE, channels=2)
+        for start in range(0, len(frames), chunk):
+            analyzer.feed(frames[start:start + chunk].ravel())
+        report = analyzer.report()
+        assert report["breaks"] == whole["breaks"]
+        assert report["clipping_samples"] == whole["clipping_samples"]
+        assert report["dc_offset"] == whole["dc_offset"]
+        np.testing.assert_allclose(report["window_rms"], whole["window_rms"])
+        np.testing.assert_allclose(report["window_peak"], whole["window_peak"])
+        np.testing.assert_allclose(report["rms"], whole["rms"])
+        np.testing.assert_allclose(report["integrated_lufs"], whole["integrated_lufs"])
+        np.testing.assert_allclose(report["true_peak"], whole["true_peak"], rtol=1e-6)
+
+def test_analyze_file_reads_wav_in_chunks(tmp_path):
+    frames = noisy_frames_with_gaps(44100 * 3)
+    path = str(tmp_path / "gaps.wav")
+    write_wav_stream([frames / 32767], path, 44100)
+    report = analyze_file(path, chunk_seconds=0.25)
+    whole = analyze_samples(frames.ravel(), 44100, channels=2)
+    assert report["frames"] == len(frames)
+    assert report["breaks"] == whole["breaks"]
+    np.testing.assert_allclose(report["window_rms"], whole["window_rms"], atol=1e-4)
+
+def test_seam_discontinuity_flags_partial_cycles():
+    n = np.arange(2000)
+    whole = np.round(20000 * np.sin(2 * np.pi * 5 * n / 2000))[:, None]  # 5 full cycles
+    partial = np.round(20000 * np.sin(2 * np.pi * 5.3 * n / 2000))[:, None]
+    assert seam_discontinuity(whole[:50], whole[-50:])[1] < 6
+    assert seam_discontinuity(partial[:50], partial[-50:])[1] > 30
+
+def test_report_flags_faded_loop_ends():
+    n = np.arange(10 * SAMPLE_RATE)
+    tone = 10000 * np.sin(2 * np.pi * 50 * n / SAMPLE_RATE)
+    faded = tone * np.minimum(1, np.minimum(n, n[::-1]) / (3 * SAMPLE_RATE))
+    assert analyze_samples(tone.astype(np.int16), SAMPLE_RATE)["seam_dip_db"] > -1
+    assert analyze_samples(faded.astype(np.int16), SAMPLE_RATE)["seam_dip_db"] < -6
+
+def test_seamless_loop_report_is_strict_json():
+    n = np.arange(10 * SAMPLE_RATE)
+    tone = 10000 * np.sin(2 * np.pi * 50 * n / SAMPLE_RATE)
+    faded = np.pad(tone * np.minimum(1, np.minimum(n, n[::-1]) / SAMPLE_RATE), 20)
+    report = analyze_samples(faded.astype(np.int16), SAMPLE_RATE)
+    assert report["seam_ratio_db"] == -np.inf  # silent ends: no jump at all
+    safe = finite_or_none(report)
+    assert safe["seam_ratio_db"] is None
+    assert safe["rms"] == report["rms"]
+    assert json.loads(json.dumps(safe, allow_nan=False))["seam_ratio_db"] is None
+
+def test_silent_input_loudness_exports_as_null():
+    report = analyze_samples(np.zeros(5 * SAMPLE_RATE, dtype=np.int16), SAMPLE_RATE)
+    assert report["integrated_lufs"] == -np.inf and report["true_peak_dbtp"] == -np.inf
+    safe = json.loads(json.dumps(finite_or_none(report), allow_nan=False))
+    assert safe["integrated_lufs"] is None and safe["true_peak_dbtp"] is None
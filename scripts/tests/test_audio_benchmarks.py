@@ -0,0 +1,45 @@
+import audio_benchmarks
+from audio_benchmarks import DURATIONS, IN_MEMORY_LIMIT, compare, load_baseline, save_baseline, select_cases
+
+def test_cases_cover_the_pipeline():
+    names = set(audio_benchmarks.CASES)
+    for expected in ["generate:rain", "stream:brown-noise", "apply_fade", "noise:white",
+                     "analyze:breaks", "fix:repair"]:
+        assert expected in names
+
+def test_long_durations_skip_in_memory_cases():
+    selected = select_cases(durations=["60min"])
+    assert ("stream:brown-noise", "60min") in selected
+    assert ("analyze:breaks", "60min") in selected
+    assert not any(name.startswith("generate:") for name, _ in selected)
+    assert DURATIONS["5min"] <= IN_MEMORY_LIMIT
+    assert ("generate:rain", "5min") in select_cases(durations=["5min"])
+    assert select_cases("fix", ["10s"]) == [("fix:repair", "10s")]
+
+def test_compare_flags_slower_and_larger_cases():
+    baseline = {
+        "a@10s": {"wall_seconds": 1.0, "peak_rss_mb": 100.0},
+        "b@10s": {"wall_seconds": 1.0, "peak_rss_mb": 100.0},
+        "c@10s": {"wall_seconds": 0.001, "peak_rss_mb": 100.0},
+    }
+    results = {
+        "a@10s": {"wall_seconds": 1.2, "peak_rss_mb": 104.0},
+        "b@10s": {"wall_seconds": 1.5, "peak_rss_mb": 130.0},
+        "c@10s": {"wall_seconds": 0.01, "peak_rss_mb": 100.0},  # within the timer slack
+        "new@10s": {"wall_seconds": 9.0, "peak_rss_mb": 900.0},  # no baseline yet
+    }
+    regressions = compare(results, baseline)
+    assert len(regressions) == 2
+    assert all(regression.startswith("b@10s") for regression in regressions)
+
+def test_baseline_round_trip_merges(tmp_path):
+    save_baseline({"a@10s": {"wall_seconds": 1.0, "peak_rss_mb": 1.0}}, str(tmp_path))
+    save_baseline({"b@10s": {"wall_seconds": 2.0, "peak_rss_mb": 2.0}}, str(tmp_path))
+    assert set(load_baseline(str(tmp_path))) == {"a@10s", "b@10s"}
+    assert load_baseline(str(tmp_path / "missing")) == {}
+
+def test_run_case_measures_time_and_rss(tmp_path):
+    for name in ["apply_fade", "analyze:breaks", "fix:repair"]:
+        result = audio_benchmarks.run_case(name, 20, str(tmp_path), repeat=2)  # covers both fades
+        assert result["wall_seconds"] > 0
+        assert result["peak_rss_mb"] > 10
@@ -0,0 +1,82 @@
+import json
+import wave
+
+import numpy as np
+import pytest
+
+import generate_audio
+from audio_bundle import expand_blocks, expand_bundle, load_recipe, read_loop, recipe_path
+from audio_stream import WavStreamWriter, fade_gain
+
+SAMPLE_RATE = 8000
+
+def loop_jobs(*names):
+    jobs = [job for job in generate_audio.build_jobs(duration=2, loop=True) if job[0] in names]
+    for _, _, params in jobs:
+        params["sample_rate"] = SAMPLE_RATE
+    return jobs
+
+def render(tmp_path, names, full_duration=7):
+    for job in loop_jobs(*names):
+        generate_audio.render_bundle(job, str(tmp_path), full_duration=full_duration)
+
+def expand(tmp_path, name, output):
+    path = str(tmp_path / output)
+    with WavStreamWriter(path, SAMPLE_RATE) as writer:
+        expand_bundle(recipe_path(str(tmp_path), name), writer)
+    with open(path, "rb") as f:
+        return f.read()
+
+def test_bundle_recipe_and_loop(tmp_path):
+    render(tmp_path, ["om-drone", "alpha-10hz-binaural"])
+    drone = load_recipe(recipe_path(str(tmp_path), "om-drone"))
+    binaural = load_recipe(recipe_path(str(tmp_path), "alpha-10hz-binaural"))
+
+    assert drone["generator"] == "generate_om_drone"
+    assert drone["duration"] == 7
+    assert drone["loop"]["samples"] == 2 * SAMPLE_RATE
+    # Dual-mono tracks ship a mono loop; binaural beats need both channels
+    assert drone["channels"] == 1
+    assert binaural["channels"] == 2
+    with wave.open(str(tmp_path / drone["loop"]["file"]), "rb") as w:
+        assert w.getnchannels() == 1
+        assert w.getnframes() == 2 * SAMPLE_RATE
+
+def test_expansion_is_deterministic_and_tiles_the_loop(tmp_path):
+    render(tmp_path, ["alpha-10hz-binaural"])
+    first = expand(tmp_path, "alpha-10hz-binaural", "a.wav")
+    assert expand(tmp_path, "alpha-10hz-binaural", "b.wav") == first
+
+    recipe = load_recipe(recipe_path(str(tmp_path), "alpha-10hz-binaural"))
+    loop = read_loop(recipe, str(tmp_path))
+    with wave.open(str(tmp_path / "a.wav"), "rb") as w:
+        assert w.getnframes() == 7 * SAMPLE_RATE
+        frames = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16).reshape(-1, 2)
+
+    # Away from the fades the track is the loop repeated verbatim
+    fade = int(recipe["fade_duration"] * SAMPLE_RATE)
+    middle = np.arange(fade, len(frames) - fade)
+    np.testing.assert_array_equal(frames[middle], loop[middle % len(loop)])
+    gain = fade_gain(0, len(frames), len(frames), fade)
+    assert np.all(np.abs(frames) <= np.abs(loop[np.arange(len(frames)) % len(loop)] * gain[:, None]) + 1)
+
+def test_expand_blocks_are_block_size_independent(tmp_path):
+    render(tmp_path, ["om-drone"])
+    recipe = load_recipe(recipe_path(str(tmp_path), "om-drone"))
+    loop = read_loop(recipe, str(tmp_path))
+    whole = np.concatenate(list(expand_blocks(recipe, loop, block_size=7 * SAMPLE_RATE)))
+    pieces = np.concatenate(list(expand_blocks(recipe, loop, block_size=1234)))
+    np.testing.assert_array_equal(pieces, whole)
+    assert whole.shape == (7 * SAMPLE_RATE, 2)
+    np.testing.assert_array_equal(whole[:, 0], whole[:, 1])
+
+def test_stale_loop_is_rejected(tmp_path):
+    render(tmp_path, ["om-drone"])
+    path = recipe_path(str(tmp_path), "om-drone")
+    with open(path, encoding="utf-8") as f:
+        recipe = json.load(f)
+    recipe["loop"]["sha256"] = "0" * 64
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(recipe, f)
+    with pytest.raises(ValueError):
+        read_loop(load_recipe(path), str(tmp_path))
@@ -0,0 +1,64 @@
+import numpy as np
+
+from audio_repair import crossfade_lengths, nonsilent_chunks, repair_frames, silent_ranges, splice
+
+SAMPLE_RATE = 8000
+
+def loop_join(frames, chunks, crossfade):
+    """Reference: the old append-with-crossfade loop, in plain NumPy"""
+    fixed = frames[chunks[0, 0]:chunks[0, 1]].astype(np.float64)
+    previous = len(fixed)
+    for start, stop in chunks[1:]:
+        chunk = frames[start:stop].astype(np.float64)
+        cf = min(crossfade, len(chunk) // 3, previous // 3)
+        previous = len(chunk)
+        if cf:
+            ramp = (np.arange(cf) / cf)[:, None]
+            overlap = fixed[-cf:] * (1 - ramp) + chunk[:cf] * ramp
+            fixed = np.concatenate((fixed[:-cf], overlap, chunk[cf:]))
+        else:
+            fixed = np.concatenate((fixed, chunk))
+    return np.round(fixed).astype(np.int16)
+
+def gappy_track(gaps, seconds=6, channels=2):
+    rng = np.random.RandomState(3)
+    frames = rng.randint(-8000, 8000, (seconds * SAMPLE_RATE, channels)).astype(np.int16)
+    for start, length in gaps:
+        frames[start:start + length] = rng.randint(-5, 5, (length, channels))
+    return frames
+
+def test_silent_ranges_find_only_long_gaps():
+    # 50 ms = 400 frames at 8 kHz
+    frames = gappy_track([(1000, 399), (5000, 400), (20000, 1600)])
+    assert silent_ranges(frames, SAMPLE_RATE).tolist() == [[5000, 5400], [20000, 21600]]
+
+def test_chunks_keep_a_little_silence():
+    frames = gappy_track([(0, 800), (10000, 800)])
+    keep = 80  # 10 ms
+    assert nonsilent_chunks(frames, SAMPLE_RATE).tolist() == [
+        [800 - keep, 10000 + keep], [10800 - keep, len(frames)],
+    ]
+
+def test_splice_matches_append_loop():
+    # the 360-frame chunk between the first two gaps exercises the 1/3 caps
+    frames = gappy_track([(3000, 500), (3700, 500), (9000, 2000), (30000, 450), (40000, 900)])
+    chunks = nonsilent_chunks(frames, SAMPLE_RATE)
+    assert 360 in (chunks[:, 1] - chunks[:, 0])
+    for crossfade in [0, 37, 800]:
+        np.testing.assert_array_equal(splice(frames, chunks, crossfade), loop_join(frames, chunks, crossfade))
+
+def test_crossfade_lengths_capped_by_neighbours():
+    assert crossfade_lengths(np.array([30, 300, 600, 3000]), 100).tolist() == [0, 10, 100, 100]
+
+def test_repair_without_gaps_only_trims_ends():
+    frames = gappy_track([(0, 4000)])
+    fixed, chunks = repair_frames(frames, SAMPLE_RATE)
+    assert chunks == 1
+    assert len(fixed) == len(frames) - 4000 + 800  # 100 ms padding kept
+
+def test_many_gaps():
+    gaps = [(start, 500) for start in range(1000, 45000, 1100)]
+    frames = gappy_track(gaps)
+    fixed, chunks = repair_frames(frames, SAMPLE_RATE)
+    assert chunks == len(gaps) + 1
+    assert len(silent_ranges(fixed, SAMPLE_RATE)) == 0
@@ -0,0 +1,193 @@
+import os
+import wave
+
+import numpy as np
+import pytest
+from scipy import signal
+
+import generate_audio
+from audio_analysis import seam_dip, seam_discontinuity, window_levels
+from audio_stream import (
+    additive_blocks,
+    atomic_output,
+    block_ranges,
+    envelope_lookup,
+    envelope_period,
+    envelope_table,
+    fade_gain,
+    loop_frequency,
+    looped_blocks,
+    phase_cycles,
+    pulse_envelope,
+    quantize,
+    render_partials,
+    sine_block,
+    WavMemmapWriter,
+    WavStreamWriter,
+    write_wav_stream,
+)
+
+SAMPLE_RATE = 8000
+
+def test_block_ranges_cover_track_exactly():
+    ranges = list(block_ranges(10, 4))
+    assert ranges == [(0, 4), (4, 8), (8, 10)]
+
+def test_sine_blocks_are_phase_continuous():
+    whole = sine_block(440.5, 0, 1000, SAMPLE_RATE)
+    pieces = np.concatenate([
+        sine_block(440.5, start, stop - start, SAMPLE_RATE)
+        for start, stop in block_ranges(1000, 96)
+    ])
+    np.testing.assert_allclose(pieces, whole, atol=1e-12)
+
+def test_additive_kernel_matches_direct_sines():
+    partials = [(136.1, 1.0), (272.2, 0.5, 0.3), (1234.5, 0.25, 2.0)]
+    total = SAMPLE_RATE * 30
+    n = np.arange(total) / SAMPLE_RATE
+    expected = sum(
+        p[1] * np.sin(2 * np.pi * p[0] * n + (p[2] if len(p) > 2 else 0.0))
+        for p in partials
+    )
+    np.testing.assert_allclose(render_partials(partials, total, SAMPLE_RATE), expected, atol=1e-9)
+
+@pytest.mark.parametrize("block_size", [1500, 3000, 4097])
+def test_additive_blocks_stay_in_phase_across_partial_spans(block_size):
+    partials = [(136.1, 1.0), (272.2, 0.5, 0.3), (1234.5, 0.25, 2.0)]
+    total = SAMPLE_RATE * 5
+    n = np.arange(total) / SAMPLE_RATE
+    expected = sum(
+        p[1] * np.sin(2 * np.pi * p[0] * n + (p[2] if len(p) > 2 else 0.0))
+        for p in partials
+    )
+    blocks = np.concatenate(list(additive_blocks(partials, total, SAMPLE_RATE, block_size)))
+    np.testing.assert_allclose(blocks, expected, atol=1e-9)
+
+def test_fade_gain_matches_apply_fade():
+    total, fade = 1000, 120
+    expected = generate_audio.apply_fade(np.ones(total), SAMPLE_RATE, fade / SAMPLE_RATE)
+    gain = np.concatenate([
+        fade_gain(start, stop - start, total, fade)
+        for start, stop in block_ranges(total, 64)
+    ])
+    np.testing.assert_allclose(gain, expected, atol=1e-12)
+
+def test_stream_output_is_independent_of_block_size():
+    large = np.concatenate(list(generate_audio.stream_isochronic_tone(
+        10, duration=2, sample_rate=SAMPLE_RATE, block_size=4096)))
+    small = np.concatenate(list(generate_audio.stream_isochronic_tone(
+        10, duration=2, sample_rate=SAMPLE_RATE, block_size=333)))
+    np.testing.assert_allclose(small, large, atol=1e-9)
+    assert np.max(np.abs(large)) <= 0.8 + 1e-9
+
+def test_stream_matches_in_memory_drone():
+    duration = 20
+    in_memory = generate_audio.generate_om_drone(duration=duration, sample_rate=SAMPLE_RATE)
+    streamed = np.concatenate(list(generate_audio.stream_om_drone(
+        duration=duration, sample_rate=SAMPLE_RATE, block_size=1024)))
+    np.testing.assert_allclose(streamed, in_memory, atol=1e-9)
+
+def test_atomic_output_only_appears_on_success(tmp_path):
+    filename = tmp_path / "track.mp3"
+    with atomic_output(str(filename)) as tmp:
+        assert tmp.endswith(".mp3") and os.path.dirname(tmp) == str(tmp_path)
+        open(tmp, "wb").write(b"new")
+    assert filename.read_bytes() == b"new"
+    with pytest.raises(RuntimeError):
+        with atomic_output(str(filename)) as tmp:
+            open(tmp, "wb").write(b"partial")
+            raise RuntimeError
+    assert filename.read_bytes() == b"new"
+    assert os.listdir(tmp_path) == ["track.mp3"]
+
+def test_write_wav_stream(tmp_path):
+    filename = str(tmp_path / "drone.wav")
+    frames = write_wav_stream(
+        generate_audio.stream_om_drone(duration=1, sample_rate=SAMPLE_RATE),
+        filename, SAMPLE_RATE,
+    )
+    with wave.open(filename) as wav:
+        assert wav.getnframes() == frames == SAMPLE_RATE
+        assert wav.getnchannels() == 2
+        assert wav.getsampwidth() == 2
+
+def test_memmap_writer_matches_stream_writer(tmp_path):
+    audio = generate_audio.generate_om_drone(duration=21, sample_rate=SAMPLE_RATE)
+    with WavStreamWriter(str(tmp_path / "stream.wav"), SAMPLE_RATE) as writer:
+        writer.write(audio)
+    with WavMemmapWriter(str(tmp_path / "memmap.wav"), SAMPLE_RATE, len(audio)) as writer:
+        # Fill through strided column views, as the generators do
+        quantize(audio[:, 0], writer.frames[:, 0])
+        quantize(audio[:, 1], writer.frames[:, 1])
+    assert (tmp_path / "memmap.wav").read_bytes() == (tmp_path / "stream.wav").read_bytes()
+
+def test_loop_frequency_completes_whole_cycles():
+    f = loop_frequency(136.1 * 1.5, 3 * SAMPLE_RATE + 7, SAMPLE_RATE)
+    cycles = f * (3 * SAMPLE_RATE + 7) / SAMPLE_RATE
+    assert abs(cycles - round(cycles)) < 1e-9
+    assert abs(f - 136.1 * 1.5) < 0.5
+
+def test_looped_blocks_wrap_the_overhang_into_the_head():
+    rng = np.random.RandomState(0)
+    render = rng.randn(1300, 2)
+    loop, fade = 1000, 300
+    whole = np.concatenate(list(looped_blocks([render], loop, fade)))
+    ramp = (np.arange(fade) / fade)[:, None]
+    np.testing.assert_allclose(whole[:700], render[300:1000])
+    np.testing.assert_allclose(whole[700:], render[1000:] * (1 - ramp) + render[:300] * ramp)
+    for size in [1, 77, 300, 1000]:
+        pieces = [render[i:i + size] for i in range(0, len(render), size)]
+        np.testing.assert_allclose(np.concatenate(list(looped_blocks(pieces, loop, fade))), whole)
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_loop_renders_are_seamless(stream):
+    for job in generate_audio.build_jobs(duration=4, loop=True):
+        name, _, params = job
+        params["sample_rate"] = SAMPLE_RATE
+        generator = generate_audio.job_generator(job, stream)
+        rendered = getattr(generate_audio, generator)(**generate_audio.job_kwargs(job, stream))
+        blocks = [rendered] if isinstance(rendered, np.ndarray) else rendered
+        audio = np.concatenate(list(generate_audio.loop_render(job, blocks)))
+        assert len(audio) == 4 * SAMPLE_RATE, name
+
+        pcm = np.round(audio * 32767)
+        _, ratio = seam_discontinuity(pcm[:80], pcm[-80:])
+        rms, _ = window_levels(pcm, SAMPLE_RATE, 32768.0)
+        assert ratio < 12, name
+        assert seam_dip(rms) > -6, name
+
+@pytest.mark.parametrize("rate, duty", [(4, 0.5), (10, 0.3), (16, 0.5)])
+def test_envelope_matches_filtered_square_wave(rate, duty):
+    n = np.arange(20 * SAMPLE_RATE)
+    square = signal.square(2 * np.pi * rate * n / SAMPLE_RATE, duty=duty)
+    sos = signal.butter(4, rate * 2, btype='low', fs=SAMPLE_RATE, output='sos')
+    expected = (signal.sosfiltfilt(sos, square) + 1) / 2
+    envelope = pulse_envelope(rate, 0, len(n), SAMPLE_RATE, duty)
+    # Steady state only; the sampled square's edge samples account for the rest
+    middle = slice(5 * SAMPLE_RATE, 15 * SAMPLE_RATE)
+    np.testing.assert_allclose(envelope[middle], expected[middle], atol=0.01 * rate / 16)
+
+@pytest.mark.parametrize("shape", ["butterworth", "cosine", "linear"])
+@pytest.mark.parametrize("rate", [8, 7.3, 2 ** 0.5])
+def test_pulse_envelope_blocks_join_and_match_the_table(shape, rate):
+    total = 3 * SAMPLE_RATE + 11
+    whole = pulse_envelope(rate, 0, total, SAMPLE_RATE, 0.4, shape)
+    pieces = np.concatenate([
+        pulse_envelope(rate, start, stop - start, SAMPLE_RATE, 0.4, shape)
+        for start, stop in block_ranges(total, 777)
+    ])
+    np.testing.assert_array_equal(pieces, whole)
+    table = envelope_table(rate, 0.4, SAMPLE_RATE, shape)
+    np.testing.assert_allclose(whole, envelope_lookup(phase_cycles(rate, 0, total, SAMPLE_RATE), table), atol=1e-9)
+    assert abs(table[:-1].mean() - 0.4) < 1e-6
+
+def test_envelope_period_is_exact_for_rational_rates():
+    assert len(envelope_period(8, 0.5, SAMPLE_RATE)) == 1000
+    assert len(envelope_period(7.5, 0.5, SAMPLE_RATE)) == 3200  # 3 cycles
+    assert envelope_period(2 ** 0.5, 0.5, SAMPLE_RATE) is None
+
+def test_ramp_must_fit_the_pulse():
+    with pytest.raises(ValueError):
+        envelope_table(10, 0.1, SAMPLE_RATE, "cosine", 0.2)
+    with pytest.raises(ValueError):
+        envelope_table(10, 0.5, SAMPLE_RATE, "square")
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from scipy import signal
+
+import generate_audio
+from audio_stream import BLOCK_SIZE
+from colored_noise import (
+    BROWN_EXPONENT,
+    OCEAN_EXPONENT,
+    PINK_EXPONENT,
+    WhiteNoise,
+    colored_noise_blocks,
+)
+
+SAMPLE_RATE = 44100
+DURATION = 10
+
+def fft_reference(exponent, samples):
+    """Same 1/f**exponent FFT shaping generate_audio.py uses"""
+    fft = np.fft.rfft(np.random.RandomState(0).randn(samples))
+    freqs = np.fft.rfftfreq(samples, 1 / SAMPLE_RATE)
+    freqs[0] = 1
+    fft *= 1 / freqs ** exponent
+    return np.fft.irfft(fft, n=samples)
+
+def spectral_slope(audio):
+    """Fitted PSD slope in dB/decade over 20 Hz - 10 kHz"""
+    freqs, power = signal.welch(audio, SAMPLE_RATE, nperseg=8192)
+    band = (freqs > 20) & (freqs < 10000)
+    return np.polyfit(np.log10(freqs[band]), 10 * np.log10(power[band]), 1)[0]
+
+def streamed(exponent, samples, block_size=BLOCK_SIZE, seed=1):
+    return np.concatenate(list(colored_noise_blocks(
+        exponent, samples, SAMPLE_RATE, WhiteNoise(seed), block_size=block_size)))
+
+@pytest.mark.parametrize("exponent", [PINK_EXPONENT, OCEAN_EXPONENT, BROWN_EXPONENT])
+def test_streamed_slope_matches_fft_reference(exponent):
+    samples = SAMPLE_RATE * DURATION
+    reference = spectral_slope(fft_reference(exponent, samples))
+    assert abs(spectral_slope(streamed(exponent, samples)) - reference) < 0.5
+
+def test_streamed_slope_matches_generators():
+    samples = SAMPLE_RATE * DURATION
+    pink = generate_audio.generate_pink_noise(DURATION, SAMPLE_RATE, noise=WhiteNoise(0))
+    brown = generate_audio.generate_brown_noise(DURATION, SAMPLE_RATE, noise=WhiteNoise(0))[:, 0]
+    assert abs(spectral_slope(streamed(PINK_EXPONENT, samples)) - spectral_slope(pink)) < 0.5
+    assert abs(spectral_slope(streamed(BROWN_EXPONENT, samples)) - spectral_slope(brown)) < 0.5
+
+def test_streamed_noise_is_block_size_independent():
+    samples = SAMPLE_RATE * 2
+    np.testing.assert_array_equal(
+        streamed(PINK_EXPONENT, samples, block_size=1000),
+        streamed(PINK_EXPONENT, samples, block_size=BLOCK_SIZE),
+    )
+
+def test_white_noise_ranges_are_independent_of_how_they_are_read():
+    noise = WhiteNoise((5, 7))
+    whole = noise.read(0, 200000)
+    np.testing.assert_array_equal(WhiteNoise((5, 7)).read(123456, 1000), whole[123456:124456])
+    pieces = np.concatenate([WhiteNoise((5, 7)).read(start, 777) for start in range(0, 200000, 777)])
+    np.testing.assert_array_equal(pieces[:200000], whole)
+    # Children and other seeds are independent streams
+    assert abs(np.corrcoef(whole, noise.child(0).read(0, 200000))[0, 1]) < 0.01
+    assert abs(np.corrcoef(whole, WhiteNoise((5, 8)).read(0, 200000))[0, 1]) < 0.01
+    assert abs(np.std(whole) - 1) < 0.01
+
+def test_streamed_noise_stays_under_peak_target():
+    audio = streamed(BROWN_EXPONENT, SAMPLE_RATE * DURATION)
+    assert np.max(np.abs(audio)) < 0.8
+
+def test_stream_ocean_noise_is_finite_and_bounded():
+    audio = np.concatenate(list(generate_audio.stream_ocean_noise(duration=DURATION, noise=WhiteNoise(0))))
+    assert np.all(np.isfinite(audio))
+    assert np.max(np.abs(audio)) < 1.0
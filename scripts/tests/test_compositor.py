@@ -0,0 +1,134 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+from scipy.io import wavfile
+
+import generate_audio
+from audio_stream import fade_gain
+from compositor import (
+    PeakLimiter,
+    automation_gain,
+    compose,
+    layer_job,
+    limited_blocks,
+    load_preset,
+    mixed_blocks,
+    validate_preset,
+)
+
+SAMPLE_RATE = 8000
+PRESETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "presets")
+
+def preset(**overrides):
+    return validate_preset({
+        "name": "test",
+        "duration": 25,
+        "sample_rate": SAMPLE_RATE,
+        "layers": [
+            {"generator": "generate_binaural_beat", "params": {"frequency": 6, "carrier": 200}, "gain": 0.9},
+            {"track": "pink-noise", "gain": 0.9},
+        ],
+        **overrides,
+    })
+
+def limited(audio, limiter, block_size):
+    blocks = (audio[i:i + block_size] for i in range(0, len(audio), block_size))
+    return np.concatenate(list(limited_blocks(blocks, limiter)))
+
+def test_example_presets_are_valid():
+    paths = glob.glob(os.path.join(PRESETS_DIR, "*.json"))
+    assert paths
+    for path in paths:
+        assert load_preset(path)["name"] == os.path.splitext(os.path.basename(path))[0]
+
+def test_invalid_presets_are_rejected():
+    with pytest.raises(ValueError, match="unknown track"):
+        preset(layers=[{"track": "no-such-track"}])
+    with pytest.raises(ValueError, match="unknown generator"):
+        preset(layers=[{"generator": "generate_binaural_batch"}])
+    with pytest.raises(ValueError, match="automation"):
+        preset(layers=[{"track": "rain", "automation": [[10, 1], [5, 0]]}])
+    with pytest.raises(ValueError, match="missing"):
+        validate_preset({"name": "x", "layers": []})
+
+def test_catalogue_tracks_keep_their_parameters():
+    layer = preset(layers=[{"track": "alpha-10hz-binaural", "params": {"carrier": 300}}])["layers"][0]
+    assert layer["generator"] == "generate_binaural_beat"
+    assert layer["params"]["carrier"] == 300
+    assert "frequency" in layer["params"] and "duration" not in layer["params"]
+
+def test_automation_interpolates_breakpoints():
+    gain = automation_gain([[1, 0], [2, 1]], 0, 3 * SAMPLE_RATE, SAMPLE_RATE)
+    assert gain[0] == 0 and gain[SAMPLE_RATE] == 0
+    assert gain[SAMPLE_RATE + SAMPLE_RATE // 2] == pytest.approx(0.5)
+    assert gain[-1] == 1
+    np.testing.assert_array_equal(automation_gain([], 5, 4, SAMPLE_RATE), np.ones(4))
+
+def test_single_layer_matches_the_stream_generator():
+    p = preset(layers=[{"track": "theta-6hz-binaural"}], fade=0)
+    mix = np.concatenate(list(mixed_blocks(p, block_size=4096)))
+    name, generator, params = layer_job(p, 0)
+    job = (name, generator, {**params, "block_size": 4096})
+    func = getattr(generate_audio, generate_audio.job_generator(job, stream=True))
+    direct = np.concatenate(list(func(**generate_audio.job_kwargs(job, stream=True, fade_duration=0))))
+    np.testing.assert_array_equal(mix, direct)
+
+def test_fade_zero_leaves_no_ramp():
+    p = preset(layers=[{"track": "theta-6hz-binaural"}], fade=0)
+    mix = np.concatenate(list(mixed_blocks(p, block_size=4096)))
+    # Full level from the very first second: no generator fade underneath
+    head = np.abs(mix[:SAMPLE_RATE]).max()
+    middle = np.abs(mix[12 * SAMPLE_RATE:13 * SAMPLE_RATE]).max()
+    assert head == pytest.approx(middle, rel=0.05)
+    assert np.abs(mix[:100]).max() > 0.5
+
+def test_master_fade_is_applied_once():
+    faded = np.concatenate(list(mixed_blocks(preset(fade=10), block_size=4096)))
+    unfaded = np.concatenate(list(mixed_blocks(preset(fade=0), block_size=4096)))
+    total = 25 * SAMPLE_RATE
+    ramp = fade_gain(0, total, total, 10 * SAMPLE_RATE)
+    np.testing.assert_allclose(faded, unfaded * ramp[:, None], atol=1e-12)
+
+def test_mix_is_independent_of_block_size():
+    p = preset(layers=[
+        *preset()["layers"],
+        {"track": "rain", "gain": 0.5, "automation": [[0, 0], [20, 1]]},
+        {"track": "om-drone", "gain": 0.5},
+    ])
+    large = np.concatenate(list(mixed_blocks(p, block_size=8192)))
+    small = np.concatenate(list(mixed_blocks(p, block_size=3000)))
+    assert len(large) == 25 * SAMPLE_RATE
+    np.testing.assert_allclose(small, large, atol=1e-9)
+
+def test_limiter_holds_the_ceiling_and_leaves_quiet_audio_alone():
+    rng = np.random.default_rng(0)
+    audio = rng.uniform(-0.5, 0.5, (20000, 2))
+    audio[5000:5100] *= 4
+    audio[12000] = [3.0, -0.2]
+    limiter = PeakLimiter(SAMPLE_RATE, ceiling_db=-1.0)
+    out = limited(audio, limiter, 1024)
+    assert out.shape == audio.shape
+    assert np.abs(out).max() <= limiter.ceiling + 1e-12
+    assert limiter.min_gain == pytest.approx(limiter.ceiling / 3.0)
+    assert 0 < limiter.limited_samples < len(audio) // 4
+    # Well away from the peaks nothing changes
+    np.testing.assert_array_equal(out[:4000], audio[:4000])
+    np.testing.assert_array_equal(out[15000:], audio[15000:])
+
+def test_limiter_output_does_not_depend_on_block_size():
+    audio = np.random.default_rng(1).uniform(-1.5, 1.5, (9000, 2))
+    large = limited(audio, PeakLimiter(SAMPLE_RATE), 4096)
+    small = limited(audio, PeakLimiter(SAMPLE_RATE), 7)
+    np.testing.assert_allclose(small, large, atol=1e-12)
+
+def test_compose_writes_a_limited_track(tmp_path):
+    p = preset(layers=[{**layer, "gain": 2.0} for layer in preset()["layers"]])
+    filename = tmp_path / "test.wav"
+    limiter = compose(p, str(filename), block_size=4096)
+    rate, data = wavfile.read(filename)
+    assert rate == SAMPLE_RATE
+    assert data.shape == (25 * SAMPLE_RATE, 2)
+    assert limiter.limited_samples > 0
+    assert np.abs(data.astype(np.int32)).max() <= round(limiter.ceiling * 32767)
@@ -0,0 +1,51 @@
+import sys
+
+import numpy as np
+import pytest
+
+from audio_stream import quantize
+from encode_audio import EncoderStreamWriter, encoder_command, extension_profile
+
+# Stand-in encoder: copies raw PCM from stdin to the output file
+COPY_ENCODER = [
+    sys.executable, "-c",
+    "import shutil, sys; shutil.copyfileobj(sys.stdin.buffer, open(sys.argv[1], 'wb'))",
+]
+
+def test_writer_pipes_quantised_pcm(tmp_path):
+    filename = str(tmp_path / "out.raw")
+    blocks = [np.random.RandomState(i).uniform(-0.8, 0.8, (1000, 2)) for i in range(3)]
+    with EncoderStreamWriter(COPY_ENCODER + [filename], filename) as writer:
+        for block in blocks:
+            writer.write(block)
+
+    written = np.fromfile(filename, dtype="<i2").reshape(-1, 2)
+    np.testing.assert_array_equal(written, quantize(np.concatenate(blocks)))
+
+def test_writer_reports_encoder_failure(tmp_path):
+    failing = [sys.executable, "-c", "import sys; sys.stderr.write('bad bitrate'); sys.exit(3)"]
+    writer = EncoderStreamWriter(failing, str(tmp_path / "out.mp3"))
+    with pytest.raises(RuntimeError, match="bad bitrate"):
+        writer.close()
+
+def test_encoder_commands_read_pcm_from_stdin():
+    ffmpeg = encoder_command("mp3-128", "out.mp3", 44100)
+    assert ffmpeg[0] == "ffmpeg"
+    assert ffmpeg[ffmpeg.index("-i") + 1] == "pipe:0"
+    assert ffmpeg[-1] == "out.mp3"
+
+    lame = encoder_command("lame-128", "out.mp3", 44100)
+    assert lame[:2] == ["lame", "--quiet"]
+    assert lame[-2:] == ["-", "out.mp3"]
+
+def test_extension_profile_follows_the_output_extension():
+    assert extension_profile(".mp3") == "mp3-128"
+    assert extension_profile(".OPUS") == "opus-96"
+    assert extension_profile(".mp3", "lame-128") == "lame-128"
+    assert extension_profile(".wav") is None
+    with pytest.raises(ValueError, match="writes .mp3, not .opus"):
+        extension_profile(".opus", "mp3-192")
+    with pytest.raises(ValueError, match="not .wav"):
+        extension_profile(".wav", "mp3-128")
+    with pytest.raises(ValueError, match="no encoder profile"):
+        extension_profile(".flac")
@@ -0,0 +1,170 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+import generate_audio
+from colored_noise import WhiteNoise
+from encode_audio import EncoderStreamWriter
+
+SAMPLE_RATE = 8000
+DURATION = 25  # must cover both 10 s fades
+
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+def test_binaural_batch_matches_single_renders(dtype):
+    seeds = {200: 1, 220: 2}
+    specs = [(f, c, seeds[c]) for f, c in generate_audio.frequency_grid([2, 3.5, 10], [200, 220])]
+    batch = generate_audio.generate_binaural_batch(specs, DURATION, SAMPLE_RATE, dtype)
+    for (frequency, carrier, seed), audio in zip(specs, batch):
+        expected = generate_audio.generate_binaural_beat(
+            frequency, carrier, DURATION, SAMPLE_RATE, dtype, noise=WhiteNoise(seed))
+        np.testing.assert_array_equal(audio, expected)
+
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+def test_isochronic_batch_matches_single_renders(dtype):
+    specs = generate_audio.frequency_grid([4, 10, 20], [150, 180])
+    batch = generate_audio.generate_isochronic_batch(specs, DURATION, SAMPLE_RATE, dtype)
+    for (frequency, base_tone), audio in zip(specs, batch):
+        expected = generate_audio.generate_isochronic_tone(frequency, base_tone, DURATION, SAMPLE_RATE, dtype)
+        np.testing.assert_array_equal(audio, expected)
+
+def test_loop_batch_matches_single_renders():
+    specs = [(2, 220, 7), (3, 220, 7)]
+    batch = generate_audio.generate_binaural_batch(specs, 5, SAMPLE_RATE, loop_duration=4)
+    for (frequency, carrier, seed), audio in zip(specs, batch):
+        expected = generate_audio.generate_binaural_beat(
+            frequency, carrier, 5, SAMPLE_RATE, loop_duration=4, noise=WhiteNoise(seed))
+        np.testing.assert_array_equal(audio, expected)
+
+def test_grid_batches_cover_the_grid():
+    batches = generate_audio.build_grid_batches([2, 4, 8], [200, 220], [180], duration=60, workers=4)
+    names = [name for _, _, names in batches for name in names]
+    assert len(names) == len(set(names)) == 3 * 2 + 3
+    assert "grid-2hz-220hz-binaural" in names and "grid-8hz-180hz-isochronic" in names
+    for generator, params, names in batches:
+        assert len(params["specs"]) == len(names)
+    # One pink bed for the whole binaural grid
+    seeds = {spec[2] for generator, params, _ in batches if "binaural" in generator for spec in params["specs"]}
+    assert len(seeds) == 1
+
+def test_grid_renders_are_published(tmp_path):
+    generate_audio.main([
+        "--grid", "4,8", "-d", "21", "-o", str(tmp_path / "out"), "--publish", str(tmp_path / "dist"),
+    ])
+    with open(tmp_path / "dist" / "manifest.json", encoding="utf-8") as f:
+        tracks = json.load(f)["tracks"]
+    assert set(tracks) == {
+        "grid-4hz-220hz-binaural", "grid-8hz-220hz-binaural", "grid-4hz-180hz-isochronic", "grid-8hz-180hz-isochronic",
+    }
+
+def test_publish_is_rejected_with_bundles(tmp_path):
+    with pytest.raises(SystemExit):
+        generate_audio.parse_args(["--bundle", "--publish", str(tmp_path)])
+
+def test_parse_values():
+    assert generate_audio.parse_values("1,2.5,4:12:2") == [1, 2.5, 4, 6, 8, 10, 12]
+    assert generate_audio.parse_values("1:2:0.25") == [1, 1.25, 1.5, 1.75, 2]
+
+NOISE_TRACKS = ["alpha-10hz-binaural", "pink-noise", "brown-noise", "ocean-waves", "rain", "wind"]
+
+def noise_jobs(stream=False, **extra):
+    jobs = [
+        job for job in generate_audio.build_jobs(duration=21) if job[0] in NOISE_TRACKS
+        and (not stream or job[1] in generate_audio.STREAM_GENERATORS)
+    ]
+    for _, _, params in jobs:
+        params.update(extra)
+    return jobs
+
+def read_outputs(directory):
+    outputs = {}
+    for name in sorted(os.path.splitext(file)[0] for file in os.listdir(directory)):
+        with open(directory / f"{name}.wav", "rb") as f:
+            outputs[name] = f.read()
+    return outputs
+
+def test_renders_are_byte_identical_across_runs_and_workers(tmp_path):
+    assert len(noise_jobs()) == len(NOISE_TRACKS)
+    for run, workers in [("a", 1), ("b", 1), ("c", 2)]:
+        (tmp_path / run).mkdir()
+        generate_audio.run_jobs(noise_jobs(), str(tmp_path / run), workers)
+    first = read_outputs(tmp_path / "a")
+    assert read_outputs(tmp_path / "b") == first
+    assert read_outputs(tmp_path / "c") == first
+
+    (tmp_path / "d").mkdir()
+    generate_audio.run_jobs(noise_jobs(), str(tmp_path / "d"), seed=1)
+    reseeded = read_outputs(tmp_path / "d")
+    assert all(reseeded[name] != first[name] for name in NOISE_TRACKS)
+    assert len(first) == len(NOISE_TRACKS)
+
+def test_streamed_renders_do_not_depend_on_block_size(tmp_path):
+    for run, block_size in [("a", generate_audio.BLOCK_SIZE), ("b", 4096)]:
+        (tmp_path / run).mkdir()
+        jobs = noise_jobs(stream=True, block_size=block_size)
+        generate_audio.run_jobs(jobs, str(tmp_path / run), stream=True)
+    streamed = read_outputs(tmp_path / "a")
+    assert len(streamed) == 6
+    assert read_outputs(tmp_path / "b") == streamed
+
+def test_memmap_renders_match_float_renders(tmp_path):
+    jobs = generate_audio.build_jobs(duration=21)
+    assert len(jobs) == 21
+    (tmp_path / "memmap").mkdir()
+    generate_audio.run_jobs(jobs, str(tmp_path / "memmap"))
+    for job in jobs:
+        name, _, params = job
+        audio = getattr(generate_audio, job[1])(**generate_audio.job_kwargs(job))
+        generate_audio.save_audio(audio, str(tmp_path / f"{name}.wav"))
+        assert (tmp_path / "memmap" / f"{name}.wav").read_bytes() == (tmp_path / f"{name}.wav").read_bytes(), name
+
+def test_failed_memmap_render_keeps_the_original_error(tmp_path, monkeypatch):
+    job = ("om-drone", "generate_om_drone", {"duration": 21})
+    # The output directory does not exist, so the memmap file is never created
+    with pytest.raises(FileNotFoundError) as excinfo:
+        generate_audio.render_track(job, str(tmp_path / "missing"))
+    # Raised by the writer itself, not by the cleanup while handling it
+    assert excinfo.value.__context__ is None
+
+    def broken(**kwargs):
+        raise RuntimeError("synthesis failed")
+
+    monkeypatch.setattr(generate_audio, "generate_broken", broken, raising=False)
+    with pytest.raises(RuntimeError, match="synthesis failed"):
+        generate_audio.render_track(("broken", "generate_broken", {"duration": 21}), str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+def test_failed_stream_leaves_no_output(tmp_path):
+    def blocks():
+        yield np.zeros((1000, 2))
+        raise RuntimeError("stream failed")
+
+    filename = tmp_path / "track.wav"
+    with pytest.raises(RuntimeError, match="stream failed"):
+        generate_audio.write_blocks(blocks(), str(filename), sample_rate=SAMPLE_RATE)
+    assert os.listdir(tmp_path) == []
+
+    # A finished render replaces the previous file only once it is complete
+    generate_audio.write_blocks([np.zeros((1000, 2))], str(filename), sample_rate=SAMPLE_RATE)
+    with pytest.raises(RuntimeError, match="stream failed"):
+        generate_audio.write_blocks(blocks(), str(filename), sample_rate=SAMPLE_RATE)
+    assert os.listdir(tmp_path) == ["track.wav"]
+
+def test_failed_encoder_leaves_no_output(tmp_path, monkeypatch):
+    # Writes what it was sent, then exits non-zero the way a crashing encoder does
+    partial = [sys.executable, "-c", "import shutil, sys; shutil.copyfileobj(sys.stdin.buffer, open(sys.argv[1], 'wb')); sys.exit(1)"]
+    monkeypatch.setattr(generate_audio, "open_encoder",
+                        lambda fmt, filename, *args: EncoderStreamWriter(partial + [filename], filename))
+    with pytest.raises(RuntimeError, match="encoder failed"):
+        generate_audio.write_blocks([np.zeros((1000, 2))], str(tmp_path / "track.mp3"), "mp3-128", SAMPLE_RATE)
+    assert os.listdir(tmp_path) == []
+
+@pytest.mark.parametrize("track", ["rain", "wind"])
+def test_streamed_ambient_noise_matches_in_memory(track):
+    generate = getattr(generate_audio, f"generate_{track}_noise")
+    stream = getattr(generate_audio, f"stream_{track}_noise")
+    in_memory = generate(DURATION, SAMPLE_RATE, noise=WhiteNoise(5))
+    streamed = np.concatenate(list(stream(DURATION, SAMPLE_RATE, block_size=3000, noise=WhiteNoise(5))))
+    np.testing.assert_allclose(streamed, in_memory, atol=1e-9)
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from loudness import LoudnessMeter, k_weighting, measure_loudness, normalization_gain
+
+SAMPLE_RATE = 48000
+
+def sine(frequency, seconds, phase=0.0, sample_rate=SAMPLE_RATE):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return np.sin(2 * np.pi * frequency * t + phase)
+
+def test_k_weighting_matches_bs1770_table():
+    sos = k_weighting(48000)
+    np.testing.assert_allclose(sos[0, :3], [1.53512485958697, -2.69169618940638, 1.19839281085285], rtol=1e-9)
+    np.testing.assert_allclose(sos[0, 4:], [-1.69065929318241, 0.73248077421585], rtol=1e-9)
+    np.testing.assert_allclose(sos[1, 4:], [-1.99004745483398, 0.99007225036621], rtol=1e-9)
+
+def test_full_scale_sine_calibration():
+    tone = sine(997, 5)
+    both = measure_loudness([np.column_stack((tone, tone))], SAMPLE_RATE)
+    one = measure_loudness([np.column_stack((tone, np.zeros_like(tone)))], SAMPLE_RATE)
+    assert both["integrated_lufs"] == pytest.approx(0.0, abs=0.02)
+    assert one["integrated_lufs"] == pytest.approx(-3.01, abs=0.02)
+
+def test_true_peak_finds_inter_sample_peak():
+    # Quarter-rate sine at 45 degrees: every sample is +/-0.707, the waveform peaks at 1.0
+    tone = sine(SAMPLE_RATE / 4, 1, np.pi / 4)
+    report = measure_loudness([tone], SAMPLE_RATE, channels=1)
+    assert np.max(np.abs(tone)) == pytest.approx(0.7071, abs=1e-3)
+    assert report["true_peak_dbtp"] == pytest.approx(0.0, abs=0.2)
+
+def test_gating_ignores_silence():
+    tone = 0.1 * sine(997, 3)
+    padded = np.concatenate((tone, np.zeros(10 * SAMPLE_RATE)))
+    plain = measure_loudness([tone], SAMPLE_RATE, channels=1)
+    gated = measure_loudness([padded], SAMPLE_RATE, channels=1)
+    # Ungated, 10 s of silence would pull the reading down by ~6.4 LU
+    assert gated["integrated_lufs"] == pytest.approx(plain["integrated_lufs"], abs=0.3)
+    assert measure_loudness([np.zeros(SAMPLE_RATE)], SAMPLE_RATE, 1)["integrated_lufs"] == -np.inf
+
+def test_block_size_independence():
+    rng = np.random.RandomState(0)
+    audio = 0.2 * rng.randn(3 * SAMPLE_RATE + 123, 2)
+    whole = measure_loudness([audio], SAMPLE_RATE)
+    for block_size in [1000, 4800, 65536]:
+        meter = LoudnessMeter(SAMPLE_RATE)
+        for start in range(0, len(audio), block_size):
+            meter.feed(audio[start:start + block_size])
+        report = meter.report()
+        assert report["integrated_lufs"] == pytest.approx(whole["integrated_lufs"], abs=1e-9)
+        assert report["true_peak"] == pytest.approx(whole["true_peak"], rel=1e-6)
+
+def test_normalization_gain_respects_ceiling():
+    report = {"integrated_lufs": -30.0, "true_peak": 0.1}
+    gain, limited = normalization_gain(report, -20.0)
+    assert gain == pytest.approx(10 ** 0.5) and not limited
+    gain, limited = normalization_gain(report, -5.0, ceiling_dbtp=-1.0)
+    assert limited and 0.1 * gain == pytest.approx(10 ** (-1 / 20))
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from scipy import signal
+
+from colored_noise import WhiteNoise
+from modulation import (
+    control_blocks,
+    control_factor,
+    control_noise,
+    control_times,
+    design_sos,
+    modulate,
+    sos_blocks,
+    upsample,
+)
+
+SAMPLE_RATE = 8000
+
+def test_designs_are_cached_and_two_passes_square_the_response():
+    sos = design_sos(4, (200, 2000), 'band', SAMPLE_RATE)
+    assert design_sos(4, (200, 2000), 'band', SAMPLE_RATE) is sos
+    twice = design_sos(4, (200, 2000), 'band', SAMPLE_RATE, passes=2)
+    _, h = signal.sosfreqz(sos, worN=512, fs=SAMPLE_RATE)
+    _, h2 = signal.sosfreqz(twice, worN=512, fs=SAMPLE_RATE)
+    np.testing.assert_allclose(np.abs(h2), np.abs(h) ** 2, atol=1e-12)
+
+def test_upsample_interpolates_linearly():
+    control = np.random.default_rng(0).standard_normal(50)
+    factor = 7
+    positions = np.arange(3, 300) / factor
+    np.testing.assert_allclose(upsample(control, factor, 3, 297), np.interp(positions, np.arange(50), control))
+
+def test_blocks_do_not_depend_on_block_size():
+    total = 20000
+    sos = design_sos(4, 2000, 'high', SAMPLE_RATE, passes=2)
+    large = np.concatenate(list(sos_blocks(sos, WhiteNoise(3), total, block_size=8192)))
+    small = np.concatenate(list(sos_blocks(sos, WhiteNoise(3), total, block_size=1000)))
+    np.testing.assert_array_equal(small, large)
+
+    control = np.linspace(0, 1, len(control_times(total, SAMPLE_RATE)))
+    large = np.concatenate(list(control_blocks(control, SAMPLE_RATE, total, block_size=8192)))
+    small = np.concatenate(list(control_blocks(control, SAMPLE_RATE, total, block_size=999)))
+    np.testing.assert_array_equal(small, large)
+    audio = np.ones(total)
+    np.testing.assert_array_equal(modulate(audio, control, SAMPLE_RATE, block_size=1234), large)
+
+@pytest.mark.parametrize("sample_rate", [8000, 44100])
+def test_control_noise_stays_in_band(sample_rate):
+    # A 0.5-2 Hz band-pass, which is unstable as (b, a) at audio rates
+    control_rate = sample_rate / control_factor(sample_rate)
+    sos = design_sos(4, (0.5, 2), 'band', control_rate)
+    swell = control_noise(sos, WhiteNoise(1), 600 * sample_rate, sample_rate)
+    assert len(swell) == 600 * sample_rate // control_factor(sample_rate) + 2
+    assert np.all(np.isfinite(swell))
+    freqs, power = signal.welch(swell, fs=control_rate, nperseg=4096)
+    band = (freqs >= 0.5) & (freqs <= 2)
+    assert power[band].sum() > 0.8 * power.sum()
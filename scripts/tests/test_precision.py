@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+import generate_audio
+
+SAMPLE_RATE = 8000
+DURATION = 24  # must exceed both 10 s fades
+
+GENERATORS = [
+    ("generate_binaural_beat", {"frequency": 10}),
+    ("generate_isochronic_tone", {"frequency": 10}),
+    ("generate_brown_noise", {}),
+    ("generate_pink_noise_track", {}),
+    ("generate_ocean_noise", {}),
+    ("generate_rain_noise", {}),
+    ("generate_wind_noise", {}),
+    ("generate_om_drone", {}),
+    ("generate_low_harmonic_pad", {}),
+]
+
+def render(generator, params, dtype):
+    func = getattr(generate_audio, generator)
+    job = ("precision", generator, dict(params, duration=DURATION, sample_rate=SAMPLE_RATE, dtype=dtype))
+    return func(**generate_audio.job_kwargs(job, seed=1234))
+
+@pytest.mark.parametrize("generator,params", GENERATORS)
+def test_float32_quantises_within_one_lsb(generator, params):
+    reference = render(generator, params, "float64")
+    single = render(generator, params, "float32")
+    assert single.dtype == np.float32
+
+    diff = generate_audio.quantize(single).astype(np.int32) - generate_audio.quantize(reference)
+    assert np.max(np.abs(diff)) <= 1
+
+def test_quantize_matches_legacy_conversion():
+    audio = np.random.RandomState(0).uniform(-1, 1, (1000, 2))
+    np.testing.assert_array_equal(generate_audio.quantize(audio), np.int16(audio * 32767))
@@ -0,0 +1,54 @@
+import os
+
+import generate_audio
+from render_cache import RenderCache
+
+def write_file(path, size):
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+
+def test_key_tracks_parameters_and_stream_mode():
+    job = ("alpha-10hz-binaural", "generate_binaural_beat", {"frequency": 10, "duration": 30})
+    same = ("alpha-10hz-binaural", "generate_binaural_beat", {"frequency": 10, "duration": 30})
+    other = ("alpha-10hz-binaural", "generate_binaural_beat", {"frequency": 10, "duration": 31})
+    defaults = ("alpha-10hz-binaural", "generate_binaural_beat", {"frequency": 10, "duration": 30, "carrier": 220})
+    key = generate_audio.job_cache_key(job)
+    assert key == generate_audio.job_cache_key(same)
+    assert key == generate_audio.job_cache_key(defaults)
+    assert key != generate_audio.job_cache_key(other)
+    assert key != generate_audio.job_cache_key(job, stream=True)
+
+def test_key_tracks_helper_sources(tmp_path, monkeypatch):
+    helper = tmp_path / "helper.py"
+    helper.write_text("GAIN = 1\n")
+    monkeypatch.setattr(generate_audio, "render_sources", lambda: [str(helper)])
+    job = ("alpha-10hz-binaural", "generate_binaural_beat", {"frequency": 10, "duration": 30})
+    key = generate_audio.job_cache_key(job)
+    assert key == generate_audio.job_cache_key(job)
+    helper.write_text("GAIN = 2\n")
+    assert key != generate_audio.job_cache_key(job)
+
+def test_render_sources_cover_helper_modules():
+    names = {os.path.basename(path) for path in generate_audio.render_sources()}
+    assert {"generate_audio.py", "audio_stream.py", "colored_noise.py", "modulation.py"} <= names
+
+def test_restore_and_lru_eviction(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"), max_bytes=250)
+    for name in ("a", "b", "c"):
+        src = str(tmp_path / f"{name}.wav")
+        write_file(src, 100)
+        cache.store(name, name, src)
+    cache.entries["a"]["last_used"] = 1
+    cache.entries["b"]["last_used"] = 3
+    cache.entries["c"]["last_used"] = 2
+
+    assert cache.evict() == ["a"]
+    assert cache.lookup("a") is None
+
+    dest = str(tmp_path / "out.wav")
+    cache.restore("b", dest)
+    assert os.path.getsize(dest) == 100
+    cache.save()
+
+    reloaded = RenderCache(str(tmp_path / "cache"), max_bytes=250)
+    assert set(reloaded.entries) == {"b", "c"}
@@ -0,0 +1,74 @@
+import json
+import time
+
+import numpy as np
+
+import generate_audio
+import render_profile
+from render_profile import Profile, folded_stacks, profiled, stage, stage_totals
+
+def work():
+    with stage("synthesis"):
+        with stage("oscillator"):
+            time.sleep(0.02)
+            tone = np.ones(1_000_000)
+        time.sleep(0.01)
+    with stage("write"):
+        tone.sum()
+    return "done"
+
+def stages(report):
+    return {entry["stage"]: entry for entry in report["stages"]}
+
+def test_stages_nest_and_split_self_time():
+    result, report = profiled(work, "track")
+    assert result == "done"
+    by_path = stages(report)
+    assert set(by_path) == {"synthesis", "synthesis/oscillator", "write"}
+    synthesis, oscillator = by_path["synthesis"], by_path["synthesis/oscillator"]
+    assert oscillator["seconds"] >= 0.02
+    assert synthesis["seconds"] >= oscillator["seconds"] + 0.01
+    assert abs(synthesis["self_seconds"] - (synthesis["seconds"] - oscillator["seconds"])) < 1e-3
+    # The 8 MB array is charged to the stage that allocated it and to its parent
+    assert 7.5 < oscillator["alloc_peak_mb"] < 9
+    assert synthesis["alloc_peak_mb"] >= oscillator["alloc_peak_mb"]
+    assert by_path["write"]["alloc_peak_mb"] < 1
+    assert report["alloc_peak_mb"] >= oscillator["alloc_peak_mb"]
+
+def test_repeated_stages_accumulate():
+    def repeated():
+        for _ in range(3):
+            with stage("block"):
+                pass
+    _, report = profiled(repeated, "track")
+    assert stages(report)["block"]["calls"] == 3
+
+def test_stage_is_inert_without_a_profile():
+    assert render_profile._active is None
+    with stage("anything") as entered:
+        assert entered is None
+    with Profile("track"):
+        assert render_profile._active is not None
+    assert render_profile._active is None
+
+def test_folded_stacks_and_totals():
+    _, report = profiled(work, "track")
+    lines = folded_stacks([report])
+    assert lines[0].startswith("track ")
+    assert any(line.startswith("track;synthesis;oscillator ") for line in lines)
+    assert all(int(line.rsplit(" ", 1)[1]) >= 0 for line in lines)
+    totals = dict(stage_totals([report, report]))
+    assert totals["oscillator"] == 2 * stages(report)["synthesis/oscillator"]["self_seconds"]
+
+def test_run_jobs_collects_profiles(tmp_path):
+    jobs = [job for job in generate_audio.build_jobs(duration=21) if job[0] in ("pink-noise", "om-drone")]
+    for _, _, params in jobs:
+        params["sample_rate"] = 8000
+    profiles = {}
+    generate_audio.run_jobs(jobs, str(tmp_path), profiles=profiles)
+    assert set(profiles) == {"pink-noise", "om-drone"}
+    pink = stages(profiles["pink-noise"])
+    assert {"synthesis", "synthesis/noise", "synthesis/fft", "synthesis/normalize", "synthesis/quantize"} <= set(pink)
+    assert "synthesis/oscillator" in stages(profiles["om-drone"])
+    json.dumps(profiles)
+    assert render_profile._active is None
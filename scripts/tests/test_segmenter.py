@@ -0,0 +1,131 @@
+import os
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+from scipy import signal
+from scipy.io import wavfile
+
+from segmenter import (
+    AAC_FRAME,
+    INIT_NAME,
+    PLAYLIST_NAME,
+    segment_frames,
+    segment_name,
+    segment_tracks,
+)
+
+SAMPLE_RATE = 44100
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not on PATH")
+
+@pytest.fixture
+def source(tmp_path):
+    # A sweep never repeats, so the decoded stream aligns with it at one offset only
+    t = np.arange(10 * SAMPLE_RATE + 123) / SAMPLE_RATE
+    sweep = 0.5 * signal.chirp(t, 100, t[-1], 2000)
+    frames = np.round(np.column_stack((sweep, -sweep)) * 32767).astype(np.int16)
+    path = tmp_path / "track.wav"
+    wavfile.write(path, SAMPLE_RATE, frames)
+    return str(path), frames
+
+def read_playlist(track_dir):
+    with open(os.path.join(track_dir, PLAYLIST_NAME), encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    durations = [float(line[len("#EXTINF:"):].rstrip(",")) for line in lines if line.startswith("#EXTINF:")]
+    segments = [line for line in lines if line and not line.startswith("#")]
+    return lines, durations, segments
+
+def decode(data, tmp_path):
+    path = tmp_path / "joined.mp4"
+    path.write_bytes(data)
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", str(path), "-f", "s16le", "pipe:1"],
+        capture_output=True, check=True,
+    )
+    return np.frombuffer(result.stdout, dtype="<i2").reshape(-1, 2) / 32768
+
+def test_segments_are_whole_aac_frames():
+    assert segment_frames(6, 44100) == 258 * AAC_FRAME
+    assert segment_frames(6, 48000) == 281 * AAC_FRAME
+    assert segment_frames(0.001, 8000) == AAC_FRAME
+
+def test_non_hls_formats_are_rejected(source, tmp_path):
+    path, _ = source
+    for fmt in ("opus-96", "mp3-128", "wav"):
+        with pytest.raises(ValueError, match="unsupported segment format"):
+            segment_tracks({"track": path}, str(tmp_path / "segments"), fmt)
+
+@needs_ffmpeg
+def test_playlist_lists_fmp4_segments(source, tmp_path):
+    path, frames = source
+    out = tmp_path / "segments"
+    assert segment_tracks({"track": path}, str(out), segment_seconds=3) == {"track": 4}
+    lines, durations, segments = read_playlist(out / "track")
+    assert lines[0] == "#EXTM3U" and lines[-1] == "#EXT-X-ENDLIST"
+    assert f'#EXT-X-MAP:URI="{INIT_NAME}"' in lines
+    assert segments == [segment_name(i) for i in range(4)]
+    assert sorted(os.listdir(out / "track")) == sorted([PLAYLIST_NAME, INIT_NAME, *segments])
+    step = segment_frames(3, SAMPLE_RATE) / SAMPLE_RATE
+    assert durations[:-1] == pytest.approx([step] * 3, abs=1e-4)
+    # The encoder delay and final frame padding add at most a few frames in total
+    assert 0 <= sum(durations) - len(frames) / SAMPLE_RATE < 3 * AAC_FRAME / SAMPLE_RATE
+
+@needs_ffmpeg
+def test_joined_segments_play_without_gaps(source, tmp_path):
+    path, frames = source
+    out = tmp_path / "segments"
+    segment_tracks({"track": path}, str(out), segment_seconds=2)
+    _, _, segments = read_playlist(out / "track")
+    track_dir = out / "track"
+    joined = (track_dir / INIT_NAME).read_bytes() + b"".join((track_dir / name).read_bytes() for name in segments)
+    decoded = decode(joined, tmp_path)
+    expected = frames / 32768
+
+    # Align once for the encoder delay; a gap or overlap at any boundary
+    # would shift everything after it out of alignment
+    lags = range(0, 4 * AAC_FRAME)
+    probe = expected[SAMPLE_RATE:2 * SAMPLE_RATE, 0]
+    delay = max(lags, key=lambda lag: np.dot(probe, decoded[SAMPLE_RATE + lag:2 * SAMPLE_RATE + lag, 0]))
+    assert len(decoded) - delay >= len(expected)
+    error = np.abs(decoded[delay:delay + len(expected)] - expected)
+    step = segment_frames(2, SAMPLE_RATE)
+    interior = error[AAC_FRAME:-AAC_FRAME]
+    for boundary in range(step, len(decoded), step):
+        around = error[max(boundary - delay - 256, 0):boundary - delay + 256]
+        assert around.max() < 0.02, boundary
+    assert interior.max() < 0.02
+
+@needs_ffmpeg
+def test_each_segment_decodes_after_the_init_segment(source, tmp_path):
+    path, _ = source
+    out = tmp_path / "segments"
+    segment_tracks({"track": path}, str(out), segment_seconds=2)
+    track_dir = out / "track"
+    decoded = decode((track_dir / INIT_NAME).read_bytes() + (track_dir / segment_name(2)).read_bytes(), tmp_path)
+    assert len(decoded) == segment_frames(2, SAMPLE_RATE)
+    assert np.abs(decoded).max() > 0.3
+
+@needs_ffmpeg
+def test_resegmenting_replaces_the_track(source, tmp_path):
+    path, _ = source
+    out = tmp_path / "segments"
+    segment_tracks({"track": path, "copy": path}, str(out), segment_seconds=1, workers=2)
+    segment_tracks({"track": path}, str(out), segment_seconds=5)
+    _, _, segments = read_playlist(out / "track")
+    assert sorted(os.listdir(out / "track")) == sorted([PLAYLIST_NAME, INIT_NAME, *segments])
+    assert len(segments) == 3
+    assert not os.path.exists(out / "track.tmp")
+
+@needs_ffmpeg
+def test_failed_packaging_keeps_the_previous_segments(source, tmp_path):
+    path, _ = source
+    out = tmp_path / "segments"
+    segment_tracks({"track": path}, str(out), segment_seconds=5)
+    before = sorted(os.listdir(out / "track"))
+    broken = tmp_path / "broken.mp3"
+    broken.write_bytes(b"\xff\xfb" + b"\0" * 100)
+    with pytest.raises((RuntimeError, ValueError)):
+        segment_tracks({"track": str(broken)}, str(out))
+    assert sorted(os.listdir(out / "track")) == before
@@ -0,0 +1,86 @@
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from generate_audio import generate_binaural_beat, generate_isochronic_tone, generate_rain_noise, save_audio
+from spectral_verify import (
+    catalogue_expectations,
+    excerpt_span,
+    peak_frequencies,
+    track_expectation,
+    verify_files,
+)
+
+SAMPLE_RATE = 8000
+DURATION = 30
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not on PATH")
+
+@pytest.fixture(scope="module")
+def renders(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("renders")
+    tracks = {
+        "alpha-10hz-binaural": generate_binaural_beat(10, duration=DURATION, sample_rate=SAMPLE_RATE),
+        "12hz-isochronic": generate_isochronic_tone(12, duration=DURATION, sample_rate=SAMPLE_RATE),
+        "grid-7.5hz-300hz-binaural": generate_binaural_beat(7.5, 300, duration=DURATION, sample_rate=SAMPLE_RATE),
+        # Rendered at the wrong beat frequency for its name
+        "theta-6hz-binaural": generate_binaural_beat(8, duration=DURATION, sample_rate=SAMPLE_RATE),
+        "rain": generate_rain_noise(duration=DURATION, sample_rate=SAMPLE_RATE),
+    }
+    paths = {}
+    for name, audio in tracks.items():
+        paths[name] = str(directory / f"{name}.wav")
+        save_audio(audio, paths[name], SAMPLE_RATE)
+    return paths
+
+def test_expectations_follow_the_catalogue():
+    catalogue = catalogue_expectations()
+    assert len(catalogue) == 14
+    assert catalogue["alpha-10hz-binaural"] == {"kind": "binaural", "carrier": 220, "beat": 10}
+    assert catalogue["12hz-isochronic"] == {"kind": "isochronic", "carrier": 180, "rate": 12}
+    assert track_expectation("grid-7.5hz-300hz-binaural", catalogue) == {"kind": "binaural", "carrier": 300, "beat": 7.5}
+    assert track_expectation("rain", catalogue) is None
+
+def test_excerpt_avoids_fades():
+    assert excerpt_span(300) == (140, 20)
+    assert excerpt_span(30) == (10, 10)
+    assert excerpt_span(15) == (0, 15)
+
+def test_peak_interpolation_is_sub_bin():
+    freqs = np.arange(100) * 0.5
+    psd = np.exp(-((freqs - 20.2) ** 2))[None, :].repeat(3, axis=0)
+    np.testing.assert_allclose(peak_frequencies(freqs, psd, (1, 40)), 20.2, atol=1e-9)
+
+def test_verify_catalogue_renders(renders):
+    results = verify_files(list(renders.values()))
+    assert set(results) == {path for name, path in renders.items() if name != "rain"}
+
+    binaural = results[renders["alpha-10hz-binaural"]]
+    assert binaural["failures"] == []
+    assert binaural["carrier"] == pytest.approx(220, abs=0.05)
+    assert binaural["beat"] == pytest.approx(10, abs=0.01)
+
+    isochronic = results[renders["12hz-isochronic"]]
+    assert isochronic["failures"] == []
+    assert isochronic["carrier"] == pytest.approx(180, abs=0.05)
+    assert isochronic["rate"] == pytest.approx(12, abs=0.01)
+
+    assert results[renders["grid-7.5hz-300hz-binaural"]]["failures"] == []
+
+def test_wrong_parameters_are_reported(renders):
+    result = verify_files([renders["theta-6hz-binaural"]])[renders["theta-6hz-binaural"]]
+    assert result["beat"] == pytest.approx(8, abs=0.01)
+    assert len(result["failures"]) == 1 and "expected 6 Hz" in result["failures"][0]
+
+@needs_ffmpeg
+def test_compressed_tracks_are_verified(renders, tmp_path):
+    mp3 = str(tmp_path / "12hz-isochronic.mp3")
+    subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", renders["12hz-isochronic"], "-b:a", "64k", mp3],
+        check=True,
+    )
+    result = verify_files([mp3])[mp3]
+    assert result["failures"] == []
+    assert result["rate"] == pytest.approx(12, abs=0.01)
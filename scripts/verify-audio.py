@@ -0,0 +1,67 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from spectral_verify import ANALYSIS_SECONDS, verify_files
+
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".opus")
+
+def find_audio_files(audio_dir):
+    return sorted(
+        os.path.join(audio_dir, file) for file in os.listdir(audio_dir)
+        if file.lower().endswith(AUDIO_EXTENSIONS)
+    )
+
+def print_result(path, result):
+    name = os.path.basename(path)
+    if "error" in result:
+        print(f"  ERROR {name}: {result['error']}")
+        return
+    if result["kind"] == "binaural":
+        measured = f"carrier {result['carrier']:.2f} Hz, beat {result['beat']:.3f} Hz"
+    else:
+        measured = f"carrier {result['carrier']:.2f} Hz, pulse rate {result['rate']:.3f} Hz"
+    status = "FAIL" if result["failures"] else "ok"
+    print(f"  {status:<5} {name}: {measured}")
+    for failure in result["failures"]:
+        print(f"        - {failure}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Verify the carrier, beat and pulse rate of rendered binaural and isochronic tracks",
+    )
+    parser.add_argument("audio_dir", nargs="?", default="../assets/audio",
+                        help="directory of rendered tracks (default: ../assets/audio)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of decode worker processes (0 = one per CPU)")
+    parser.add_argument("--seconds", type=float, default=ANALYSIS_SECONDS,
+                        help=f"excerpt analysed per track (default: {ANALYSIS_SECONDS:g})")
+    parser.add_argument("--json", metavar="PATH", help="write the results as JSON")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.isdir(args.audio_dir):
+        print(f"Directory {args.audio_dir} not found")
+        sys.exit(1)
+
+    files = find_audio_files(args.audio_dir)
+    start = time.perf_counter()
+    results = verify_files(files, args.jobs or os.cpu_count() or 1, args.seconds)
+    wall_time = time.perf_counter() - start
+
+    for path, result in results.items():
+        print_result(path, result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"wall_time": wall_time, "tracks": results}, f, indent=2)
+
+    failed = [path for path, result in results.items() if "error" in result or result["failures"]]
+    print(f"\nVerified {len(results)} of {len(files)} files ({len(failed)} failed) in {wall_time:.2f}s")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
-import os, re, subprocess, sys
+import argparse, os, re, subprocess, sys
 
-SKIP_DIRS = {".git", "node_modules", "dist", "build", ".next", "out", ".turbo", ".cache"}
+from tree_scan import add_arguments, scan_tree
 
 ABS_PREFIX_RE = re.compile(
     r"""(['"])                          # quote
@@ -75,42 +75,30 @@ def replace_abs_paths(src: str) -> (str, int):
     out = ABS_PREFIX_RE.sub(repl, src)
     return out, n
 
-def main():
-    root = git_root()
-    changed_files = []
-    total_repls = 0
-
-    for dirpath, dirnames, filenames in os.walk(root):
-        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
-        for fn in filenames:
-            fp = os.path.join(dirpath, fn)
-            rel = os.path.relpath(fp, root).replace("\\", "/")
-            if not should_scan(rel):
-                continue
-
-            try:
-                with open(fp, "r", encoding="utf-8") as f:
-                    src = f.read()
-            except Exception:
-                continue
-
-            if "/home/ubuntu/" not in src:
-                continue
+def fix_source(src: str) -> (str, int):
+    new_src, n = replace_abs_paths(src)
+    if n == 0:
+        return src, 0
+    return ensure_imports_and_root(new_src), n
 
-            new_src, n = replace_abs_paths(src)
-            if n == 0:
-                continue
-
-            new_src = ensure_imports_and_root(new_src)
-
-            if new_src != src:
-                with open(fp, "w", encoding="utf-8") as f:
-                    f.write(new_src)
-                changed_files.append(rel)
-                total_repls += n
+def main():
+    parser = argparse.ArgumentParser(description="Replace hardcoded /home/ubuntu/ roots in JS/TS tests with path.join(ROOT, ...)")
+    add_arguments(parser)
+    args = parser.parse_args()
 
-    print(f"[path-fix-v2] updated_files={len(changed_files)} replacements={total_repls}")
-    for f in changed_files:
+    root = git_root()
+    changed, scanned, skipped = scan_tree(
+        root, should_scan, fix_source, __file__,
+        args.dry_run, args.jobs, not args.no_index,
+    )
+    total_repls = sum(n for n, _ in changed.values())
+
+    if args.dry_run:
+        for _, diff in changed.values():
+            sys.stdout.write(diff)
+    verb = "would_update" if args.dry_run else "updated_files"
+    print(f"[path-fix-v2] {verb}={len(changed)} replacements={total_repls} scanned={scanned} unchanged_by_index={skipped}")
+    for f in changed:
         print(" -", f)
 
 if __name__ == "__main__":
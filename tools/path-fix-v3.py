@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
-import os, re
+import argparse, os, re, sys
+
+from tree_scan import add_arguments, scan_tree
 
-SKIP_DIRS = {".git","node_modules","dist","build",".next","out",".turbo",".cache"}
 # Replace both healing_app + landing_app absolute roots
 ABS_PREFIX = re.compile(r"/home/ubuntu/(harmonia_healing_app|harmonia_landing_app)\b")
 
@@ -23,38 +24,27 @@ def should_scan(path: str) -> bool:
         return True
     return False
 
+def fix_source(src: str) -> (str, int):
+    return ABS_PREFIX.subn("${PROJECT_ROOT}", src)
+
 def main():
+    parser = argparse.ArgumentParser(description="Replace hardcoded /home/ubuntu/ app roots with ${PROJECT_ROOT}")
+    add_arguments(parser)
+    args = parser.parse_args()
+
     root = os.getcwd()
-    changed = 0
-    repls = 0
-    changed_files = []
-
-    for dirpath, dirnames, filenames in os.walk(root):
-        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
-        for fn in filenames:
-            p = os.path.join(dirpath, fn)
-            rel = os.path.relpath(p, root).replace("\\","/")
-            if not should_scan(p):
-                continue
-            try:
-                with open(p, "r", encoding="utf-8") as f:
-                    src = f.read()
-            except Exception:
-                continue
-
-            if "/home/ubuntu/" not in src:
-                continue
-
-            new = ABS_PREFIX.sub("${PROJECT_ROOT}", src)
-            if new != src:
-                with open(p, "w", encoding="utf-8") as f:
-                    f.write(new)
-                changed += 1
-                repls += len(ABS_PREFIX.findall(src))
-                changed_files.append(rel)
-
-    print(f"[path-fix-v3] updated_files={changed} replacements~={repls}")
-    for f in changed_files:
+    changed, scanned, skipped = scan_tree(
+        root, should_scan, fix_source, __file__,
+        args.dry_run, args.jobs, not args.no_index,
+    )
+    repls = sum(n for n, _ in changed.values())
+
+    if args.dry_run:
+        for _, diff in changed.values():
+            sys.stdout.write(diff)
+    verb = "would_update" if args.dry_run else "updated_files"
+    print(f"[path-fix-v3] {verb}={len(changed)} replacements={repls} scanned={scanned} unchanged_by_index={skipped}")
+    for f in changed:
         print(" -", f)
 
 if __name__ == "__main__":
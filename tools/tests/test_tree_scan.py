@@ -0,0 +1,119 @@
+import mmap
+import os
+
+import tree_scan
+from tree_scan import MMAP_MIN_SIZE, NEEDLE, contains, index_path, scan_tree
+
+def should_scan(rel):
+    return rel.endswith(".txt")
+
+def fix(src):
+    return src.replace("/home/ubuntu/app", "${PROJECT_ROOT}"), src.count("/home/ubuntu/app")
+
+def scan(root, tool, **kwargs):
+    return scan_tree(str(root), should_scan, fix, str(tool), **kwargs)
+
+def make_tree(tmp_path):
+    root = tmp_path / "repo"
+    (root / "docs").mkdir(parents=True)
+    (root / "node_modules").mkdir()
+    (root / "docs" / "clean.txt").write_text("nothing to fix\n")
+    (root / "docs" / "other.txt").write_text("also clean\n")
+    (root / "fix.txt").write_text("cd /home/ubuntu/app\n")
+    (root / "node_modules" / "skip.txt").write_text("cd /home/ubuntu/app\n")
+    (root / "notes.md").write_text("cd /home/ubuntu/app\n")
+    tool = tmp_path / "tool.py"
+    tool.write_text("# tool\n")
+    return root, tool
+
+def test_fixes_matching_files_and_skips_pruned_dirs(tmp_path):
+    root, tool = make_tree(tmp_path)
+    changed, scanned, skipped = scan(root, tool)
+    assert list(changed) == ["fix.txt"]
+    assert changed["fix.txt"] == (1, None)
+    assert (scanned, skipped) == (3, 0)
+    assert (root / "fix.txt").read_text() == "cd ${PROJECT_ROOT}\n"
+    assert "/home/ubuntu/" in (root / "node_modules" / "skip.txt").read_text()
+    assert "/home/ubuntu/" in (root / "notes.md").read_text()
+
+def test_index_skips_unchanged_files_until_mtime_or_size_changes(tmp_path):
+    root, tool = make_tree(tmp_path)
+    scan(root, tool)
+    assert os.path.isfile(index_path(str(root), "tool"))
+
+    # The fixed file was rewritten, so only the two clean files are trusted
+    changed, scanned, skipped = scan(root, tool)
+    assert (changed, scanned, skipped) == ({}, 3, 2)
+    assert scan(root, tool)[2] == 3
+
+    clean = root / "docs" / "clean.txt"
+    st = clean.stat()
+    os.utime(clean, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert scan(root, tool)[2] == 2
+
+    # Same mtime, different size: still rescanned
+    other = root / "docs" / "other.txt"
+    st = other.stat()
+    other.write_text("cd /home/ubuntu/app\n")
+    os.utime(other, ns=(st.st_atime_ns, st.st_mtime_ns))
+    changed, _, skipped = scan(root, tool)
+    assert list(changed) == ["docs/other.txt"] and skipped == 2
+
+def test_index_is_discarded_when_the_tool_changes_or_disabled(tmp_path):
+    root, tool = make_tree(tmp_path)
+    scan(root, tool)
+    assert scan(root, tool, use_index=False)[2] == 0
+    tool.write_text("# tool, edited\n")
+    assert scan(root, tool)[2] == 0
+
+def test_dry_run_returns_a_diff_without_writing(tmp_path):
+    root, tool = make_tree(tmp_path)
+    changed, _, _ = scan(root, tool, dry_run=True)
+    replacements, diff = changed["fix.txt"]
+    assert replacements == 1
+    assert diff.startswith("--- a/fix.txt\n+++ b/fix.txt\n")
+    assert "-cd /home/ubuntu/app\n" in diff and "+cd ${PROJECT_ROOT}\n" in diff
+    assert (root / "fix.txt").read_text() == "cd /home/ubuntu/app\n"
+    # Nothing was written, so a real run still finds the file
+    assert list(scan(root, tool)[0]) == ["fix.txt"]
+
+def test_rewrite_keeps_line_endings_and_encoding(tmp_path):
+    root, tool = make_tree(tmp_path)
+    original = "# Café ☕\r\ncd /home/ubuntu/app\r\nmixed\nend\r\n".encode("utf-8")
+    (root / "crlf.txt").write_bytes(original)
+    # Not UTF-8: left alone rather than corrupted
+    latin1 = "caf\xe9 /home/ubuntu/app\n".encode("latin-1")
+    (root / "latin1.txt").write_bytes(latin1)
+
+    changed, _, _ = scan(root, tool)
+    assert "crlf.txt" in changed and "latin1.txt" not in changed
+    assert (root / "crlf.txt").read_bytes() == original.replace(b"/home/ubuntu/app", b"${PROJECT_ROOT}")
+    assert (root / "latin1.txt").read_bytes() == latin1
+
+def test_large_files_are_prefiltered_through_mmap(tmp_path, monkeypatch):
+    maps = []
+    real_mmap = mmap.mmap
+
+    def spy(*args, **kwargs):
+        maps.append(args)
+        return real_mmap(*args, **kwargs)
+
+    monkeypatch.setattr(tree_scan.mmap, "mmap", spy)
+    small = tmp_path / "small.txt"
+    small.write_bytes(b"x" * 100 + NEEDLE)
+    assert contains(str(small)) and maps == []
+
+    large = tmp_path / "large.txt"
+    large.write_bytes(b"x" * MMAP_MIN_SIZE + NEEDLE)
+    clean = tmp_path / "clean.txt"
+    clean.write_bytes(b"x" * (MMAP_MIN_SIZE + 10))
+    assert contains(str(large))
+    assert not contains(str(clean))
+    assert len(maps) == 2
+
+    # The same path serves a full scan of a large file
+    root, tool = make_tree(tmp_path)
+    (root / "big.txt").write_bytes(b"y" * MMAP_MIN_SIZE + b"\ncd /home/ubuntu/app\n")
+    changed, _, _ = scan(root, tool)
+    assert "big.txt" in changed and len(maps) == 3
+    assert (root / "big.txt").read_bytes().endswith(b"\ncd ${PROJECT_ROOT}\n")
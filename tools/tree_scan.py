@@ -0,0 +1,181 @@
+"""
+Shared tree scanner for the path-fix tools
+- Walks the tree with os.scandir, pruning SKIP_DIRS
+- Prefilters each candidate with a byte search (through mmap for large
+  files), so only files that contain the needle are decoded
+- Reads, fixes and writes files in a thread pool, in batches so that
+  pool overhead stays small next to the per-file work
+- Dry-run mode returns unified diffs instead of writing
+- A persistent (mtime, size) index remembers files that needed no fix, so
+  repeat runs only look at files that changed since
+"""
+
+import difflib
+import hashlib
+import json
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+SKIP_DIRS = {".git", "node_modules", "dist", "build", ".next", "out", ".turbo", ".cache"}
+NEEDLE = b"/home/ubuntu/"
+MMAP_MIN_SIZE = 1 << 20  # smaller files are cheaper to read() than to map
+BATCH_SIZE = 256  # files per thread pool task
+# Lives under .cache, which the walk skips
+INDEX_DIR = os.path.join(".cache", "path-fix")
+
+def walk_files(root, skip_dirs=SKIP_DIRS):
+    """Yield (relative path, os.stat_result) for every regular file under root"""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = sorted(os.scandir(directory), key=lambda entry: entry.name)
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in skip_dirs:
+                        stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    rel = os.path.relpath(entry.path, root).replace("\\", "/")
+                    yield rel, entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+
+def contains(path, needle=NEEDLE):
+    """
+    Whether the file's raw bytes contain needle
+    - Files of MMAP_MIN_SIZE or more are searched through mmap rather than
+      read into memory
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_MIN_SIZE:
+            return needle in f.read()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm.find(needle) != -1
+
+def source_version(*paths):
+    """Digest of the given source files, so editing a tool (or this module) invalidates its index"""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+class ScanIndex:
+    """
+    Persistent {relative path: [mtime_ns, size]} of files that needed no fix
+    - Entries are only trusted while the tool version matches
+    """
+
+    def __init__(self, path, version):
+        self.path = path
+        self.version = version
+        self.entries = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("version") == version:
+                self.entries = saved["files"]
+        except (OSError, ValueError, KeyError):
+            pass
+        self.seen = {}
+
+    def unchanged(self, rel, st):
+        return self.entries.get(rel) == [st.st_mtime_ns, st.st_size]
+
+    def record(self, rel, st):
+        self.seen[rel] = [st.st_mtime_ns, st.st_size]
+
+    def save(self):
+        """Write the files recorded this run (deleted files drop out)"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "files": self.seen}, f, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+def index_path(root, name):
+    return os.path.join(root, INDEX_DIR, f"{name}.json")
+
+def fix_file(root, rel, fix, needle=NEEDLE, dry_run=False):
+    """
+    Apply fix(src) -> (new_src, replacements) to one file
+    - Returns (replacements, diff or None) when the file changed, None when
+      it needs nothing (no needle, not UTF-8, or fix left it as is)
+    - Line endings are kept: the file is decoded from bytes, not read in
+      text mode
+    """
+    path = os.path.join(root, rel)
+    try:
+        if not contains(path, needle):
+            return None
+        with open(path, "rb") as f:
+            src = f.read().decode("utf-8")
+    except (OSError, UnicodeDecodeError):
+        return None
+
+    new_src, replacements = fix(src)
+    if new_src == src:
+        return None
+    if dry_run:
+        diff = "".join(difflib.unified_diff(
+            src.splitlines(True), new_src.splitlines(True), f"a/{rel}", f"b/{rel}",
+        ))
+        return replacements, diff
+    with open(path, "wb") as f:
+        f.write(new_src.encode("utf-8"))
+    return replacements, None
+
+def scan_tree(root, should_scan, fix, tool, dry_run=False, workers=None, use_index=True, needle=NEEDLE):
+    """
+    Fix every file under root that should_scan(relative path) accepts
+    - fix(src) -> (new_src, replacements) runs only on UTF-8 files that
+      contain needle
+    - tool is the calling script's path; it names the tool's index, which
+      is discarded whenever the script or this module changes
+    - Returns ({relative path: (replacements, diff or None)} in path order,
+      number of candidate files, number skipped by the index)
+    """
+    index = None
+    if use_index:
+        name = os.path.splitext(os.path.basename(tool))[0]
+        index = ScanIndex(index_path(root, name), source_version(tool, __file__))
+    candidates = []
+    skipped = 0
+    for rel, st in walk_files(root):
+        if not should_scan(rel):
+            continue
+        if index is not None and index.unchanged(rel, st):
+            index.record(rel, st)
+            skipped += 1
+            continue
+        candidates.append((rel, st))
+
+    def fix_batch(batch):
+        return [fix_file(root, rel, fix, needle, dry_run) for rel, _ in batch]
+
+    batches = [candidates[i:i + BATCH_SIZE] for i in range(0, len(candidates), BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = [result for batch in pool.map(fix_batch, batches) for result in batch]
+
+    changed = {}
+    for (rel, st), result in zip(candidates, results):
+        if result is None:
+            if index is not None:
+                index.record(rel, st)
+        else:
+            # Written files are scanned again next run rather than trusted
+            changed[rel] = result
+    if index is not None:
+        index.save()
+    return dict(sorted(changed.items())), len(candidates) + skipped, skipped
+
+def add_arguments(parser):
+    """Command-line options shared by the path-fix tools"""
+    parser.add_argument("--dry-run", action="store_true", help="print a unified diff instead of writing files")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="file worker threads (default: Python's choice)")
+    parser.add_argument("--no-index", action="store_true", help="ignore and don't update the mtime/size index")